@@ -0,0 +1,73 @@
+# Запуск из backend: python -m benchmarks.bench_column_width [--rows 1000000]
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from services.export_service import estimate_column_width
+
+
+def legacy_widths(df: pd.DataFrame) -> list:
+    # Прежний способ: вся колонка в строки и max по Python-списку
+    widths = []
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i].astype(str)
+        max_len = max(
+            [len(str(col))] + [len(v) for v in series.values if v is not None]
+        )
+        widths.append(min(max_len + 2, 60))
+    return widths
+
+
+def estimated_widths(df: pd.DataFrame, chunk_rows: int) -> list:
+    # Как в ExcelSheetWriter: оценка по каждому чанку
+    widths = [len(str(col)) for col in df.columns]
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start : start + chunk_rows]
+        for i in range(len(df.columns)):
+            widths[i] = max(widths[i], estimate_column_width(chunk.iloc[:, i]))
+    return [min(width + 2, 60) for width in widths]
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    words = np.array(["alpha", "beta", "gamma", "delta", "epsilon", "zeta"])
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "amount": rng.normal(1000, 250, rows),
+            "created_at": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 10**7, rows), unit="s"),
+            "flag": rng.integers(0, 2, rows).astype(bool),
+            "name": words[rng.integers(0, len(words), rows)],
+            "comment": pd.Series(words[rng.integers(0, len(words), rows)]).str.repeat(
+                rng.integers(1, 5, rows)
+            ),
+        }
+    )
+
+
+def measure(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"Строк: {len(df)}, колонок: {len(df.columns)}")
+
+    legacy_time, legacy = measure(legacy_widths, df)
+    estimated_time, estimated = measure(estimated_widths, df, args.chunk_rows)
+
+    print(f"Полный перебор:  {legacy_time:.3f} с  {legacy}")
+    print(f"Оценка по типам: {estimated_time:.3f} с  {estimated}")
+    print(f"Ускорение: x{legacy_time / estimated_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
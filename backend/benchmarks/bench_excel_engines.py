@@ -0,0 +1,91 @@
+# Запуск из backend: python -m benchmarks.bench_excel_engines [--rows 100000 1000000]
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+import xlsxwriter
+from services.reader_service import CalamineWorkbook, ReaderService
+
+PREVIEW_ROWS = 50
+
+
+def make_workbook(path: str, rows: int) -> None:
+    # Типичная выгрузка: числа, строки, даты, флаги и колонка с пропусками
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = workbook.add_worksheet()
+    date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+    sheet.write_row(0, 0, ["id", "Имя", "amount", "ratio", "created", "flag", "note"])
+    rng = random.Random(0)
+    started = datetime.datetime(2024, 1, 1)
+    for i in range(1, rows + 1):
+        sheet.write_number(i, 0, i)
+        sheet.write_string(i, 1, f"name{i % 997}")
+        sheet.write_number(i, 2, rng.randint(0, 10**6))
+        sheet.write_number(i, 3, rng.random())
+        sheet.write_datetime(i, 4, started + datetime.timedelta(minutes=i), date_format)
+        sheet.write_boolean(i, 5, i % 2 == 0)
+        if i % 3:
+            sheet.write_string(i, 6, "x" * (i % 20))
+    workbook.close()
+
+
+def read_all(reader: ReaderService, path: str, nrows=None) -> tuple:
+    start = time.perf_counter()
+    chunks = list(reader.iter_chunks(path, "excel", nrows=nrows))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(len(chunk) for chunk in chunks), chunks[0].dtypes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--skip-openpyxl-full", action="store_true")
+    args = parser.parse_args()
+
+    if CalamineWorkbook is None:
+        print("python-calamine не установлен, сравнивать не с чем")
+        return
+    openpyxl_reader = ReaderService(excel_engine="openpyxl")
+    calamine_reader = ReaderService(excel_engine="calamine")
+
+    for rows in args.rows:
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            make_workbook(path, rows)
+            print(f"Строк: {rows}, файл {os.path.getsize(path) / 2**20:.1f} МБ")
+
+            calamine_time, calamine_rows, calamine_dtypes = read_all(
+                calamine_reader, path
+            )
+            print(
+                f"  calamine, весь файл:        {calamine_time:.2f} с ({calamine_rows} строк)"
+            )
+            if not args.skip_openpyxl_full:
+                openpyxl_time, openpyxl_rows, openpyxl_dtypes = read_all(
+                    openpyxl_reader, path
+                )
+                print(
+                    f"  openpyxl, весь файл:        {openpyxl_time:.2f} с "
+                    f"x{openpyxl_time / calamine_time:.1f} медленнее"
+                )
+                assert (
+                    calamine_rows == openpyxl_rows
+                ), "Движки прочитали разное число строк"
+                pd.testing.assert_series_equal(calamine_dtypes, openpyxl_dtypes)
+
+            for name, reader in (
+                ("calamine", calamine_reader),
+                ("openpyxl", openpyxl_reader),
+            ):
+                preview_time, _, _ = read_all(reader, path, nrows=PREVIEW_ROWS)
+                print(f"  {name}, первые {PREVIEW_ROWS} строк: {preview_time:.3f} с")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Запуск из backend: python -m benchmarks.bench_translite [--columns 300 --imports 200]
+import argparse
+import random
+import re
+import time
+from transliterate import translit
+from services.translite_service import TransliteService
+
+WORDS = [
+    "Номер",
+    "Дата",
+    "Сумма",
+    "Клиент",
+    "Адрес доставки",
+    "Счёт",
+    "Объём",
+    "Щётка",
+    "Цена",
+    "Юрлицо",
+]
+
+
+def legacy_translite(text: str) -> str:
+    # Прежний способ: translit и некомпилированный re.sub на каждое имя
+    text = translit(text.strip().replace(" ", "_"), language_code="ru", reversed=True)
+    return re.sub("[^a-zA-Z0-9_]", "", f"{text}")
+
+
+def make_columns(count: int) -> list:
+    rng = random.Random(0)
+    return [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i % 50}" for i in range(count)]
+
+
+def legacy_run(columns: list, imports: int) -> list:
+    for _ in range(imports):
+        result = [legacy_translite(col) for col in columns]
+    return result
+
+
+def fast_run(columns: list, imports: int) -> list:
+    service = TransliteService()
+    for _ in range(imports):
+        result = service.translite_columns(columns)
+    return result
+
+
+def cold_run(columns: list, imports: int) -> list:
+    # Без попаданий в кэш: только таблица и скомпилированный regex
+    service = TransliteService(cache_size=0)
+    for _ in range(imports):
+        result = [service.translite(col) for col in columns]
+    return result
+
+
+def measure(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--columns", type=int, default=300)
+    parser.add_argument("--imports", type=int, default=200)
+    args = parser.parse_args()
+
+    columns = make_columns(args.columns)
+    print(f"Колонок: {len(columns)}, импортов: {args.imports}")
+
+    legacy_time, legacy = measure(legacy_run, columns, args.imports)
+    cold_time, cold = measure(cold_run, columns, args.imports)
+    fast_time, fast = measure(fast_run, columns, args.imports)
+    assert legacy == cold, "Результат транслита отличается от transliterate"
+
+    print(f"transliterate + re.sub:  {legacy_time:.3f} с")
+    print(f"str.translate без кэша:  {cold_time:.3f} с  x{legacy_time / cold_time:.1f}")
+    print(f"str.translate + LRU:     {fast_time:.3f} с  x{legacy_time / fast_time:.1f}")
+    print(
+        f"Переименовано при совпадении имён: {sum(a != b for a, b in zip(legacy, fast))}"
+    )
+
+
+if __name__ == "__main__":
+    main()
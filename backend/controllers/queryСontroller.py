@@ -1,41 +1,213 @@
+import asyncio
 import json
 from typing import Annotated, List, Union
 from fastapi import File, Form, HTTPException, Request, Response, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    StreamingResponse,
+)
 from services.import_service import ImportService
 from dependencies.services_dependency import get_db_servers, get_import_service
 from models.server import DatabaseServer
 from fastapi import APIRouter, Depends
+from starlette.background import BackgroundTask
+from starlette.types import Receive, Scope, Send
 from dependencies.services_dependency import (
+    get_admission_service,
+    get_cache_service,
+    get_executor_service,
     get_export_service,
+    get_job_service,
+    get_metrics_service,
+    get_pool_service,
     get_query_service,
+    get_result_encoder_service,
+    get_staging_service,
     get_translite_service,
 )
 from models.dto.import_dto import ImportDTO
 from models.dto.export_dto import ExportDTO
+from models.dto.export_result import ExportResult
+from models.dto.query_export_dto import QueryExportDTO
+from services.executor_service import ExecutorService
 from services.export_service import ExportService
+from services.job_service import JobService
+from services.metrics_service import MetricsService
+from services.pool_service import PoolService
+from services.staging_service import StagingService
+from services.cache_service import QueryCacheService
+from services.admission_service import (
+    AdmissionService,
+    QueueFullError,
+    QueueTimeoutError,
+)
 from services.query_service import QueryService
+from services.result_encoder_service import ARROW_MIME, ResultEncoderService
 from services.translite_service import TransliteService
 from models.dto.send_query_dto import SendQueryDTO
+from models.dto.batch_query_dto import BatchQueryDTO
+from models.dto.stream_query_dto import StreamQueryDTO
+from models.dto.page_query_dto import PageQueryDTO
 from services.logger_service import logger
 
 router = APIRouter()
 
 
+class ClosingStreamingResponse(StreamingResponse):
+    # Starlette не закрывает генератор тела, если клиент ушёл до его начала,
+    # и курсор со слотом очереди держались бы до сборки мусора
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+# Сколько строк файла показывает предпросмотр
+PREVIEW_ROWS = 50
+# Сколько строк из разных мест файла берётся для определения типов колонок
+PREVIEW_SAMPLE_ROWS = 1000
+MAX_PREVIEW_SAMPLE_ROWS = 100000
+
+
 @router.get("/servers")
 async def get_servers(db_servers: List[DatabaseServer] = Depends(get_db_servers)):
     logger.info("Получаем список серверов")
     return db_servers
 
 
+@router.get("/stats/pools")
+async def get_pool_stats(poolService: PoolService = Depends(get_pool_service)):
+    return poolService.stats()
+
+
+@router.get("/stats/admission")
+async def get_admission_stats(
+    admissionService: AdmissionService = Depends(get_admission_service),
+):
+    return admissionService.stats()
+
+
+@router.get("/stats/cache")
+async def get_cache_stats(
+    cacheService: QueryCacheService = Depends(get_cache_service),
+):
+    return cacheService.stats()
+
+
+@router.get("/stats/executors")
+async def get_executor_stats(
+    executorService: ExecutorService = Depends(get_executor_service),
+):
+    return executorService.stats()
+
+
+@router.get("/metrics")
+async def get_metrics(
+    metricsService: MetricsService = Depends(get_metrics_service),
+):
+    return Response(
+        content=metricsService.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/stats/staging")
+async def get_staging_stats(
+    stagingService: StagingService = Depends(get_staging_service),
+):
+    return stagingService.stats()
+
+
 @router.post("/execute")
 async def execute_query(
-    dto: SendQueryDTO, queryService: QueryService = Depends(get_query_service)
+    dto: SendQueryDTO,
+    request: Request,
+    queryService: QueryService = Depends(get_query_service),
+    encoderService: ResultEncoderService = Depends(get_result_encoder_service),
 ):
     try:
         logger.info("Выполняем SQL запрос...")
+        mime = encoderService.negotiate(request.headers.get("accept"))
+        if mime == ARROW_MIME:
+            dto.result_format = "columnar"
+
         results = await queryService.run_query(dto)
         logger.info("SQL запрос выполнен!")
+
+        # Ошибки отдаём обычным JSON, Arrow-схемы у них нет
+        if mime is not None and (mime != ARROW_MIME or results.status == "success"):
+            return Response(
+                content=encoderService.encode(results, mime), media_type=mime
+            )
+        return results
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
+    except QueueTimeoutError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Не удалось выполнить SQL: {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": f"Ошибка при выполнении запроса: {e}"}
+        )
+
+
+@router.post("/execute/page")
+async def execute_page_query(
+    dto: PageQueryDTO, queryService: QueryService = Depends(get_query_service)
+):
+    try:
+        logger.info(f"Выполняем SQL запрос, страница {dto.page}...")
+        results = await queryService.run_page(dto)
+        logger.info("SQL запрос выполнен!")
+        return results
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
+    except QueueTimeoutError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Не удалось выполнить SQL: {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": f"Ошибка при выполнении запроса: {e}"}
+        )
+
+
+@router.post("/execute/stream")
+async def execute_query_stream(
+    dto: StreamQueryDTO, queryService: QueryService = Depends(get_query_service)
+):
+    try:
+        logger.info("Выполняем потоковый SQL запрос...")
+        lines = await queryService.stream_query(dto)
+        return ClosingStreamingResponse(lines, media_type="application/x-ndjson")
+    except LookupError as e:
+        return JSONResponse(status_code=404, content={"detail": str(e)})
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
+    except QueueTimeoutError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Не удалось выполнить SQL: {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": f"Ошибка при выполнении запроса: {e}"}
+        )
+
+
+@router.post("/execute/batch")
+async def execute_batch_query(
+    dto: BatchQueryDTO, queryService: QueryService = Depends(get_query_service)
+):
+    try:
+        logger.info("Выполняем SQL запрос на нескольких серверах...")
+        results = await queryService.run_batch(dto)
+        logger.info(
+            f"SQL запрос выполнен: успешно {results.succeeded}, "
+            f"ошибок {results.failed}, отменено {results.cancelled}"
+        )
         return results
     except Exception as e:
         logger.error(f"Не удалось выполнить SQL: {e}")
@@ -50,32 +222,57 @@ async def import_data(
     importService: ImportService = Depends(get_import_service),
 ):
     try:
-        logger.error("Выполняем импорт...")
-        results = await importService.import_to_server(dto)
-        logger.info("Импорт выполнен!")
-        return results
+        logger.info("Ставим импорт в очередь...")
+        job = await importService.start_import(dto)
+        return job
+    except LookupError as e:
+        return JSONResponse(status_code=404, content={"detail": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
     except Exception as e:
         logger.error(f"Не удалось совершить импорт: {e}")
         return JSONResponse(
             status_code=500, content={"detail": f"Ошибка при импорте данных: {e}"}
         )
-    
+
+
+@router.get("/jobs")
+async def get_jobs(jobService: JobService = Depends(get_job_service)):
+    return jobService.list_jobs()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, jobService: JobService = Depends(get_job_service)):
+    job = jobService.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": "Задача не найдена"})
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, jobService: JobService = Depends(get_job_service)):
+    job = jobService.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": "Задача не найдена"})
+    logger.info(f"Отменяем задачу {job_id}")
+    return job
+
+
 @router.post("/import/preview")
 async def preview_file(
     file: UploadFile = File(...),
+    sample_rows: Annotated[
+        int, Form(ge=0, le=MAX_PREVIEW_SAMPLE_ROWS)
+    ] = PREVIEW_SAMPLE_ROWS,
     importService: ImportService = Depends(get_import_service),
 ):
     try:
         logger.info(f"Предпросмотр файла: {file.filename}")
-        df = await importService._read_file(file)
-        if df is None:
+        preview = await importService.preview_file(file, PREVIEW_ROWS, sample_rows)
+        if preview is None:
             raise HTTPException(status_code=400, detail="Не удалось прочитать файл")
-        preview = {
-            "headers": df.columns.tolist(),
-            "rows": df.head(50).fillna("").astype(str).values.tolist(),
-        }
         logger.info(f"Файл {file.filename} успешно обработан для предпросмотра")
-        return JSONResponse(content=preview)
+        return preview
 
     except Exception as e:
         logger.error(f"Ошибка предпросмотра файла {file.filename}: {e}")
@@ -84,9 +281,11 @@ async def preview_file(
             content={"detail": f"Ошибка при обработке файла: {e}"},
         )
 
+
 @router.post("/export")
 async def export_data(
-    request: Request, exportService: ExportService = Depends(get_export_service)
+    request: Request,
+    exportService: ExportService = Depends(get_export_service),
 ):
     try:
         logger.info("Выполняем экспорт...")
@@ -95,20 +294,54 @@ async def export_data(
             payload = json.loads(payload)
 
         dto = ExportDTO(**payload)
-        result = exportService.export(dto)
+        result = await exportService.export(dto)
 
-        headers = {
-            "Content-Disposition": f'attachment; filename="{result.filename}"',
-            "Content-Type": result.mime,
-            "Content-Length": str(len(result.content)),
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        }
+        logger.info(f"Экспорт подготовлен, отдаём {result.filename}")
+        return _export_response(result, exportService)
+
+    except TimeoutError as e:
+        logger.error(f"Не удалось совершить экспорт: {e}")
+        return JSONResponse(status_code=504, content={"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Не удалось совершить экспорт: {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": f"Ошибка при экспорте данных: {e}"}
+        )
 
-        logger.info(f"Экспорт выполнен!")
-        return Response(content=result.content, media_type=result.mime, headers=headers)
 
+@router.post("/export/query")
+async def export_query(
+    dto: QueryExportDTO,
+    queryService: QueryService = Depends(get_query_service),
+    exportService: ExportService = Depends(get_export_service),
+):
+    try:
+        logger.info("Выполняем экспорт из запроса...")
+        batches = await queryService.open_row_stream(
+            dto.server_id, dto.query, dto.chunk_size, dto.max_rows
+        )
+        result = await exportService.export_rows(
+            batches,
+            dto.format,
+            dto.auto_width,
+            dto.compression,
+            queryService.server_registry.get(dto.server_id),
+        )
+
+        logger.info(f"Экспорт подготовлен, отдаём {result.filename}")
+        return _export_response(result, exportService)
+
+    except LookupError as e:
+        return JSONResponse(status_code=404, content={"detail": str(e)})
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
+    except QueueTimeoutError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)})
+    except (asyncio.TimeoutError, TimeoutError) as e:
+        logger.error(f"Не удалось совершить экспорт: {e}")
+        return JSONResponse(
+            status_code=504, content={"detail": f"Таймаут экспорта: {e}"}
+        )
     except Exception as e:
         logger.error(f"Не удалось совершить экспорт: {e}")
         return JSONResponse(
@@ -116,6 +349,26 @@ async def export_data(
         )
 
 
+def _export_response(result: ExportResult, exportService: ExportService) -> Response:
+    headers = {
+        "Content-Disposition": f'attachment; filename="{result.filename}"',
+        "Cache-Control": "no-cache, no-store, must-revalidate",
+        "Pragma": "no-cache",
+        "Expires": "0",
+    }
+    if result.path is not None:
+        # Временный xlsx удаляем после отправки
+        return FileResponse(
+            result.path,
+            media_type=result.mime,
+            headers=headers,
+            background=BackgroundTask(exportService.cleanup, result.path),
+        )
+    return ClosingStreamingResponse(
+        result.chunks, media_type=result.mime, headers=headers
+    )
+
+
 # - - - - - - - - - TEST - - - - - - - - - - - - -
 
 
@@ -0,0 +1,95 @@
+import os
+from typing import List
+from models.server import DatabaseServer
+from services.admission_service import AdmissionService
+from services.bulk_loader_service import BulkLoaderService
+from services.cache_service import QueryCacheService
+from services.executor_service import ExecutorService
+from services.export_service import ExportService
+from services.import_service import ImportService
+from services.engine_service import EngineService
+from services.job_service import JobService
+from services.metrics_service import MetricsService
+from services.pagination_service import PaginationService
+from services.pool_service import PoolService
+from services.query_service import QueryService
+from services.reader_service import ReaderService
+from services.schema_service import SchemaService
+from services.staging_service import StagingService
+from services.result_encoder_service import ResultEncoderService
+from services.server_registry import ServerRegistry
+from services.translite_service import TransliteService
+
+
+class AppContainer:
+    def __init__(self, servers_path: str):
+        self.server_registry = ServerRegistry(servers_path)
+        self.metrics_service = MetricsService()
+        self.pool_service = PoolService()
+        self.admission_service = AdmissionService()
+        self.cache_service = QueryCacheService()
+        self.translite_service = TransliteService()
+        self.query_service = QueryService(
+            self.server_registry,
+            self.pool_service,
+            self.admission_service,
+            self.cache_service,
+            PaginationService(),
+            self.metrics_service,
+        )
+        self.executor_service = ExecutorService()
+        self.bulk_loader_service = BulkLoaderService(
+            self.pool_service, self.metrics_service, self.executor_service
+        )
+        self.engine_service = EngineService()
+        self.reader_service = ReaderService()
+        self.job_service = JobService()
+        self.schema_service = SchemaService()
+        self.staging_service = StagingService(self.reader_service)
+        self.import_service = ImportService(
+            self.server_registry,
+            self.translite_service,
+            self.query_service,
+            self.bulk_loader_service,
+            self.reader_service,
+            self.job_service,
+            self.executor_service,
+            self.schema_service,
+            self.staging_service,
+            self.metrics_service,
+            self.engine_service,
+        )
+        self.export_service = ExportService(self.executor_service, self.metrics_service)
+        self.result_encoder_service = ResultEncoderService()
+
+        self.server_registry.on_reload(self._on_servers_reload)
+
+    async def start(self) -> None:
+        self.server_registry.load()
+        await self.server_registry.start()
+        await self.pool_service.start()
+        await self.staging_service.start()
+
+    async def close(self) -> None:
+        await self.job_service.close()
+        await self.staging_service.close()
+        await self.server_registry.close()
+        await self.pool_service.close()
+        await self.engine_service.close()
+        await self.executor_service.close()
+
+    async def _on_servers_reload(
+        self, old_servers: List[DatabaseServer], new_servers: List[DatabaseServer]
+    ) -> None:
+        # Пулы и кэш удалённых и изменённых серверов сбрасываем сразу
+        new_by_id = {s.id: s for s in new_servers}
+        for server in old_servers:
+            if new_by_id.get(server.id) != server:
+                await self.pool_service.discard(server.id)
+                await self.engine_service.discard(server.id)
+                self.cache_service.invalidate_server(server.id)
+
+
+def build_container() -> AppContainer:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return AppContainer(os.path.join(current_dir, "..", "servers.json"))
@@ -1,71 +1,96 @@
-import json
-import os
-from fastapi import Depends
+from fastapi import Depends, Request
 from typing import List
+from dependencies.app_container import AppContainer
+from services.executor_service import ExecutorService
 from services.export_service import ExportService
 from services.import_service import ImportService
+from services.job_service import JobService
+from services.metrics_service import MetricsService
+from services.staging_service import StagingService
 from models.server import DatabaseServer
 from services.translite_service import TransliteService
 from services.query_service import QueryService
+from services.pool_service import PoolService
+from services.admission_service import AdmissionService
+from services.result_encoder_service import ResultEncoderService
+from services.cache_service import QueryCacheService
 
 
-def get_db_servers() -> List[DatabaseServer]:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    json_path = os.path.join(current_dir, "..", "servers.json")
+def get_container(request: Request) -> AppContainer:
+    return request.app.state.container
 
-    try:
-        with open(json_path, "r") as file:
-            servers_data = json.load(file)
 
-        db_servers = []
-        for server in servers_data:
-            db_servers.append(
-                DatabaseServer(
-                    id=server["id"],
-                    name=server["name"],
-                    host=server["host"],
-                    port=server["port"],
-                    username=server["username"],
-                    password=server["password"],
-                    database=server["database"],
-                    type=server["type"],
-                )
-            )
+def get_db_servers(
+    container: AppContainer = Depends(get_container),
+) -> List[DatabaseServer]:
+    return container.server_registry.servers
 
-        return db_servers
 
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Файл конфигурации не найден: {json_path}")
+def get_pool_service(container: AppContainer = Depends(get_container)) -> PoolService:
+    return container.pool_service
 
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Ошибка формата JSON в файле {json_path}: {e}")
 
-    except KeyError as e:
-        raise ValueError(f"Отсутствует обязательное поле в конфигурации: {e}")
-
-    except PermissionError:
-        raise PermissionError(f"Нет прав на чтение файла: {json_path}")
-
-    except Exception as e:
-        raise RuntimeError(f"Неперехваченная ошибка: {e}")
+def get_admission_service(
+    container: AppContainer = Depends(get_container),
+) -> AdmissionService:
+    return container.admission_service
 
 
 def get_query_service(
-    db_servers: List[DatabaseServer] = Depends(get_db_servers),
+    container: AppContainer = Depends(get_container),
 ) -> QueryService:
-    return QueryService(db_servers)
+    return container.query_service
 
 
-def get_translite_service() -> TransliteService:
-    return TransliteService()
+def get_translite_service(
+    container: AppContainer = Depends(get_container),
+) -> TransliteService:
+    return container.translite_service
 
 
 def get_import_service(
-    db_servers: List[DatabaseServer] = Depends(get_db_servers),
-    queryService: QueryService = Depends(get_query_service),
+    container: AppContainer = Depends(get_container),
 ) -> ImportService:
-    return ImportService(db_servers, get_translite_service(), queryService)
+    return container.import_service
+
+
+def get_export_service(
+    container: AppContainer = Depends(get_container),
+) -> ExportService:
+    return container.export_service
+
+
+def get_result_encoder_service(
+    container: AppContainer = Depends(get_container),
+) -> ResultEncoderService:
+    return container.result_encoder_service
+
+
+def get_cache_service(
+    container: AppContainer = Depends(get_container),
+) -> QueryCacheService:
+    return container.cache_service
+
+
+def get_job_service(
+    container: AppContainer = Depends(get_container),
+) -> JobService:
+    return container.job_service
+
+
+def get_executor_service(
+    container: AppContainer = Depends(get_container),
+) -> ExecutorService:
+    return container.executor_service
+
+
+def get_staging_service(
+    container: AppContainer = Depends(get_container),
+) -> StagingService:
+    return container.staging_service
 
 
-def get_export_service() -> ExportService:
-    return ExportService()
+def get_metrics_service(
+    container: AppContainer = Depends(get_container),
+) -> MetricsService:
+    return container.metrics_service
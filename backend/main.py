@@ -1,8 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from controllers.queryСontroller import router as queryRouter
 from fastapi.middleware.cors import CORSMiddleware
+from dependencies.app_container import build_container
 
-app = FastAPI(title="db_worker", root_path="/")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    container = build_container()
+    await container.start()
+    app.state.container = container
+    yield
+    await container.close()
+
+
+app = FastAPI(title="db_worker", root_path="/", lifespan=lifespan)
 
 origins = ["*"]
 
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class AdmissionConfig(BaseModel):
+    # Сколько запросов одновременно выполняется на всех серверах
+    global_limit: int = 50
+    # Сколько запросов одновременно выполняется на одном сервере
+    per_server_limit: int = 10
+    # Сколько запросов может ждать своей очереди к одному серверу
+    per_server_queue: int = 100
+    global_queue: int = 500
+    # Сколько запрос может ждать в очереди (не путать с таймаутом выполнения)
+    queue_timeout_sec: float = 10
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class CacheConfig(BaseModel):
+    ttl_sec: float = 30
+    # Общий объём кэша и максимальный размер одного результата в байтах
+    max_bytes: int = 64 * 1024 * 1024
+    max_entry_bytes: int = 8 * 1024 * 1024
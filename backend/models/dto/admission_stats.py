@@ -0,0 +1,22 @@
+from typing import List
+from pydantic import BaseModel
+
+
+class ServerAdmissionStats(BaseModel):
+    server_id: int
+    server: str
+    active: int
+    waiting: int
+    limit: int
+    admitted_total: int
+    rejected_total: int
+    timeouts_total: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class AdmissionStats(BaseModel):
+    active: int
+    waiting: int
+    limit: int
+    servers: List[ServerAdmissionStats] = []
@@ -0,0 +1,14 @@
+from typing import List, Literal, Union
+from pydantic import BaseModel
+
+
+class BatchQueryDTO(BaseModel):
+    query: str
+    # Список id серверов или "all" - все сервера из конфига
+    servers: Union[List[int], Literal["all"]] = "all"
+    server_type: Union[Literal["mysql", "postgresql", "oracle"], None] = None
+    # Вернуть ответ, как только успешно ответят first_n серверов
+    first_n: Union[int, None] = None
+    # Вернуть то, что успело выполниться за deadline_sec
+    deadline_sec: Union[float, None] = None
+    result_format: Literal["rows", "compact", "columnar"] = "rows"
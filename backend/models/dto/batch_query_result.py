@@ -0,0 +1,11 @@
+from typing import List, Union
+from pydantic import BaseModel
+from models.dto.query_result import QueryResult
+
+
+class BatchQueryResult(BaseModel):
+    results: List[QueryResult] = []
+    succeeded: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    time: Union[str, None] = None
@@ -0,0 +1,7 @@
+from typing import Union
+from pydantic import BaseModel
+
+
+class ColumnInfo(BaseModel):
+    name: str
+    type: Union[str, None] = None
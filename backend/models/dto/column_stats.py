@@ -0,0 +1,14 @@
+from typing import Literal, Union
+from pydantic import BaseModel
+
+
+class ColumnStats(BaseModel):
+    name: str
+    kind: Literal["integer", "float", "bool", "datetime", "string", "empty"]
+    count: int
+    null_count: int
+    # Для числовых колонок
+    min: Union[int, float, None] = None
+    max: Union[int, float, None] = None
+    # Для строковых колонок, в символах
+    max_len: Union[int, None] = None
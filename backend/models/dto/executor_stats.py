@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class ExecutorStats(BaseModel):
+    name: str
+    workers: int
+    running: int
+    queued: int
+    submitted_total: int
+    completed_total: int
+    failed_total: int
+    timeouts_total: int
+    avg_queue_wait_ms: float
+    max_queue_wait_ms: float
+    avg_run_ms: float
+    max_run_ms: float
@@ -1,8 +1,12 @@
-from typing import Any, Literal
+from typing import Any, Literal, Union
 from pydantic import BaseModel, ConfigDict
 
 
 class ExportDTO(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     data: Any
-    format: Literal["excel", "json", "csv"]
+    format: Literal["excel", "json", "ndjson", "csv", "parquet", "feather"]
+    # Подбирать ширину колонок xlsx по данным, иначе ширина одинаковая
+    auto_width: bool = True
+    # Кодек сжатия parquet/feather, по умолчанию zstd
+    compression: Union[Literal["zstd", "lz4", "snappy", "gzip"], None] = None
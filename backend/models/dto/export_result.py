@@ -1,7 +1,9 @@
-from typing import NamedTuple
+from typing import AsyncIterator, NamedTuple, Union
 
 
 class ExportResult(NamedTuple):
-    content: bytes
     mime: str
     filename: str
+    # Тело ответа отдаётся потоком; xlsx собирается во временный файл
+    chunks: Union[AsyncIterator[bytes], None] = None
+    path: Union[str, None] = None
@@ -0,0 +1,7 @@
+from typing import List, NamedTuple
+from models.dto.column_info import ColumnInfo
+
+
+class FetchResult(NamedTuple):
+    columns: List[ColumnInfo]
+    rows: List[tuple]
@@ -0,0 +1,13 @@
+from typing import Dict, List, Union
+from pydantic import BaseModel
+
+
+class FilePreview(BaseModel):
+    headers: List[str]
+    rows: List[List[str]]
+    # Типы колонок для каждого диалекта в порядке headers
+    sql_types: Dict[str, List[str]]
+    estimated_rows: Union[int, None] = None
+    rows_exact: bool = False
+    sampled_rows: int = 0
+    upload_token: Union[str, None] = None
@@ -0,0 +1,12 @@
+from typing import NamedTuple, Union
+import pandas as pd
+
+
+class FileSample(NamedTuple):
+    # Первые строки файла как есть
+    head: pd.DataFrame
+    # Строки из разных мест файла для определения типов, может быть пустой
+    sample: pd.DataFrame
+    estimated_rows: Union[int, None]
+    # Число строк взято из метаданных файла, а не оценено по размеру
+    exact: bool
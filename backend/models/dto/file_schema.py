@@ -0,0 +1,9 @@
+from typing import List, NamedTuple
+from models.dto.column_stats import ColumnStats
+
+
+class FileSchema(NamedTuple):
+    # Статистика колонок, по которой выводятся типы таблицы
+    stats: List[ColumnStats]
+    # Запас длины строк, если файл прочитан не целиком
+    min_varchar_len: int
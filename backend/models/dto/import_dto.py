@@ -1,12 +1,26 @@
+from typing import List, Literal, Union
 from fastapi import UploadFile
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from models.server import DatabaseServer
 
 
 class ImportDTO(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
-    upload_file: UploadFile
+    upload_file: Union[UploadFile, None] = None
+    # Токен файла, загруженного при предпросмотре, вместо повторной загрузки
+    upload_token: Union[str, None] = None
     table_name: str
     schema_name: str
-    server_id: int
+    server_id: Union[int, None] = None
+    # Импорт одного файла сразу на несколько серверов, вместо server_id
+    server_ids: Union[List[int], None] = None
+    # native - COPY/executemany через драйвер СУБД, sql - pandas.to_sql через SQLAlchemy
+    load_method: Literal["native", "sql"] = "native"
+    # Строк в одной пачке загрузки, по умолчанию - настройка загрузчика
+    batch_size: Union[int, None] = Field(default=None, ge=1, le=100000)
+    # Сколько соединений грузят партиции параллельно (только native),
+    # 1 - одна транзакция на весь файл
+    parallelism: int = Field(default=1, ge=1, le=16)
+    # Коммитить партиции строго в порядке файла
+    preserve_order: bool = False
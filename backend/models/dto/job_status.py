@@ -0,0 +1,22 @@
+from typing import Literal, Union
+from pydantic import BaseModel
+from models.dto.batch_query_result import BatchQueryResult
+from models.dto.query_result import QueryResult
+
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    server: str
+    status: Literal["queued", "running", "success", "error", "cancelled"] = "queued"
+    created_at: float
+    started_at: Union[float, None] = None
+    finished_at: Union[float, None] = None
+    rows_loaded: int = 0
+    # Доля обработанного файла от 0 до 1, если её можно оценить
+    progress: Union[float, None] = None
+    rows_per_sec: Union[float, None] = None
+    eta_sec: Union[float, None] = None
+    message: Union[str, None] = None
+    # Для импорта на несколько серверов - результат по каждому серверу
+    result: Union[QueryResult, BatchQueryResult, None] = None
@@ -0,0 +1,21 @@
+from typing import Any, List, Literal, Union
+from pydantic import BaseModel, Field
+from models.dto.send_query_dto import SendQueryDTO
+
+
+class FilterDTO(BaseModel):
+    column: str
+    op: Literal[
+        "eq", "ne", "lt", "lte", "gt", "gte", "like", "in", "is_null", "not_null"
+    ]
+    value: Any = None
+
+
+class PageQueryDTO(SendQueryDTO):
+    page: int = Field(default=1, ge=1)
+    limit: int = Field(default=100, ge=1, le=10000)
+    sort_by: Union[str, None] = None
+    sort_dir: Literal["asc", "desc"] = "asc"
+    filters: List[FilterDTO] = []
+    # Считать ли общее количество строк (отдельный COUNT(*) запрос)
+    with_total: bool = False
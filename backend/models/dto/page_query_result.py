@@ -0,0 +1,9 @@
+from typing import Union
+from models.dto.query_result import QueryResult
+
+
+class PageQueryResult(QueryResult):
+    page: int = 1
+    limit: int = 100
+    has_more: bool = False
+    total: Union[int, None] = None
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class PartitionResult(BaseModel):
+    index: int
+    rows: int
+    # Сколько раз партицию пришлось загружать, 1 - без повторов
+    attempts: int
+    # Время загрузки последней попытки, включая ожидание очереди коммита
+    time: float
+    rows_per_sec: float
@@ -0,0 +1,21 @@
+from typing import Union
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    server_id: int
+    server: str
+    type: str
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    reserved: int
+    min_size: int
+    max_size: int
+    acquired_total: int
+    avg_wait_ms: float
+    max_wait_ms: float
+    healthy: bool
+    idle_for_sec: float
+    last_health_check: Union[float, None] = None
@@ -0,0 +1,15 @@
+from typing import Literal, Union
+from pydantic import BaseModel, Field
+
+
+class QueryExportDTO(BaseModel):
+    server_id: int
+    query: str
+    format: Literal["excel", "json", "ndjson", "csv", "parquet", "feather"]
+    # Подбирать ширину колонок xlsx по данным, иначе ширина одинаковая
+    auto_width: bool = True
+    # Кодек сжатия parquet/feather, по умолчанию zstd
+    compression: Union[Literal["zstd", "lz4", "snappy", "gzip"], None] = None
+    # Без ограничения выгружается весь результат, xlsx обрезается по размеру листа
+    max_rows: Union[int, None] = Field(default=None, ge=1)
+    chunk_size: int = Field(default=5000, ge=1, le=100000)
@@ -1,5 +1,7 @@
-from typing import Any, List, Union
+from typing import Any, List, Literal, Union
 from pydantic import BaseModel
+from models.dto.column_info import ColumnInfo
+from models.dto.partition_result import PartitionResult
 
 
 class QueryResult(BaseModel):
@@ -8,3 +10,12 @@ class QueryResult(BaseModel):
     message: Union[str, None] = None
     data: List[Any] = []
     time: Union[str, None] = None
+    columns: Union[List[ColumnInfo], None] = None
+    format: Union[str, None] = None
+    cache: Union[Literal["hit", "miss", "bypass"], None] = None
+    # Возраст закэшированного результата в секундах
+    cache_age: Union[float, None] = None
+    rows: Union[int, None] = None
+    rows_per_sec: Union[float, None] = None
+    # Тайминги партиций параллельного импорта
+    partitions: Union[List[PartitionResult], None] = None
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic import BaseModel, ConfigDict
 from models.server import DatabaseServer
 
@@ -6,3 +7,10 @@ class SendQueryDTO(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     query: str
     selected_server: DatabaseServer
+    # rows - список словарей, compact - колонки один раз и строки массивами,
+    # columnar - колонки один раз и данные векторами по колонкам
+    result_format: Literal["rows", "compact", "columnar"] = "rows"
+    # Не читать и не писать кэш результатов
+    cache_bypass: bool = False
+    # Выбросить закэшированный результат и выполнить запрос заново
+    cache_invalidate: bool = False
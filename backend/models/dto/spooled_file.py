@@ -0,0 +1,6 @@
+from typing import NamedTuple
+
+
+class SpooledFile(NamedTuple):
+    path: str
+    size: int
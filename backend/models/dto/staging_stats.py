@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class StagingStats(BaseModel):
+    uploads: int
+    bytes: int
+    max_bytes: int
+    in_use: int
+    staged_total: int
+    evicted_total: int
+    rejected_total: int
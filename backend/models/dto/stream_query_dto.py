@@ -0,0 +1,9 @@
+from typing import Union
+from pydantic import Field
+from models.dto.send_query_dto import SendQueryDTO
+
+
+class StreamQueryDTO(SendQueryDTO):
+    # Не больше строк, чем разрешено в QueryService.stream_max_rows
+    max_rows: Union[int, None] = Field(default=None, ge=1)
+    chunk_size: int = Field(default=1000, ge=1, le=100000)
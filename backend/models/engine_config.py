@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class EngineConfig(BaseModel):
+    pool_size: int = 5
+    max_overflow: int = 5
+    # Соединения старше этого возраста пересоздаются при выдаче из пула
+    pool_recycle_sec: int = 1800
+    pool_timeout_sec: int = 30
+    # Проверять соединение перед выдачей, чтобы не ловить обрывы после простоя
+    pool_pre_ping: bool = True
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class ExecutorConfig(BaseModel):
+    # Потоки для блокирующего ввода-вывода и разбора файлов
+    io_workers: int = 8
+    # Процессы для тяжёлого кодирования (xlsx, json), обходят GIL
+    cpu_workers: int = 2
+    # Сколько секунд ждём результата задачи, включая ожидание в очереди
+    task_timeout_sec: int = 300
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class PoolConfig(BaseModel):
+    min_size: int = 1
+    max_size: int = 10
+    # Сколько секунд пул может простаивать, прежде чем его закроют
+    idle_timeout_sec: int = 300
+    # Как часто проверять живость пулов и выселять простаивающие
+    health_check_interval_sec: int = 60
+    # Максимальное время жизни соединения в пуле
+    recycle_sec: int = 1800
+    acquire_timeout_sec: int = 10
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class StagingConfig(BaseModel):
+    # Сколько секунд загруженный в предпросмотре файл ждёт импорта
+    ttl_sec: int = 1800
+    # Общий объём файлов в staging, старые файлы выселяются
+    max_bytes: int = 2 * 1024 * 1024 * 1024
+    sweep_interval_sec: int = 60
@@ -0,0 +1,135 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Union
+import asyncio
+import time
+from models.admission_config import AdmissionConfig
+from models.dto.admission_stats import AdmissionStats, ServerAdmissionStats
+from models.server import DatabaseServer
+from services.logger_service import logger
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueueTimeoutError(Exception):
+    pass
+
+
+class _ServerGate:
+    def __init__(self, server: DatabaseServer, limit: int):
+        self.server = server
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.timeouts_total = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class AdmissionService:
+    def __init__(self, config: Union[AdmissionConfig, None] = None):
+        self.config = config or AdmissionConfig()
+        self._global = asyncio.Semaphore(self.config.global_limit)
+        self._active = 0
+        self._waiting = 0
+        self._gates: Dict[int, _ServerGate] = {}
+
+    @asynccontextmanager
+    async def slot(self, server: DatabaseServer) -> AsyncIterator[None]:
+        gate = self._gate(server)
+        start_time = time.perf_counter()
+
+        if gate.semaphore.locked() or self._global.locked():
+            await self._wait_in_queue(gate)
+        else:
+            # Свободные слоты есть - занимаем без ожидания
+            await self._acquire(gate)
+
+        wait_time = time.perf_counter() - start_time
+        gate.admitted_total += 1
+        gate.wait_total += wait_time
+        gate.wait_max = max(gate.wait_max, wait_time)
+        gate.active += 1
+        self._active += 1
+        try:
+            yield
+        finally:
+            gate.active -= 1
+            self._active -= 1
+            self._global.release()
+            gate.semaphore.release()
+
+    def stats(self) -> AdmissionStats:
+        servers = []
+        for gate in self._gates.values():
+            admitted = gate.admitted_total
+            servers.append(
+                ServerAdmissionStats(
+                    server_id=gate.server.id,
+                    server=gate.server.name,
+                    active=gate.active,
+                    waiting=gate.waiting,
+                    limit=gate.limit,
+                    admitted_total=admitted,
+                    rejected_total=gate.rejected_total,
+                    timeouts_total=gate.timeouts_total,
+                    avg_wait_ms=(
+                        round(gate.wait_total / admitted * 1000, 3) if admitted else 0.0
+                    ),
+                    max_wait_ms=round(gate.wait_max * 1000, 3),
+                )
+            )
+        return AdmissionStats(
+            active=self._active,
+            waiting=self._waiting,
+            limit=self.config.global_limit,
+            servers=servers,
+        )
+
+    async def _wait_in_queue(self, gate: _ServerGate) -> None:
+        server = gate.server
+        if (
+            gate.waiting >= self.config.per_server_queue
+            or self._waiting >= self.config.global_queue
+        ):
+            gate.rejected_total += 1
+            logger.warning(f"Очередь запросов к '{server.name}' переполнена")
+            raise QueueFullError(
+                f"Очередь запросов к серверу '{server.name}' переполнена"
+            )
+
+        gate.waiting += 1
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(
+                self._acquire(gate), timeout=self.config.queue_timeout_sec
+            )
+        except asyncio.TimeoutError:
+            gate.timeouts_total += 1
+            logger.warning(f"Запрос к '{server.name}' не дождался очереди")
+            raise QueueTimeoutError(
+                f"Сервер '{server.name}' перегружен: очередь не освободилась за {self.config.queue_timeout_sec}s"
+            )
+        finally:
+            gate.waiting -= 1
+            self._waiting -= 1
+
+    def _gate(self, server: DatabaseServer) -> _ServerGate:
+        gate = self._gates.get(server.id)
+        if gate is None:
+            gate = _ServerGate(server, self.config.per_server_limit)
+            self._gates[server.id] = gate
+        gate.server = server
+        return gate
+
+    async def _acquire(self, gate: _ServerGate) -> None:
+        await gate.semaphore.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            gate.semaphore.release()
+            raise
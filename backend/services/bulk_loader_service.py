@@ -0,0 +1,437 @@
+from contextlib import aclosing
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Union,
+)
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from models.dto.partition_result import PartitionResult
+from models.server import DatabaseServer
+from services.logger_service import logger
+from services.executor_service import ExecutorService
+from services.metrics_service import MetricsService
+from services.pool_service import PoolService
+
+# Чанки файла: обычный итератор разбирается в потоке, асинхронный уже готов к чтению
+Frames = Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]]
+
+
+class BulkLoaderService:
+    def __init__(
+        self,
+        pool_service: PoolService,
+        metrics_service: MetricsService,
+        executor_service: ExecutorService,
+        batch_size: int = 10000,
+        max_retries: int = 2,
+        retry_delay_sec: float = 0.5,
+        turn_timeout_sec: float = 300,
+    ):
+        self.pool_service = pool_service
+        self.metrics_service = metrics_service
+        self.executor_service = executor_service
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay_sec = retry_delay_sec
+        self.turn_timeout_sec = turn_timeout_sec
+
+    async def load_frames(
+        self,
+        server: DatabaseServer,
+        frames: Frames,
+        table_name: str,
+        schema_name: str,
+        batch_size: Union[int, None] = None,
+        on_rows: Union[Callable[[int], None], None] = None,
+        ddl: Union[List[str], None] = None,
+    ) -> int:
+        frames = self.aiter_frames(frames)
+        first = await anext(frames, None)
+        if first is None and not ddl:
+            return 0
+
+        columns = [] if first is None else [str(col) for col in first.columns]
+        counter = [0]
+        batches = self._batches(
+            first,
+            frames,
+            batch_size or self.batch_size,
+            counter,
+            lambda: on_rows(counter[0]) if on_rows else None,
+        )
+        logger.info(f"Загружаем данные на '{server.name}'")
+
+        ddl = ddl or []
+        if server.type == "mysql":
+            await self._mysql_load(
+                server, batches, columns, table_name, schema_name, ddl
+            )
+        elif server.type == "postgresql":
+            await self._pg_load(server, batches, columns, table_name, schema_name, ddl)
+        elif server.type == "oracle":
+            await self._oracle_load(
+                server, batches, columns, table_name, schema_name, ddl
+            )
+        else:
+            raise ValueError(f"Неподдерживаемая СУБД: {server.type}")
+
+        return counter[0]
+
+    async def load_parallel(
+        self,
+        server: DatabaseServer,
+        frames: Frames,
+        table_name: str,
+        schema_name: str,
+        workers: int,
+        batch_size: Union[int, None] = None,
+        on_rows: Union[Callable[[int], None], None] = None,
+        ddl: Union[List[str], None] = None,
+        ordered: bool = False,
+    ) -> List[PartitionResult]:
+        frames = self.aiter_frames(frames)
+        first = await anext(frames, None)
+        if ddl:
+            async with self.pool_service.acquire(server) as conn:
+                await self._run_ddl(server, conn, ddl)
+        if first is None:
+            return []
+
+        with self.pool_service.reserve(server, workers) as granted:
+            if granted < workers:
+                logger.info(
+                    f"Свободных соединений к '{server.name}' на {granted} потока "
+                    f"из {workers} запрошенных"
+                )
+            return await self._load_partitions(
+                server,
+                first,
+                frames,
+                table_name,
+                schema_name,
+                granted,
+                batch_size,
+                on_rows,
+                ordered,
+            )
+
+    async def _load_partitions(
+        self,
+        server: DatabaseServer,
+        first: pd.DataFrame,
+        frames: AsyncIterator[pd.DataFrame],
+        table_name: str,
+        schema_name: str,
+        workers: int,
+        batch_size: Union[int, None],
+        on_rows: Union[Callable[[int], None], None],
+        ordered: bool,
+    ) -> List[PartitionResult]:
+        columns = [str(col) for col in first.columns]
+        # Партиция - батч строк в своей транзакции, при ошибке её можно повторить целиком.
+        # Уже закоммиченные партиции при падении импорта остаются в таблице
+        partitions = self._batches(
+            first, frames, batch_size or self.batch_size, [0], lambda: None
+        )
+        # Очередь ограничивает число разобранных, но ещё не загруженных партиций
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        results: List[PartitionResult] = []
+        loaded = [0]
+        next_commit = [0]
+        turn = asyncio.Condition()
+
+        async def wait_turn(index: int) -> None:
+            # Соединение уже занято транзакцией партиции, поэтому ждём не вечно
+            try:
+                async with turn:
+                    await asyncio.wait_for(
+                        turn.wait_for(lambda: next_commit[0] == index),
+                        timeout=self.turn_timeout_sec,
+                    )
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"Партиция {index} не дождалась очереди коммита "
+                    f"за {self.turn_timeout_sec} с"
+                )
+
+        async def produce() -> None:
+            async with aclosing(partitions):
+                index = 0
+                async for batch in partitions:
+                    await queue.put((index, batch))
+                    index += 1
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def consume() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, batch = item
+                result = await self._load_partition(
+                    server,
+                    index,
+                    batch,
+                    columns,
+                    table_name,
+                    schema_name,
+                    (lambda: wait_turn(index)) if ordered else None,
+                )
+                results.append(result)
+                loaded[0] += result.rows
+                if on_rows:
+                    on_rows(loaded[0])
+                if ordered:
+                    async with turn:
+                        next_commit[0] += 1
+                        turn.notify_all()
+
+        logger.info(f"Загружаем данные на '{server.name}' в {workers} потока")
+        tasks = [asyncio.create_task(produce())]
+        tasks.extend(asyncio.create_task(consume()) for _ in range(workers))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return sorted(results, key=lambda result: result.index)
+
+    def to_records(self, df: pd.DataFrame) -> List[tuple]:
+        frame = df.astype(object)
+        # Драйверам нужны обычные datetime, а не pandas.Timestamp
+        for i, dtype in enumerate(df.dtypes):
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                frame.isetitem(
+                    i, np.asarray(df.iloc[:, i].dt.to_pydatetime(), dtype=object)
+                )
+        frame = frame.where(df.notna(), None)
+        return list(frame.itertuples(index=False, name=None))
+
+    async def aiter_frames(self, frames: Frames) -> AsyncIterator[pd.DataFrame]:
+        if isinstance(frames, AsyncIterable):
+            async for df in frames:
+                yield df
+            return
+        # Парсинг чанков блокирующий, уводим его с event loop
+        frames = iter(frames)
+        while True:
+            df = await self.executor_service.run_io(next, frames, None)
+            if df is None:
+                return
+            yield df
+
+    async def _batches(
+        self,
+        first: Union[pd.DataFrame, None],
+        frames: AsyncIterator[pd.DataFrame],
+        batch_size: int,
+        counter: List[int],
+        after_batch: Callable[[], None],
+    ) -> AsyncIterator[List[tuple]]:
+        # Конвертируем в кортежи по батчу, чтобы не держать вторую копию всего фрейма
+        async with aclosing(frames):
+            df = first
+            while df is not None:
+                for start in range(0, len(df), batch_size):
+                    batch = await self.executor_service.run_io(
+                        self.to_records, df.iloc[start : start + batch_size]
+                    )
+                    counter[0] += len(batch)
+                    yield batch
+                    after_batch()
+                df = await anext(frames, None)
+
+    async def _load_partition(
+        self,
+        server: DatabaseServer,
+        index: int,
+        batch: List[tuple],
+        columns: List[str],
+        table_name: str,
+        schema_name: str,
+        before_commit: Union[Callable[[], Awaitable[None]], None],
+    ) -> PartitionResult:
+        attempt = 0
+        while True:
+            attempt += 1
+            start_time = time.perf_counter()
+            try:
+                with self.metrics_service.span("import", "partition", server):
+                    await self._write_partition(
+                        server, batch, columns, table_name, schema_name, before_commit
+                    )
+            except Exception as e:
+                if attempt > self.max_retries:
+                    raise RuntimeError(
+                        f"Партиция {index} не загрузилась за {attempt} попыток: {e}"
+                    ) from e
+                logger.warning(
+                    f"Партиция {index} на '{server.name}' не загрузилась ({e}), повтор {attempt}"
+                )
+                await asyncio.sleep(self.retry_delay_sec * 2 ** (attempt - 1))
+                continue
+
+            load_time = time.perf_counter() - start_time
+            return PartitionResult(
+                index=index,
+                rows=len(batch),
+                attempts=attempt,
+                time=round(load_time, 3),
+                rows_per_sec=round(len(batch) / load_time, 1) if load_time > 0 else 0.0,
+            )
+
+    async def _write_partition(
+        self,
+        server: DatabaseServer,
+        batch: List[tuple],
+        columns: List[str],
+        table_name: str,
+        schema_name: str,
+        before_commit: Union[Callable[[], Awaitable[None]], None],
+    ) -> None:
+        async with self.pool_service.acquire(server) as conn:
+            if server.type == "postgresql":
+                async with conn.transaction():
+                    await conn.copy_records_to_table(
+                        table_name.lower(),
+                        records=batch,
+                        columns=[col.lower() for col in columns],
+                        schema_name=schema_name.lower(),
+                    )
+                    if before_commit:
+                        await before_commit()
+                return
+
+            if server.type == "mysql":
+                await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(
+                        self._insert_sql(server, columns, table_name, schema_name),
+                        batch,
+                    )
+                if before_commit:
+                    await before_commit()
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    async def _run_ddl(self, server: DatabaseServer, conn, ddl: List[str]) -> None:
+        with self.metrics_service.span("import", "ddl", server):
+            for command in ddl:
+                try:
+                    if server.type == "postgresql":
+                        # Внутри транзакции загрузки это точка сохранения: ошибка
+                        # команды не ломает внешнюю транзакцию
+                        async with conn.transaction():
+                            await conn.execute(command)
+                    else:
+                        async with conn.cursor() as cursor:
+                            await cursor.execute(command)
+                except Exception as e:
+                    self._ddl_failed(command, e)
+
+    def _insert_sql(
+        self,
+        server: DatabaseServer,
+        columns: List[str],
+        table_name: str,
+        schema_name: str,
+    ) -> str:
+        if server.type == "oracle":
+            placeholders = ", ".join(f":{i}" for i in range(1, len(columns) + 1))
+        else:
+            placeholders = ", ".join(["%s"] * len(columns))
+        return (
+            f"INSERT INTO {schema_name}.{table_name} ({', '.join(columns)}) "
+            f"VALUES ({placeholders})"
+        )
+
+    async def _mysql_load(
+        self,
+        server: DatabaseServer,
+        batches: AsyncIterator[List[tuple]],
+        columns: List[str],
+        table_name: str,
+        schema_name: str,
+        ddl: List[str],
+    ) -> None:
+        # aiomysql сам склеивает executemany в многострочный INSERT
+        sql = self._insert_sql(server, columns, table_name, schema_name)
+        async with self.pool_service.acquire(server) as conn:
+            # DDL в mysql коммитится неявно, поэтому выполняем его до транзакции загрузки
+            await self._run_ddl(server, conn, ddl)
+            await conn.begin()
+            try:
+                with self.metrics_service.span("import", "load", server):
+                    async with conn.cursor() as cursor:
+                        async for batch in batches:
+                            await cursor.executemany(sql, batch)
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    async def _pg_load(
+        self,
+        server: DatabaseServer,
+        batches: AsyncIterator[List[tuple]],
+        columns: List[str],
+        table_name: str,
+        schema_name: str,
+        ddl: List[str],
+    ) -> None:
+        # Таблица создана без кавычек, поэтому postgres хранит имена в нижнем регистре
+        columns = [col.lower() for col in columns]
+        async with self.pool_service.acquire(server) as conn:
+            # DDL в postgres транзакционный: таблица и данные появляются одним коммитом
+            async with conn.transaction():
+                await self._run_ddl(server, conn, ddl)
+                with self.metrics_service.span("import", "load", server):
+                    async for batch in batches:
+                        await conn.copy_records_to_table(
+                            table_name.lower(),
+                            records=batch,
+                            columns=columns,
+                            schema_name=schema_name.lower(),
+                        )
+
+    async def _oracle_load(
+        self,
+        server: DatabaseServer,
+        batches: AsyncIterator[List[tuple]],
+        columns: List[str],
+        table_name: str,
+        schema_name: str,
+        ddl: List[str],
+    ) -> None:
+        sql = self._insert_sql(server, columns, table_name, schema_name)
+        async with self.pool_service.acquire(server) as connection:
+            # DDL в oracle коммитится неявно, выполняем его до вставки строк
+            await self._run_ddl(server, connection, ddl)
+            try:
+                with self.metrics_service.span("import", "load", server):
+                    async with connection.cursor() as cursor:
+                        async for batch in batches:
+                            await cursor.executemany(sql, batch)
+                await connection.commit()
+            except BaseException:
+                await connection.rollback()
+                raise
+
+    def _ddl_failed(self, command: str, error: Exception) -> None:
+        # IF NOT EXISTS и блоки oracle могут упасть на правах, загрузку это не останавливает
+        logger.warning(
+            f"Предупреждение: команда '{command}' завершилась ошибкой: {error}"
+        )
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from typing import Tuple, Union
+import re
+import sys
+import time
+from models.cache_config import CacheConfig
+from models.dto.cache_stats import CacheStats
+from models.dto.fetch_result import FetchResult
+
+# Строковые литералы и идентификаторы в кавычках не трогаем при нормализации
+_LITERAL_RE = re.compile(r"('(?:''|[^'])*'|\"(?:\"\"|[^\"])*\"|`[^`]*`)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_READ_ONLY_START_RE = re.compile(
+    r"^\s*(select|with|show|describe|desc|explain)\b", re.I
+)
+_WRITE_KEYWORD_RE = re.compile(
+    r"\b(insert|update|delete|merge|upsert|replace|create|drop|alter|truncate|"
+    r"grant|revoke|call|exec|execute|into|lock|nextval|setval|begin|commit)\b",
+    re.I,
+)
+
+_SIZE_SAMPLE_ROWS = 100
+
+
+class _CacheEntry:
+    def __init__(self, result: FetchResult, size: int):
+        self.result = result
+        self.size = size
+        self.created_at = time.monotonic()
+
+
+class QueryCacheService:
+    def __init__(self, config: Union[CacheConfig, None] = None):
+        self.config = config or CacheConfig()
+        self._entries: "OrderedDict[Tuple[int, str], _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def normalize(self, query: str) -> str:
+        parts = _LITERAL_RE.split(query.strip().rstrip(";").strip())
+        # Нечётные элементы - литералы, их оставляем как есть
+        return "".join(
+            part if i % 2 else _WHITESPACE_RE.sub(" ", part)
+            for i, part in enumerate(parts)
+        )
+
+    def is_cacheable(self, normalized_query: str) -> bool:
+        if not _READ_ONLY_START_RE.match(normalized_query):
+            return False
+
+        code = "".join(_LITERAL_RE.split(normalized_query)[::2])
+        if ";" in code:
+            return False
+        return _WRITE_KEYWORD_RE.search(code) is None
+
+    def get(
+        self, server_id: int, normalized_query: str
+    ) -> Union[Tuple[FetchResult, float], None]:
+        key = (server_id, normalized_query)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        age = time.monotonic() - entry.created_at
+        if age > self.config.ttl_sec:
+            self._remove(key)
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.result, age
+
+    def put(self, server_id: int, normalized_query: str, result: FetchResult) -> None:
+        size = self._estimate_size(result)
+        if size > self.config.max_entry_bytes:
+            return
+
+        key = (server_id, normalized_query)
+        self._remove(key)
+        self._entries[key] = _CacheEntry(result, size)
+        self._bytes += size
+
+        while self._bytes > self.config.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def invalidate(self, server_id: int, normalized_query: str) -> None:
+        self._remove((server_id, normalized_query))
+
+    def invalidate_server(self, server_id: int) -> None:
+        for key in [k for k in self._entries if k[0] == server_id]:
+            self._remove(key)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            entries=len(self._entries),
+            bytes=self._bytes,
+            max_bytes=self.config.max_bytes,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+        )
+
+    def _remove(self, key: Tuple[int, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _estimate_size(self, result: FetchResult) -> int:
+        # Считаем размер по выборке строк, обход всех значений стоит как сам запрос
+        rows = result.rows
+        if not rows:
+            return sys.getsizeof(rows)
+
+        sample = rows[:_SIZE_SAMPLE_ROWS]
+        sample_size = sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row) for row in sample
+        )
+        return int(sample_size / len(sample) * len(rows)) + sys.getsizeof(rows)
@@ -0,0 +1,80 @@
+from typing import Dict, Tuple, Union
+import asyncio
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import QueuePool
+from models.engine_config import EngineConfig
+from models.server import DatabaseServer
+from services.logger_service import logger
+
+# Драйверы SQLAlchemy для СУБД из конфига серверов
+DRIVERS = {
+    "mysql": "mysql+pymysql",
+    "postgresql": "postgresql+psycopg2",
+    "oracle": "oracle+oracledb",
+}
+
+
+class EngineService:
+    def __init__(self, config: Union[EngineConfig, None] = None):
+        self.config = config or EngineConfig()
+        self._engines: Dict[int, Tuple[DatabaseServer, Engine]] = {}
+        # Движки берут и из пула потоков, создание должно быть атомарным
+        self._lock = threading.Lock()
+
+    def get(self, server: DatabaseServer) -> Engine:
+        with self._lock:
+            cached = self._engines.get(server.id)
+            if cached is not None and cached[0] == server:
+                return cached[1]
+
+            # Конфиг сервера поменялся - старый движок больше не нужен
+            if cached is not None:
+                cached[1].dispose()
+
+            logger.info(f"Создаём SQLAlchemy engine для '{server.name}'")
+            engine = create_engine(
+                self.build_url(server),
+                poolclass=QueuePool,
+                pool_size=self.config.pool_size,
+                max_overflow=self.config.max_overflow,
+                pool_recycle=self.config.pool_recycle_sec,
+                pool_timeout=self.config.pool_timeout_sec,
+                pool_pre_ping=self.config.pool_pre_ping,
+            )
+            self._engines[server.id] = (server, engine)
+            return engine
+
+    def build_url(self, server: DatabaseServer) -> URL:
+        drivername = DRIVERS[server.type]
+        if server.type == "oracle":
+            return URL.create(
+                drivername,
+                username=server.username,
+                password=server.password,
+                host=server.host,
+                port=server.port,
+                query={"service_name": server.database},
+            )
+        return URL.create(
+            drivername,
+            username=server.username,
+            password=server.password,
+            host=server.host,
+            port=server.port,
+            database=server.database,
+        )
+
+    async def discard(self, server_id: int) -> None:
+        with self._lock:
+            cached = self._engines.pop(server_id, None)
+        if cached is not None:
+            await asyncio.to_thread(cached[1].dispose)
+
+    async def close(self) -> None:
+        with self._lock:
+            engines = [engine for _, engine in self._engines.values()]
+            self._engines.clear()
+        for engine in engines:
+            await asyncio.to_thread(engine.dispose)
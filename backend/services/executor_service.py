@@ -0,0 +1,162 @@
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, List, Set, Tuple, TypeVar, Union
+import asyncio
+import multiprocessing
+import time
+from models.dto.executor_stats import ExecutorStats
+from models.executor_config import ExecutorConfig
+from services.logger_service import logger
+
+T = TypeVar("T")
+
+
+def _timed_call(
+    fn: Callable[..., T], args: tuple, kwargs: dict
+) -> Tuple[T, float, float]:
+    # Выполняется в воркере, поэтому время меряем по общим для процессов часам
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    return result, started_at, time.time()
+
+
+class _ExecutorEntry:
+    def __init__(self, name: str, workers: int, factory: Callable[[], Executor]):
+        self.name = name
+        self.workers = workers
+        self.factory = factory
+        self.executor: Union[Executor, None] = None
+        # Отправленные и ещё не завершённые задачи, и ждущие в очереди, и идущие
+        self.futures: Set[Future] = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def get(self) -> Executor:
+        if self.executor is None:
+            self.executor = self.factory()
+        return self.executor
+
+
+class ExecutorService:
+    def __init__(self, config: Union[ExecutorConfig, None] = None):
+        self.config = config or ExecutorConfig()
+        self._io = _ExecutorEntry(
+            "io",
+            self.config.io_workers,
+            lambda: ThreadPoolExecutor(
+                max_workers=self.config.io_workers, thread_name_prefix="io"
+            ),
+        )
+        # spawn вместо fork: форк процесса с работающим event loop и потоками небезопасен
+        self._cpu = _ExecutorEntry(
+            "cpu",
+            self.config.cpu_workers,
+            lambda: ProcessPoolExecutor(
+                max_workers=self.config.cpu_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ),
+        )
+
+    async def run_io(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        timeout: Union[float, None] = None,
+        **kwargs: Any,
+    ) -> T:
+        return await self._submit(self._io, fn, args, kwargs, timeout)
+
+    async def run_cpu(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        timeout: Union[float, None] = None,
+        **kwargs: Any,
+    ) -> T:
+        # fn и аргументы передаются в другой процесс, они должны сериализоваться pickle
+        return await self._submit(self._cpu, fn, args, kwargs, timeout)
+
+    def stats(self) -> List[ExecutorStats]:
+        return [self._entry_stats(entry) for entry in (self._io, self._cpu)]
+
+    async def close(self) -> None:
+        for entry in (self._io, self._cpu):
+            if entry.executor is not None:
+                await asyncio.to_thread(
+                    entry.executor.shutdown, True, cancel_futures=True
+                )
+                entry.executor = None
+
+    async def _submit(
+        self,
+        entry: _ExecutorEntry,
+        fn: Callable[..., T],
+        args: tuple,
+        kwargs: dict,
+        timeout: Union[float, None],
+    ) -> T:
+        timeout = timeout or self.config.task_timeout_sec
+        submitted_at = time.time()
+        future = entry.get().submit(_timed_call, fn, args, kwargs)
+        entry.submitted += 1
+        entry.futures.add(future)
+        try:
+            result, started_at, finished_at = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            entry.timeouts += 1
+            # Не начавшаяся задача снимется с очереди, запущенную прервать нельзя
+            future.cancel()
+            logger.error(f"Задача в пуле '{entry.name}' не уложилась в {timeout} с")
+            raise TimeoutError(f"Задача не выполнилась за {timeout} с")
+        except Exception:
+            entry.failed += 1
+            raise
+        finally:
+            entry.futures.discard(future)
+
+        queue_wait = max(started_at - submitted_at, 0.0)
+        run_time = finished_at - started_at
+        entry.completed += 1
+        entry.queue_wait_total += queue_wait
+        entry.queue_wait_max = max(entry.queue_wait_max, queue_wait)
+        entry.run_total += run_time
+        entry.run_max = max(entry.run_max, run_time)
+        return result
+
+    def _entry_stats(self, entry: _ExecutorEntry) -> ExecutorStats:
+        completed = entry.completed
+        # Пул помечает задачу запущенной, когда отдаёт её воркеру. Пул процессов
+        # делает это с запасом в одну задачу, поэтому ограничиваем числом воркеров
+        running = min(sum(f.running() for f in entry.futures), entry.workers)
+        return ExecutorStats(
+            name=entry.name,
+            workers=entry.workers,
+            running=running,
+            queued=sum(not f.done() for f in entry.futures) - running,
+            submitted_total=entry.submitted,
+            completed_total=completed,
+            failed_total=entry.failed,
+            timeouts_total=entry.timeouts,
+            avg_queue_wait_ms=(
+                round(entry.queue_wait_total / completed * 1000, 3)
+                if completed
+                else 0.0
+            ),
+            max_queue_wait_ms=round(entry.queue_wait_max * 1000, 3),
+            avg_run_ms=(
+                round(entry.run_total / completed * 1000, 3) if completed else 0.0
+            ),
+            max_run_ms=round(entry.run_max * 1000, 3),
+        )
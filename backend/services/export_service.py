@@ -1,29 +1,429 @@
-from io import BytesIO
-from datetime import datetime
-import json
+from contextlib import aclosing
+from datetime import date, datetime, time
+from typing import AsyncIterator, Iterable, Iterator, List, Union
+import os
+import tempfile
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
 from models.dto.export_result import ExportResult
 from models.dto.export_dto import ExportDTO
+from models.server import DatabaseServer
+from services.executor_service import ExecutorService
 from services.logger_service import logger
+from services.metrics_service import MetricsService
+from services.query_service import json_default
+
+EXPORT_FORMATS = {
+    "excel": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx",
+    ),
+    "json": ("application/json; charset=utf-8", "json"),
+    "ndjson": ("application/x-ndjson; charset=utf-8", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "feather": ("application/vnd.apache.arrow.file", "arrow"),
+}
+# Эти форматы пишутся во временный файл целиком, остальные отдаются потоком
+FILE_FORMATS = {"excel", "parquet", "feather"}
+DEFAULT_COMPRESSION = "zstd"
+# Arrow IPC умеет сжимать только этими кодеками
+FEATHER_COMPRESSIONS = {"zstd", "lz4"}
+
+# Строк на листе xlsx, не считая заголовка
+EXCEL_MAX_ROWS = 1048575
+# Сколько значений строковой колонки из чанка смотреть при подборе ширины
+WIDTH_SAMPLE_ROWS = 200
+# Ширина колонок, если автоподбор выключен
+DEFAULT_COLUMN_WIDTH = 15
+MAX_COLUMN_WIDTH = 60
+
+
+def iter_row_chunks(
+    frames: Iterable[pd.DataFrame], chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    for df in frames:
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start : start + chunk_rows]
+
+
+def estimate_column_width(
+    series: pd.Series, sample_rows: int = WIDTH_SAMPLE_ROWS
+) -> int:
+    non_null = series.dropna()
+    if non_null.empty:
+        return 0
+
+    # Для чисел и дат ширина следует из типа, строки в них переводить не нужно
+    dtype = non_null.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 5
+    elif pd.api.types.is_integer_dtype(dtype):
+        return max(len(str(non_null.min())), len(str(non_null.max())))
+    elif pd.api.types.is_float_dtype(dtype):
+        return 12
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return 19
+
+    # Строки оцениваем по равномерной выборке, а не по всей колонке
+    if len(non_null) > sample_rows:
+        non_null = non_null.iloc[:: len(non_null) // sample_rows][:sample_rows]
+    return int(non_null.astype(str).str.len().max())
+
+
+class ExcelSheetWriter:
+    def __init__(self, path: str, columns: List[str], auto_width: bool = True):
+        self.columns = columns
+        self.auto_width = auto_width
+        self.rows = 0
+        self.truncated = False
+        self.workbook = xlsxwriter.Workbook(
+            path,
+            {
+                "constant_memory": True,
+                "strings_to_urls": False,
+                "remove_timezone": True,
+            },
+        )
+        self.ws = self.workbook.add_worksheet("Data")
+        self.datetime_format = self.workbook.add_format(
+            {"num_format": "yyyy-mm-dd hh:mm:ss"}
+        )
+        self.date_format = self.workbook.add_format({"num_format": "yyyy-mm-dd"})
+        self.time_format = self.workbook.add_format({"num_format": "hh:mm:ss"})
+        self.ws.write_row(0, 0, columns, self.workbook.add_format({"bold": True}))
+        self.widths = [len(str(col)) for col in columns]
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        chunk = chunk.reindex(columns=self.columns)
+        free = EXCEL_MAX_ROWS - self.rows
+        if len(chunk) > free:
+            chunk = chunk.iloc[:free]
+            if not self.truncated:
+                logger.warning(f"Экспорт в xlsx обрезан до {EXCEL_MAX_ROWS} строк")
+            self.truncated = True
+
+        if self.auto_width:
+            for i in range(len(self.columns)):
+                width = estimate_column_width(chunk.iloc[:, i])
+                self.widths[i] = max(self.widths[i], width)
+
+        # xlsxwriter не пишет NaN, пустые ячейки передаём как None
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            self.rows += 1
+            for col_idx, value in enumerate(row):
+                if value is None:
+                    continue
+                elif isinstance(value, datetime):
+                    self.ws.write_datetime(
+                        self.rows, col_idx, value, self.datetime_format
+                    )
+                elif isinstance(value, date):
+                    self.ws.write_datetime(self.rows, col_idx, value, self.date_format)
+                elif isinstance(value, time):
+                    self.ws.write_datetime(self.rows, col_idx, value, self.time_format)
+                elif isinstance(value, (bytes, memoryview)):
+                    self.ws.write_string(self.rows, col_idx, json_default(value))
+                else:
+                    self.ws.write(self.rows, col_idx, value)
+
+    def write_records(self, rows: List[dict]) -> None:
+        self.write(pd.DataFrame.from_records(rows, columns=self.columns))
+
+    def close(self) -> None:
+        # В constant_memory строки уже сброшены на диск, но ширины колонок
+        # записываются при закрытии книги
+        if self.auto_width:
+            for i, width in enumerate(self.widths):
+                self.ws.set_column(i, i, min(width + 2, MAX_COLUMN_WIDTH))
+        else:
+            self.ws.set_column(0, max(len(self.columns) - 1, 0), DEFAULT_COLUMN_WIDTH)
+        self.workbook.close()
+
+
+class ArrowFileWriter:
+    def __init__(
+        self, path: str, fmt: str, columns: List[str], compression: Union[str, None]
+    ):
+        compression = compression or DEFAULT_COMPRESSION
+        if fmt == "feather" and compression not in FEATHER_COMPRESSIONS:
+            raise ValueError(f"Arrow IPC не поддерживает сжатие {compression}")
+
+        self.path = path
+        self.fmt = fmt
+        self.columns = columns
+        self.compression = compression
+        self.truncated = False
+        self.schema: Union[pa.Schema, None] = None
+        self.writer = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(
+            chunk.reindex(columns=self.columns), preserve_index=False
+        )
+        if self.writer is None:
+            self._open(table.schema)
+        self.writer.write_table(table.cast(self.schema))
+
+    def write_records(self, rows: List[dict]) -> None:
+        self.write(pd.DataFrame.from_records(rows, columns=self.columns))
+
+    def close(self) -> None:
+        if self.writer is None:
+            # Пустой результат: файл только со схемой
+            self._open(pa.schema([(str(col), pa.string()) for col in self.columns]))
+        self.writer.close()
+
+    def _open(self, schema: pa.Schema) -> None:
+        self.schema = self._stable_schema(schema)
+        if self.fmt == "parquet":
+            self.writer = pq.ParquetWriter(
+                self.path, self.schema, compression=self.compression
+            )
+        else:
+            self.writer = pa.ipc.new_file(
+                self.path,
+                self.schema,
+                options=pa.ipc.IpcWriteOptions(compression=self.compression),
+            )
+
+    def _stable_schema(self, schema: pa.Schema) -> pa.Schema:
+        # Схему берём по первому чанку, следующие приводятся к ней. Пустые колонки
+        # и точность decimal расширяем, чтобы следующие чанки в неё поместились
+        fields = []
+        for field in schema:
+            if pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            elif pa.types.is_decimal(field.type):
+                field = field.with_type(pa.decimal128(38, field.type.scale))
+            fields.append(field)
+        return pa.schema(fields, metadata=schema.metadata)
+
+
+def open_file_writer(
+    fmt: str,
+    path: str,
+    columns: List[str],
+    auto_width: bool = True,
+    compression: Union[str, None] = None,
+) -> Union[ExcelSheetWriter, ArrowFileWriter]:
+    if fmt == "excel":
+        return ExcelSheetWriter(path, columns, auto_width)
+    elif fmt in ("parquet", "feather"):
+        return ArrowFileWriter(path, fmt, columns, compression)
+    else:
+        raise ValueError(f"Неподдерживаемый формат: {fmt}")
+
+
+def write_file(
+    frames: Iterable[pd.DataFrame],
+    path: str,
+    fmt: str,
+    columns: List[str],
+    chunk_rows: int,
+    auto_width: bool = True,
+    compression: Union[str, None] = None,
+) -> None:
+    # Функция модульная, чтобы её можно было отправить в пул процессов
+    writer = open_file_writer(fmt, path, columns, auto_width, compression)
+    try:
+        for chunk in iter_row_chunks(frames, chunk_rows):
+            writer.write(chunk)
+    finally:
+        writer.close()
+
+
+def convert_arrow_file(
+    source: str,
+    path: str,
+    fmt: str,
+    columns: List[str],
+    chunk_rows: int,
+    auto_width: bool = True,
+) -> None:
+    # В пул процессов уходит только путь: данные воркер читает из Arrow IPC сам
+    with pa.memory_map(source) as mm:
+        reader = pa.ipc.open_file(mm)
+        writer = open_file_writer(fmt, path, columns, auto_width)
+        try:
+            for i in range(reader.num_record_batches):
+                frame = reader.get_batch(i).to_pandas()
+                # Arrow хранит имена колонок строками, возвращаем исходные
+                frame.columns = columns
+                for chunk in iter_row_chunks([frame], chunk_rows):
+                    writer.write(chunk)
+        finally:
+            writer.close()
 
 
 class ExportService:
-    def export(self, dto: ExportDTO) -> ExportResult:
+    def __init__(
+        self,
+        executor_service: ExecutorService,
+        metrics_service: MetricsService,
+        chunk_rows: int = 10000,
+    ):
+        self.executor_service = executor_service
+        self.metrics_service = metrics_service
+        self.chunk_rows = chunk_rows
+
+    async def export(self, dto: ExportDTO) -> ExportResult:
         df_list = self._ensure_multiple_df(dto.data)
-        base = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        mime, filename = self._describe(dto.format)
+
+        if dto.format in FILE_FORMATS:
+            # Кодирование в файл нагружает CPU, выносим его из event loop
+            path = await self.spool_file(
+                df_list,
+                dto.format,
+                self._union_columns(df_list),
+                dto.auto_width,
+                dto.compression,
+            )
+            return ExportResult(mime=mime, filename=filename, path=path)
+
+        return ExportResult(
+            mime=mime,
+            filename=filename,
+            chunks=self.iter_encoded(df_list, dto.format),
+        )
+
+    async def export_rows(
+        self,
+        batches: AsyncIterator[List[dict]],
+        fmt: str,
+        auto_width: bool = True,
+        compression: Union[str, None] = None,
+        server: Union[DatabaseServer, None] = None,
+    ) -> ExportResult:
+        try:
+            mime, filename = self._describe(fmt)
+            # Первый батч читаем до ответа, чтобы ошибку запроса вернуть обычным JSON
+            first = await anext(batches, None)
+        except BaseException:
+            await batches.aclose()
+            raise
+        columns = list(first[0].keys()) if first else []
+
+        if fmt in FILE_FORMATS:
+            async with aclosing(batches):
+                path = await self._spool_rows(
+                    first, batches, fmt, columns, auto_width, compression, server
+                )
+            return ExportResult(mime=mime, filename=filename, path=path)
+
+        # Дальше батчи читает и закрывает генератор ответа. Запускаем его сразу:
+        # тогда закрытие ответа закроет и курсор, даже если тело не начиналось
+        chunks = self._aiter_encoded_rows(first, batches, columns, fmt, server)
+        await anext(chunks)
+        return ExportResult(mime=mime, filename=filename, chunks=chunks)
+
+    async def spool_file(
+        self,
+        frames: Iterable[pd.DataFrame],
+        fmt: str,
+        columns: List[str],
+        auto_width: bool = True,
+        compression: Union[str, None] = None,
+    ) -> str:
+        path = self._temp_path(fmt)
+        try:
+            with self.metrics_service.span("export", "encode", fmt=fmt):
+                if fmt == "excel":
+                    await self._spool_excel(frames, path, columns, auto_width)
+                else:
+                    # Arrow кодирует в нативном коде без GIL, пула потоков хватает
+                    await self.executor_service.run_io(
+                        write_file,
+                        frames,
+                        path,
+                        fmt,
+                        columns,
+                        self.chunk_rows,
+                        auto_width,
+                        compression,
+                    )
+        except BaseException:
+            self.cleanup(path)
+            raise
+        return path
 
+    def cleanup(self, path: Union[str, None]) -> None:
+        if path is None:
+            return
         try:
-            if dto.format == "excel":
-                return self._to_excel(df_list, base)
-            elif dto.format == "json":
-                return self._to_json(df_list, base)
-            elif dto.format == "csv":
-                return self._to_csv(df_list, base)
-            else:
-                raise ValueError(f"Неподдерживаемый формат: {dto.format}")
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Не удалось удалить временный файл {path}: {e}")
+
+    async def iter_encoded(
+        self, frames: Iterable[pd.DataFrame], fmt: str
+    ) -> AsyncIterator[bytes]:
+        try:
+            yield self._prefix(fmt)
+            for i, chunk in enumerate(iter_row_chunks(frames, self.chunk_rows)):
+                with self.metrics_service.span("export", "encode", fmt=fmt):
+                    encoded = await self.executor_service.run_io(
+                        self._encode_chunk, chunk, fmt, i == 0
+                    )
+                yield encoded
+            yield self._suffix(fmt)
         except Exception as e:
-            raise Exception(str(e))
-        
+            logger.error(f"Ошибка при экспорте в {fmt}: {e}")
+            raise ValueError(f"Ошибка при экспорте в {fmt}: {e}")
+
+    async def _spool_excel(
+        self,
+        frames: Iterable[pd.DataFrame],
+        path: str,
+        columns: List[str],
+        auto_width: bool,
+    ) -> None:
+        # xlsx собирается по ячейке в Python и держит GIL, поэтому пишется в пуле
+        # процессов. Фреймы туда не передаём, иначе pickle копирует весь экспорт:
+        # кладём их в промежуточный Arrow IPC и отдаём воркеру только путь
+        source = self._temp_path("feather")
+        try:
+            try:
+                await self.executor_service.run_io(
+                    write_file,
+                    frames,
+                    source,
+                    "feather",
+                    columns,
+                    self.chunk_rows,
+                    compression="lz4",
+                )
+            except pa.ArrowException as e:
+                # Колонки со смешанными типами Arrow не представит, пишем в потоке
+                logger.warning(f"Экспорт в xlsx без пула процессов: {e}")
+                await self.executor_service.run_io(
+                    write_file,
+                    frames,
+                    path,
+                    "excel",
+                    columns,
+                    self.chunk_rows,
+                    auto_width,
+                )
+                return
+            await self.executor_service.run_cpu(
+                convert_arrow_file,
+                source,
+                path,
+                "excel",
+                columns,
+                self.chunk_rows,
+                auto_width,
+            )
+        finally:
+            self.cleanup(source)
+
     def _ensure_df(self, data) -> pd.DataFrame:
         if isinstance(data, pd.DataFrame):
             return data
@@ -39,65 +439,137 @@ class ExportService:
 
         raise ValueError(f"Неизвестный формат данных: {type(data)}")
 
-
     def _ensure_multiple_df(self, data) -> list:
         if isinstance(data, list):
             return [self._ensure_df(d) for d in data]
         else:
             return [self._ensure_df(data)]
 
-    def _to_excel(self, df_list: list, base: str) -> ExportResult:
-        buf = BytesIO()
-
-        with pd.ExcelWriter(buf, engine="xlsxwriter", engine_kwargs={"options": {"strings_to_urls": False}}) as w:
-            sheet_name = "Data"
-            all_data = pd.concat(df_list, ignore_index=True)
-
-            all_data.to_excel(w, index=False, sheet_name=sheet_name)
+    def _describe(self, fmt: str) -> tuple:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Неподдерживаемый формат: {fmt}")
+        mime, ext = EXPORT_FORMATS[fmt]
+        return mime, f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
 
-            ws = w.sheets[sheet_name]
-            for i, col in enumerate(all_data.columns):
-                series = all_data.iloc[:, i].astype(str)
-                max_len = max([len(str(col))] + [len(v) for v in series.values if v is not None])
-                ws.set_column(i, i, min(max_len + 2, 60))
-
-        buf.seek(0)
-        return ExportResult(
-            content=buf.read(),
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename=f"{base}.xlsx",
+    def _temp_path(self, fmt: str) -> str:
+        fd, path = tempfile.mkstemp(
+            prefix="export_", suffix="." + EXPORT_FORMATS[fmt][1]
         )
+        os.close(fd)
+        return path
 
+    def _union_columns(self, df_list: List[pd.DataFrame]) -> List[str]:
+        # Как pd.concat: колонки всех фреймов в порядке появления
+        columns = []
+        for df in df_list:
+            columns.extend(col for col in df.columns if col not in columns)
+        return columns
 
-    def _to_json(self, df_list: list, base: str) -> ExportResult:
+    async def _spool_rows(
+        self,
+        first: Union[List[dict], None],
+        batches: AsyncIterator[List[dict]],
+        fmt: str,
+        columns: List[str],
+        auto_width: bool = True,
+        compression: Union[str, None] = None,
+        server: Union[DatabaseServer, None] = None,
+    ) -> str:
+        # Строки приходят из курсора по батчам, пишем их в файл в пуле потоков
+        path = self._temp_path(fmt)
         try:
-            json_content = []
-            for df in df_list:
-                json_content.extend(df.to_dict(orient="records"))
-
-            text = json.dumps(json_content, ensure_ascii=False, indent=2)
-            return ExportResult(
-                content=text.encode("utf-8"),
-                mime="application/json; charset=utf-8",
-                filename=f"{base}.json",
+            writer = await self.executor_service.run_io(
+                open_file_writer, fmt, path, columns, auto_width, compression
             )
-        except Exception as e:
-            logger.error(f"Ошибка при экспорте в JSON: {e}")
-            raise ValueError(f"Ошибка при экспорте в JSON: {e}")
+            try:
+                if first:
+                    with self.metrics_service.span("export", "encode", server, fmt):
+                        await self.executor_service.run_io(writer.write_records, first)
+                    async for rows in batches:
+                        if writer.truncated:
+                            break
+                        with self.metrics_service.span("export", "encode", server, fmt):
+                            await self.executor_service.run_io(
+                                writer.write_records, rows
+                            )
+            finally:
+                await self.executor_service.run_io(writer.close)
+        except BaseException:
+            self.cleanup(path)
+            raise
+        return path
 
+    async def _aiter_encoded_rows(
+        self,
+        first: Union[List[dict], None],
+        batches: AsyncIterator[List[dict]],
+        columns: List[str],
+        fmt: str,
+        server: Union[DatabaseServer, None] = None,
+    ) -> AsyncIterator[bytes]:
+        async with aclosing(batches):
+            # Пустой кусок - знак запуска, его забирает export_rows
+            yield b""
+            yield self._prefix(fmt)
+            if first:
+                yield await self._encode_in_thread(first, columns, fmt, True, server)
+                async for rows in batches:
+                    yield await self._encode_in_thread(
+                        rows, columns, fmt, False, server
+                    )
+            yield self._suffix(fmt)
 
-    def _to_csv(self, df_list: list, base: str) -> ExportResult:
-        try:
-            csv_content = ""
+    async def _encode_in_thread(
+        self,
+        rows: List[dict],
+        columns: List[str],
+        fmt: str,
+        first: bool,
+        server: Union[DatabaseServer, None],
+    ) -> bytes:
+        with self.metrics_service.span("export", "encode", server, fmt):
+            return await self.executor_service.run_io(
+                self._encode_records, rows, columns, fmt, first
+            )
 
-            for idx, df in enumerate(df_list):
-                csv_content += df.to_csv(index=False, header=(idx == 0), sep=",", decimal=".", na_rep="", lineterminator="\n")
+    def _encode_records(
+        self, rows: List[dict], columns: List[str], fmt: str, first: bool
+    ) -> bytes:
+        return self._encode_chunk(
+            pd.DataFrame.from_records(rows, columns=columns), fmt, first
+        )
 
-            return ExportResult(
-                content=csv_content.encode("utf-8"),
-                mime="text/csv; charset=utf-8",
-                filename=f"{base}.csv",
+    def _encode_chunk(self, chunk: pd.DataFrame, fmt: str, first: bool) -> bytes:
+        if fmt == "csv":
+            text = chunk.to_csv(
+                index=False,
+                header=first,
+                sep=",",
+                decimal=".",
+                na_rep="",
+                lineterminator="\n",
             )
-        except Exception as e:
-            logger.error(f"Ошибка при экспорте в CSV: {e}")
-            raise ValueError(f"Ошибка при экспорте в CSV: {e}")
+        elif fmt == "json":
+            # to_json отдаёт массив, снимаем скобки и склеиваем чанки запятой
+            text = self._to_json(chunk)[1:-1]
+            text = text if first else "," + text
+        elif fmt == "ndjson":
+            text = self._to_json(chunk, lines=True).rstrip("\n") + "\n"
+        else:
+            raise ValueError(f"Неподдерживаемый формат: {fmt}")
+        return text.encode("utf-8")
+
+    def _prefix(self, fmt: str) -> bytes:
+        return b"[" if fmt == "json" else b""
+
+    def _suffix(self, fmt: str) -> bytes:
+        return b"]" if fmt == "json" else b""
+
+    def _to_json(self, chunk: pd.DataFrame, lines: bool = False) -> str:
+        return chunk.to_json(
+            orient="records",
+            lines=lines,
+            force_ascii=False,
+            date_format="iso",
+            default_handler=json_default,
+        )
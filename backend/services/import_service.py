@@ -1,97 +1,456 @@
-from models.dto.send_query_dto import SendQueryDTO
+from services.bulk_loader_service import BulkLoaderService, Frames
+from services.reader_service import ReaderService
 from services.query_service import QueryService
+from services.server_registry import ServerRegistry
 from models.server import DatabaseServer
 from models.dto.import_dto import ImportDTO
 from models.dto.query_result import QueryResult
 from services.translite_service import TransliteService
-from typing import List, Union
+from services.executor_service import ExecutorService
+from services.job_service import Job, JobService
+from services.schema_service import SchemaService
+from services.staging_service import StagingService
+from services.metrics_service import MetricsService
+from services.engine_service import EngineService
+from models.dto.column_stats import ColumnStats
+from models.dto.file_preview import FilePreview
+from models.dto.file_schema import FileSchema
+from models.dto.spooled_file import SpooledFile
+from models.dto.job_status import JobStatus
+from models.dto.batch_query_result import BatchQueryResult
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+import asyncio
+import itertools
 import time
 import pandas as pd
-from sqlalchemy import create_engine, text
+import pyarrow as pa
+from sqlalchemy.engine import Connection
 from sqlalchemy.exc import SQLAlchemyError
-import io
 import os
 from fastapi import UploadFile
 from typing import Literal
 from services.logger_service import logger
 
+# Минимальная длина строковой колонки, если схема определена по части файла
+SAMPLED_MIN_VARCHAR_LEN = 128
+# Границы целой колонки, если её диапазон известен только по части файла
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+# Диалекты, для которых предпросмотр показывает типы колонок
+PREVIEW_DIALECTS = ("mysql", "postgresql", "oracle")
+
 
 class ImportService:
     def __init__(
         self,
-        db_servers: List[DatabaseServer],
+        server_registry: ServerRegistry,
         translite_service: TransliteService,
         query_service: QueryService,
+        bulk_loader_service: BulkLoaderService,
+        reader_service: ReaderService,
+        job_service: JobService,
+        executor_service: ExecutorService,
+        schema_service: SchemaService,
+        staging_service: StagingService,
+        metrics_service: MetricsService,
+        engine_service: EngineService,
     ):
         self.translite_service = translite_service
         self.query_service = query_service
+        self.bulk_loader_service = bulk_loader_service
+        self.reader_service = reader_service
+        self.job_service = job_service
+        self.executor_service = executor_service
+        self.schema_service = schema_service
+        self.staging_service = staging_service
+        self.metrics_service = metrics_service
+        self.engine_service = engine_service
         self.SUPPORTED_EXTENSIONS = {".xlsx", ".xls", ".csv", ".json"}
-        self.db_servers = db_servers
+        self.server_registry = server_registry
 
-        self._servers_by_id = {s.id: s for s in db_servers}
+    async def start_import(self, dto: ImportDTO) -> JobStatus:
+        servers = self._target_servers(dto)
 
-    async def import_to_server(self, dto: ImportDTO) -> QueryResult:
-        df = await self._read_file(dto.upload_file)
+        # Файл сохраняем до ответа: после него FastAPI закрывает UploadFile
+        file_type, spooled, schema, release = await self._open_upload(dto)
 
-        if df is None:
-            return self._failed("unknown", "Не удалось прочитать файл")
+        async def runner(job: Job) -> Union[QueryResult, BatchQueryResult]:
+            if len(servers) == 1:
+                return await self._import_file(
+                    dto, servers[0], file_type, spooled, job, schema
+                )
+            return await self._import_many(
+                dto, servers, file_type, spooled, job, schema
+            )
 
-        df = self._transliterate_columns(df)
+        try:
+            # Файл освобождает сама задача, даже если её отменят ещё в очереди
+            return self.job_service.submit_many("import", servers, runner, release)
+        except BaseException:
+            release()
+            raise
+
+    def _target_servers(self, dto: ImportDTO) -> List[DatabaseServer]:
+        server_ids = dto.server_ids or (
+            [] if dto.server_id is None else [dto.server_id]
+        )
+        if not server_ids:
+            raise ValueError("Не выбран сервер для импорта")
+
+        servers = []
+        for server_id in dict.fromkeys(server_ids):
+            server = self.server_registry.get(server_id)
+            if server is None:
+                raise LookupError(f"Сервер id={server_id} не найден")
+            servers.append(server)
+        return servers
+
+    async def _open_upload(
+        self, dto: ImportDTO
+    ) -> Tuple[str, SpooledFile, Union[FileSchema, None], Callable[[], None]]:
+        if dto.upload_token:
+            # Файл уже лежит в staging после предпросмотра, повторно не загружаем.
+            # Схему тоже берём из предпросмотра, чтобы создать показанные там типы
+            upload = self.staging_service.checkout(dto.upload_token)
+            logger.info(f"Импортируем ранее загруженный файл {upload.filename}")
+            return (
+                upload.file_type,
+                upload.spooled,
+                upload.schema,
+                lambda: self.staging_service.release(upload.token),
+            )
 
-        if dto.server_id in self._servers_by_id:
-            server = self._servers_by_id[dto.server_id]
+        if dto.upload_file is None:
+            raise ValueError("Не передан файл или токен загрузки")
+        file_type = self.reader_service.detect_file_type(dto.upload_file.filename or "")
+        spooled = await self.reader_service.spool(dto.upload_file)
+        return (
+            file_type,
+            spooled,
+            None,
+            lambda: self.reader_service.cleanup(spooled.path),
+        )
+
+    async def _import_file(
+        self,
+        dto: ImportDTO,
+        server: DatabaseServer,
+        file_type: str,
+        spooled: SpooledFile,
+        job: Union[Job, None] = None,
+        schema: Union[FileSchema, None] = None,
+    ) -> QueryResult:
+        chunks = None
+        frames = None
+        try:
+            chunks = self._open_chunks(spooled, file_type, job)
+            plan = await self._plan_import(
+                dto, chunks, spooled, file_type, [server.type], server, job, schema
+            )
+            if plan is None:
+                return self._failed("unknown", "Не удалось прочитать файл")
+            create_sql, frames = plan
+
+            return await self._execute_on_single_server(
+                create_sql[server.type],
+                frames,
+                dto.table_name,
+                dto.schema_name,
+                server,
+                dto.load_method,
+                dto.batch_size,
+                (lambda rows: job.report(rows_loaded=rows)) if job else None,
+                dto.parallelism,
+                dto.preserve_order,
+            )
+        except ValueError as ve:
+            logger.error(str(ve))
+            return self._failed("unknown", f"Не удалось прочитать файл: {ve}")
+        finally:
+            self._close_chunks(frames)
+            self._close_chunks(chunks)
 
-            create_sql = self._generate_create_table_sql(
-                df, dto.table_name, dto.schema_name, server.type
+    async def _import_many(
+        self,
+        dto: ImportDTO,
+        servers: List[DatabaseServer],
+        file_type: str,
+        spooled: SpooledFile,
+        job: Union[Job, None] = None,
+        schema: Union[FileSchema, None] = None,
+    ) -> BatchQueryResult:
+        chunks = None
+        frames = None
+        try:
+            # Файл разбираем один раз, схему строим один раз на каждую СУБД
+            chunks = self._open_chunks(spooled, file_type, job)
+            dialects = list(dict.fromkeys(server.type for server in servers))
+            plan = await self._plan_import(
+                dto, chunks, spooled, file_type, dialects, job=job, schema=schema
             )
+            if plan is None:
+                message = "Не удалось прочитать файл"
+            else:
+                create_sql, frames = plan
+                return await self._execute_on_servers(
+                    create_sql, frames, dto, servers, job
+                )
+        except ValueError as ve:
+            logger.error(str(ve))
+            message = f"Не удалось прочитать файл: {ve}"
+        finally:
+            self._close_chunks(frames)
+            self._close_chunks(chunks)
 
-            result = await self._execute_on_single_server(
-                create_sql, df, dto.table_name, dto.schema_name, server
+        results = [self._failed(server.name, message) for server in servers]
+        return BatchQueryResult(results=results, failed=len(results))
+
+    def _open_chunks(
+        self,
+        spooled: SpooledFile,
+        file_type: str,
+        job: Union[Job, None],
+        dtype: Union[Dict[str, type], None] = None,
+    ) -> Iterator[pd.DataFrame]:
+        on_progress = (lambda fraction: job.report(progress=fraction)) if job else None
+        return self.reader_service.iter_chunks(
+            spooled.path, file_type, on_progress=on_progress, dtype=dtype
+        )
+
+    def _close_chunks(self, chunks: Union[Iterator[pd.DataFrame], None]) -> None:
+        if chunks is None:
+            return
+        try:
+            chunks.close()
+        except ValueError:
+            # При отмене генератор может ещё читаться в потоке, он закроется сам
+            pass
+
+    async def _plan_import(
+        self,
+        dto: ImportDTO,
+        chunks: Iterator[pd.DataFrame],
+        spooled: SpooledFile,
+        file_type: str,
+        dialects: List[str],
+        server: Union[DatabaseServer, None] = None,
+        job: Union[Job, None] = None,
+        schema: Union[FileSchema, None] = None,
+    ) -> Union[Tuple[Dict[str, List[str]], Iterator[pd.DataFrame]], None]:
+        with self.metrics_service.span("import", "parse", server):
+            # Первый чанк - выборка, по которой определяем схему таблицы.
+            # Разбор файла блокирующий, поэтому читаем в потоке
+            sample = await self.executor_service.run_io(next, chunks, None)
+            if sample is None:
+                return None
+            raw_columns = list(sample.columns)
+            sample = self._transliterate_columns(sample)
+
+            # Если файл не уместился в выборку, длину строк берём с запасом
+            second = await self.executor_service.run_io(next, chunks, None)
+            arrow_schema = await self.executor_service.run_io(
+                self.reader_service.arrow_schema, spooled.path, file_type
+            )
+        with self.metrics_service.span("import", "infer", server):
+            sampled = await self.executor_service.run_io(
+                self._sampled_schema, sample, second is None
             )
+            if schema is not None and len(schema.stats) == len(sample.columns):
+                # Схема предпросмотра главная: выборка импорта только расширяет
+                # типы, если в первом чанке нашлись данные шире
+                sampled = FileSchema(
+                    self.schema_service.merge(schema.stats, sampled.stats),
+                    max(schema.min_varchar_len, sampled.min_varchar_len),
+                )
+            schema = sampled
+            stats = schema.stats
+            create_sql = {
+                dialect: self._generate_create_table_sql(
+                    sample,
+                    dto.table_name,
+                    dto.schema_name,
+                    dialect,
+                    min_varchar_len=schema.min_varchar_len,
+                    arrow_schema=arrow_schema,
+                    stats=stats,
+                )
+                for dialect in dialects
+            }
+        kinds = self._column_kinds(stats, arrow_schema)
+        rest = chunks if second is None else itertools.chain([second], chunks)
+        text = {
+            column: str
+            for column, kind in zip(raw_columns, kinds)
+            if kind in ("string", "empty")
+        }
+        reopen = None
+        if file_type == "csv" and second is not None and text:
+            # pandas типизирует каждый чанк заново, и "0042" в строковой колонке
+            # прочитался бы числом 42. Остаток файла читаем заново, задав такие
+            # колонки строками
+            self._close_chunks(chunks)
+            reopen = lambda: self._open_chunks(spooled, file_type, job, text)
+        return create_sql, self._conformed_frames(sample, rest, kinds, reopen)
+
+    def _conformed_frames(
+        self,
+        sample: pd.DataFrame,
+        chunks: Iterable[pd.DataFrame],
+        kinds: List[str],
+        reopen: Union[Callable[[], Iterator[pd.DataFrame]], None] = None,
+    ) -> Iterator[pd.DataFrame]:
+        yield self.reader_service.conform(sample, sample, kinds)
+        if reopen is not None:
+            chunks = reopen()
+            try:
+                # Первый чанк уже разобран как выборка
+                next(chunks, None)
+                for chunk in chunks:
+                    yield self.reader_service.conform(chunk, sample, kinds)
+            finally:
+                self._close_chunks(chunks)
+            return
+        for chunk in chunks:
+            yield self.reader_service.conform(chunk, sample, kinds)
+
+    def _widen_sampled(self, stats: List[ColumnStats]) -> List[ColumnStats]:
+        # Диапазон целых известен только по выборке, дальше в файле числа
+        # могут быть больше - такие колонки создаём с запасом, как BIGINT
+        return [
+            (
+                column.model_copy(update={"min": INT64_MIN, "max": INT64_MAX})
+                if column.kind == "integer"
+                else column
+            )
+            for column in stats
+        ]
 
-            return result
-        else:
-            return self._failed("unknown", "Сервер не найден")
+    def _column_kinds(
+        self, stats: List[ColumnStats], arrow_schema: Union[pa.Schema, None]
+    ) -> List[str]:
+        # Тип колонки в таблице: из схемы parquet/feather, иначе по выборке,
+        # так же, как в _define_arrow_sql_type и _sql_type_from_stats
+        if arrow_schema is None:
+            return [column.kind for column in stats]
+        kinds = []
+        for field, column in zip(arrow_schema, stats):
+            if pa.types.is_integer(field.type):
+                kinds.append("integer")
+            elif pa.types.is_floating(field.type):
+                kinds.append("float")
+            elif pa.types.is_decimal(field.type):
+                kinds.append("decimal")
+            elif pa.types.is_boolean(field.type):
+                kinds.append("bool")
+            elif pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+                kinds.append("datetime")
+            elif pa.types.is_null(field.type):
+                kinds.append("empty")
+            else:
+                kinds.append(column.kind)
+        return kinds
 
     def _failed(self, server_name: str, message: str) -> QueryResult:
         logger.error(f"Сервер '{server_name}' вернул ошибку: {message}")
         return QueryResult(server=server_name, status="error", message=message)
 
-    async def _read_file(self, upload_file: UploadFile) -> Union[pd.DataFrame, None]:
+    def _loaded(self, server_name: str, rows: int, load_time: float) -> QueryResult:
+        rows_per_sec = round(rows / load_time, 1) if load_time > 0 else None
+        logger.info(
+            f"На '{server_name}' загружено {rows} строк, {rows_per_sec} строк/с"
+        )
+        return QueryResult(
+            server=server_name,
+            status="success",
+            message=f"Импорт выполнился!",
+            time=f"{round(load_time, 3)}",
+            rows=rows,
+            rows_per_sec=rows_per_sec,
+        )
+
+    async def preview_file(
+        self, upload_file: UploadFile, rows: int, sample_rows: int = 0
+    ) -> Union[FilePreview, None]:
+        spooled = None
+        token = None
         try:
-            content = await upload_file.read()
             filename = upload_file.filename
             if filename is None:
                 raise ValueError("Неподдерживаемое имя файла")
 
             file_type = self._detect_file_type(filename)
-
-            if file_type == "excel":
-                return pd.read_excel(io.BytesIO(content))
-            elif file_type == "csv":
-                return pd.read_csv(io.BytesIO(content), encoding="utf-8")
-            elif file_type == "json":
-                return pd.read_json(io.BytesIO(content), encoding="utf-8")
+            spooled = await self.reader_service.spool(upload_file)
+            # Целиком файл не разбираем: первые строки, выборка из разных мест
+            # файла и оценка числа строк по размеру. Чтение блокирующее, в пуле потоков
+            sampled = await self.executor_service.run_io(
+                self.reader_service.sample, spooled.path, file_type, rows, sample_rows
+            )
+            if sampled.head.columns.empty:
+                return None
+            arrow_schema = await self.executor_service.run_io(
+                self.reader_service.arrow_schema, spooled.path, file_type
+            )
+            frame = (
+                pd.concat([sampled.head, sampled.sample], ignore_index=True)
+                if len(sampled.sample)
+                else sampled.head
+            )
+            whole_file = sampled.exact and sampled.estimated_rows == len(sampled.head)
+            schema = await self.executor_service.run_io(
+                self._sampled_schema, frame, whole_file
+            )
+            sql_types = self._preview_sql_types(schema, arrow_schema)
+
+            # Файл и схему оставляем в staging, импорт сошлётся на них по токену
+            token = self.staging_service.stage(spooled, filename, file_type, schema)
+            return FilePreview(
+                headers=[str(col) for col in sampled.head.columns],
+                rows=sampled.head.fillna("").astype(str).values.tolist(),
+                sql_types=sql_types,
+                estimated_rows=sampled.estimated_rows,
+                rows_exact=sampled.exact,
+                sampled_rows=len(sampled.sample),
+                upload_token=token,
+            )
         except ValueError as ve:
             logger.error(str(ve))
+            return None
+        finally:
+            if spooled is not None and token is None:
+                self.reader_service.cleanup(spooled.path)
+
+    def _sampled_schema(self, frame: pd.DataFrame, whole_file: bool) -> FileSchema:
+        # Если файл прочитан не целиком, целые и строки берём с запасом.
+        # Одна и та же схема для предпросмотра и импорта
+        stats = self.schema_service.infer(frame)
+        if whole_file:
+            return FileSchema(stats, 0)
+        return FileSchema(self._widen_sampled(stats), SAMPLED_MIN_VARCHAR_LEN)
+
+    def _preview_sql_types(
+        self, schema: FileSchema, arrow_schema: Union[pa.Schema, None]
+    ) -> Dict[str, List[str]]:
+        # Типы для диалектов выводим из одной статистики так же, как _plan_import
+        stats, min_varchar_len = schema
+        sql_types = {}
+        for dialect in PREVIEW_DIALECTS:
+            sql_types[dialect] = [
+                (
+                    self._define_arrow_sql_type(
+                        arrow_schema.field(i).type, stats[i], dialect, min_varchar_len
+                    )
+                    if arrow_schema is not None
+                    else self._sql_type_from_stats(stats[i], dialect, min_varchar_len)
+                )
+                for i in range(len(stats))
+            ]
+        return sql_types
 
     def _detect_file_type(self, filename: str) -> str:
-        _, ext = os.path.splitext(filename.lower())
-        if ext in [".xlsx", ".xls"]:
-            return "excel"
-        elif ext == ".csv":
-            return "csv"
-        elif ext == ".json":
-            return "json"
-        else:
-            raise ValueError(f"Неподдерживаемое расширение файла: {ext}")
+        return self.reader_service.detect_file_type(filename)
 
     def _transliterate_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        translated_columns = []
-        for col in df.columns:
-            latin_col = self.translite_service.translite(str(col))
-            translated_columns.append(latin_col)
-        df.columns = translated_columns
+        df.columns = self.translite_service.translite_columns(df.columns)
         return df
 
     def _generate_create_table_sql(
@@ -100,11 +459,21 @@ class ImportService:
         table_name: str,
         schema_name: str,
         dialect: Literal["mysql", "postgresql", "oracle"],
+        min_varchar_len: int = 0,
+        arrow_schema: Union[pa.Schema, None] = None,
+        stats: Union[List[ColumnStats], None] = None,
     ) -> List[str]:
+        if stats is None:
+            stats = self.schema_service.infer(df)
+
         columns = []
-        for col in df.columns:
-            series = df[col]
-            sql_type = self._define_sql_type(series, dialect)
+        for i, col in enumerate(df.columns):
+            if arrow_schema is not None:
+                sql_type = self._define_arrow_sql_type(
+                    arrow_schema.field(i).type, stats[i], dialect, min_varchar_len
+                )
+            else:
+                sql_type = self._sql_type_from_stats(stats[i], dialect, min_varchar_len)
             columns.append(f"{col} {sql_type}")
 
         columns_def = ", ".join(columns)
@@ -113,8 +482,7 @@ class ImportService:
         if dialect == "mysql":
             sql_commands = [
                 f"CREATE DATABASE IF NOT EXISTS {schema_name}",
-                f"USE {schema_name}",
-                f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_def})",
+                f"CREATE TABLE IF NOT EXISTS {schema_name}.{table_name} ({columns_def})",
             ]
 
         elif dialect == "postgresql":
@@ -140,23 +508,64 @@ class ImportService:
 
         return sql_commands
 
-    def _define_sql_type(
-        self, series: pd.Series, dialect: Literal["mysql", "postgresql", "oracle"]
+    def _sql_type_from_stats(
+        self,
+        stats: ColumnStats,
+        dialect: Literal["mysql", "postgresql", "oracle"],
+        min_varchar_len: int = 0,
     ) -> str:
-        non_null = series.dropna()
-        if non_null.empty:
-            return self._get_varchar_type(dialect, 255)
-        if pd.api.types.is_integer_dtype(non_null):
-            return self._get_integer_type(non_null, dialect)
-        elif pd.api.types.is_float_dtype(non_null):
+        if stats.kind == "empty":
+            return self._get_varchar_type(dialect, max(255, min_varchar_len))
+        elif stats.kind == "integer":
+            return self._get_integer_type(stats.min, stats.max, dialect)
+        elif stats.kind == "float":
             return self._get_float_type(dialect)
-        elif pd.api.types.is_bool_dtype(non_null):
+        elif stats.kind == "bool":
             return self._get_boolean_type(dialect)
-        elif pd.api.types.is_datetime64_any_dtype(non_null):
+        elif stats.kind == "datetime":
             return self._get_datetime_type(dialect)
         else:
-            max_len = non_null.astype(str).map(len).max()
-            return self._get_varchar_type(dialect, max_len)
+            return self._get_varchar_type(
+                dialect, max(stats.max_len or 0, min_varchar_len)
+            )
+
+    def _define_arrow_sql_type(
+        self,
+        arrow_type: pa.DataType,
+        stats: ColumnStats,
+        dialect: Literal["mysql", "postgresql", "oracle"],
+        min_varchar_len: int = 0,
+    ) -> str:
+        # Тип колонки задан в файле, по данным определяем только длину строк
+        if pa.types.is_integer(arrow_type):
+            bits = arrow_type.bit_width
+            if pa.types.is_signed_integer(arrow_type):
+                return self._get_integer_type(
+                    -(2 ** (bits - 1)), 2 ** (bits - 1) - 1, dialect
+                )
+            return self._get_integer_type(0, 2**bits - 1, dialect)
+        elif pa.types.is_floating(arrow_type):
+            return self._get_float_type(dialect)
+        elif pa.types.is_decimal(arrow_type):
+            return self._get_decimal_type(
+                dialect, arrow_type.precision, arrow_type.scale
+            )
+        elif pa.types.is_boolean(arrow_type):
+            return self._get_boolean_type(dialect)
+        elif pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+            return self._get_datetime_type(dialect)
+        elif pa.types.is_null(arrow_type):
+            return self._get_varchar_type(dialect, max(255, min_varchar_len))
+        else:
+            return self._sql_type_from_stats(stats, dialect, min_varchar_len)
+
+    def _get_decimal_type(self, dialect: str, precision: int, scale: int) -> str:
+        if dialect == "oracle":
+            return f"NUMBER({min(precision, 38)}, {scale})"
+        elif dialect == "postgresql":
+            return f"NUMERIC({precision}, {scale})"
+        else:
+            return f"DECIMAL({min(precision, 65)}, {scale})"
 
     def _get_varchar_type(self, dialect: str, max_len: int) -> str:
         length = min(max_len * 2, 4000)
@@ -178,29 +587,32 @@ class ImportService:
         else:
             return "TEXT"
 
-    def _get_integer_type(self, series: pd.Series, dialect: str) -> str:
+    def _get_integer_type(self, min_value: int, max_value: int, dialect: str) -> str:
+        def between(low: int, high: int) -> bool:
+            return low <= min_value and max_value <= high
+
         if dialect == "oracle":
-            if series.between(-32768, 32767).all():
+            if between(-32768, 32767):
                 return "NUMBER(5)"
-            elif series.between(-8388608, 8388608).all():
+            elif between(-8388608, 8388608):
                 return "NUMBER(7)"
-            elif series.between(-2147483648, 2147483647).all():
+            elif between(-2147483648, 2147483647):
                 return "PLS_INTEGER"
             else:
                 return "NUMBER(19)"
         elif dialect == "postgresql":
-            if series.between(-32768, 32767).all():
+            if between(-32768, 32767):
                 return "smallint"
-            elif series.between(-2147483648, 2147483647).all():
+            elif between(-2147483648, 2147483647):
                 return "integer"
             else:
                 return "bigint"
         else:
-            if series.between(-32768, 32767).all():
+            if between(-32768, 32767):
                 return "SMALLINT"
-            elif series.between(-8388608, 8388608).all():
+            elif between(-8388608, 8388608):
                 return "MEDIUMINT"
-            elif series.between(-2147483648, 2147483647).all():
+            elif between(-2147483648, 2147483647):
                 return "INT"
             else:
                 return "BIGINT"
@@ -225,113 +637,231 @@ class ImportService:
         else:
             return "TIMESTAMP"
 
-    def _execute_on_servers(
+    async def _execute_on_servers(
         self,
-        create_sql: str,
-        df: pd.DataFrame,
-        table_name: str,
-        schema_name: str,
+        create_sql: Dict[str, List[str]],
+        frames: Iterator[pd.DataFrame],
+        dto: ImportDTO,
         servers: List[DatabaseServer],
-    ) -> List[QueryResult]:
-        results = []
-        for _, server in enumerate(servers, 1):
-            server_name = server.name
+        job: Union[Job, None] = None,
+    ) -> BatchQueryResult:
+        start_time = time.perf_counter()
+        fanout = _FrameFanout(frames, len(servers), self.executor_service)
+        loaded = [0] * len(servers)
+
+        def on_rows(index: int) -> Callable[[int], None]:
+            def report(rows: int) -> None:
+                loaded[index] = rows
+                # Строка считается загруженной, когда она есть на всех серверах
+                if job:
+                    job.report(rows_loaded=min(loaded))
+
+            return report
+
+        async def load(index: int, server: DatabaseServer) -> QueryResult:
             try:
-                dialect = server.type
-                engine_url = f"{dialect}://{server.username}:{server.password}@{server.host}:{server.port}/{server.database}"
-                engine = create_engine(engine_url)
-
-                with engine.connect() as conn:
-                    conn.execute(text(create_sql.lower()))
-                    conn.commit()
-
-                start_time = time.time()
-
-                df.to_sql(
-                    name=table_name,
-                    con=engine,
-                    schema=schema_name,
-                    if_exists="append",
-                    index=False,
-                    method="multi",
-                    chunksize=1000,
-                )
-
-                load_time = time.time() - start_time
-                results.append(
-                    QueryResult(
-                        server=server_name,
-                        status="success",
-                        message=f"Импорт выполнился за {load_time}",
-                        time=f"{round(load_time, 3)}",
-                    )
-                )
-
-            except SQLAlchemyError as e:
-                results.append(self._failed(server_name, f"SQLAlchemyError: {e}"))
-
-            except Exception as e:
-                results.append(
-                    self._failed(server_name, f"Не удалось сделать импорт: {e}")
+                return await self._execute_on_single_server(
+                    create_sql[server.type],
+                    fanout.consume(index),
+                    dto.table_name,
+                    dto.schema_name,
+                    server,
+                    dto.load_method,
+                    dto.batch_size,
+                    on_rows(index),
+                    dto.parallelism,
+                    dto.preserve_order,
                 )
+            finally:
+                # Упавший или закончивший сервер больше не сдерживает остальных
+                fanout.detach(index)
 
-        return results
+        logger.info(f"Загружаем файл на {len(servers)} серверов одновременно")
+        producer = asyncio.create_task(fanout.run())
+        try:
+            results = await asyncio.gather(
+                *(load(index, server) for index, server in enumerate(servers))
+            )
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        succeeded = sum(1 for result in results if result.status == "success")
+        load_time = time.perf_counter() - start_time
+        return BatchQueryResult(
+            results=list(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            time=f"{round(load_time, 3)}",
+        )
 
     async def _execute_on_single_server(
         self,
         create_sql: List[str],
-        df: pd.DataFrame,
+        frames: Frames,
         table_name: str,
         schema_name: str,
         server: DatabaseServer,
+        load_method: str = "native",
+        batch_size: Union[int, None] = None,
+        on_rows: Union[Callable[[int], None], None] = None,
+        parallelism: int = 1,
+        preserve_order: bool = False,
     ) -> QueryResult:
         server_name = server.name
-        engine = None
         try:
-            for sql_command in create_sql:
-                dto = SendQueryDTO(query=sql_command, selected_server=server)
-                result = await self.query_service.run_query(dto)
-                if result.status != "success":
-                    logger.warning(
-                        f"Предупреждение: команда '{sql_command}' завершилась со статусом {result.status}"
-                    )
-
-            dialect = server.type
-            if dialect in ["mysql", "mariadb"]:
-                engine_url = f"{dialect}+pymysql://{server.username}:{server.password}@{server.host}:{server.port}/{server.database}"
-            elif dialect == "postgresql":
-                engine_url = f"{dialect}+psycopg2://{server.username}:{server.password}@{server.host}:{server.port}/{server.database}"
-            elif dialect == "oracle":
-                engine_url = f"{dialect}+oracledb://{server.username}:{server.password}@{server.host}:{server.port}/?service_name={server.database}"
+            start_time = time.perf_counter()
+            if load_method == "native" and parallelism > 1:
+                partitions = await self.bulk_loader_service.load_parallel(
+                    server,
+                    frames,
+                    table_name,
+                    schema_name,
+                    parallelism,
+                    batch_size,
+                    on_rows,
+                    ddl=create_sql,
+                    ordered=preserve_order,
+                )
+                load_time = time.perf_counter() - start_time
+                result = self._loaded(
+                    server_name, sum(p.rows for p in partitions), load_time
+                )
+                result.partitions = partitions
+                return result
+            elif load_method == "native":
+                # DDL выполняется на том же соединении, что и загрузка
+                rows = await self.bulk_loader_service.load_frames(
+                    server,
+                    frames,
+                    table_name,
+                    schema_name,
+                    batch_size,
+                    on_rows,
+                    ddl=create_sql,
+                )
             else:
-                engine_url = f"{dialect}://{server.username}:{server.password}@{server.host}:{server.port}/{server.database}"
-
-            engine = create_engine(engine_url)
-
-            start_time = time.time()
-
-            df.to_sql(
-                name=table_name.lower(),
-                con=engine,
-                schema=schema_name.lower(),
-                if_exists="append",
-                index=False,
-                method="multi",
-                chunksize=1000,
-            )
-
-            load_time = time.time() - start_time
-            return QueryResult(
-                server=server_name,
-                status="success",
-                message=f"Импорт выполнился!",
-                time=f"{round(load_time, 3)}"
-            )
+                rows = await self._sql_load(
+                    server, create_sql, frames, table_name, schema_name, on_rows
+                )
+            load_time = time.perf_counter() - start_time
+            return self._loaded(server_name, rows, load_time)
 
         except SQLAlchemyError as e:
             return self._failed(server_name, f"SQLAlchemyError: {e}")
         except Exception as e:
             return self._failed(server_name, f"Не удалось сделать импорт: {e}")
+
+    async def _sql_load(
+        self,
+        server: DatabaseServer,
+        create_sql: List[str],
+        frames: Frames,
+        table_name: str,
+        schema_name: str,
+        on_rows: Union[Callable[[int], None], None] = None,
+    ) -> int:
+        engine = self.engine_service.get(server)
+        # Соединение держим на всю загрузку, вызовы драйвера блокирующие - в потоке.
+        # Между чанками задачу можно отменить, транзакция тогда откатится
+        conn = await self.executor_service.run_io(engine.connect)
+        try:
+            transaction = conn.begin()
+            try:
+                with self.metrics_service.span("import", "ddl", server):
+                    for sql_command in create_sql:
+                        await self.executor_service.run_io(
+                            self._sql_ddl, conn, server, sql_command
+                        )
+
+                rows = 0
+                with self.metrics_service.span("import", "load", server):
+                    async for df in self.bulk_loader_service.aiter_frames(frames):
+                        await self.executor_service.run_io(
+                            df.to_sql,
+                            name=table_name.lower(),
+                            con=conn,
+                            schema=schema_name.lower(),
+                            if_exists="append",
+                            index=False,
+                            method="multi",
+                            chunksize=1000,
+                        )
+                        rows += len(df)
+                        if on_rows:
+                            on_rows(rows)
+                await self.executor_service.run_io(transaction.commit)
+                return rows
+            except BaseException:
+                await self.executor_service.run_io(transaction.rollback)
+                raise
         finally:
-            if engine:
-                engine.dispose()
+            await self.executor_service.run_io(conn.close)
+
+    def _sql_ddl(
+        self, conn: Connection, server: DatabaseServer, sql_command: str
+    ) -> None:
+        # В postgres DDL транзакционный: ошибку команды откатываем до точки сохранения,
+        # чтобы не потерять всю транзакцию. mysql и oracle коммитят DDL неявно
+        savepoint = conn.begin_nested() if server.type == "postgresql" else None
+        try:
+            conn.exec_driver_sql(sql_command)
+        except SQLAlchemyError as e:
+            if savepoint is not None:
+                savepoint.rollback()
+            logger.warning(
+                f"Предупреждение: команда '{sql_command}' завершилась ошибкой: {e}"
+            )
+            return
+        if savepoint is not None:
+            savepoint.commit()
+
+
+class _FrameFanout:
+    # Раздаёт чанки одного разбора нескольким загрузчикам. Очереди ограничены,
+    # поэтому в памяти не больше window чанков на сервер, а быстрые серверы
+    # ждут самого медленного
+    def __init__(
+        self,
+        frames: Iterator[pd.DataFrame],
+        consumers: int,
+        executor_service: ExecutorService,
+        window: int = 2,
+    ):
+        self._frames = frames
+        self._executor_service = executor_service
+        self._queues = [asyncio.Queue(maxsize=window) for _ in range(consumers)]
+        self._active = [True] * consumers
+
+    async def run(self) -> None:
+        end: Union[Exception, None] = None
+        try:
+            while any(self._active):
+                frame = await self._executor_service.run_io(next, self._frames, None)
+                if frame is None:
+                    break
+                for index, queue in enumerate(self._queues):
+                    if self._active[index]:
+                        await queue.put(frame)
+        except Exception as e:
+            # Ошибку разбора получат все загрузчики
+            end = e
+        for index, queue in enumerate(self._queues):
+            if self._active[index]:
+                await queue.put(end)
+
+    async def consume(self, index: int) -> AsyncIterator[pd.DataFrame]:
+        queue = self._queues[index]
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def detach(self, index: int) -> None:
+        self._active[index] = False
+        queue = self._queues[index]
+        while not queue.empty():
+            queue.get_nowait()
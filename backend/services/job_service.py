@@ -0,0 +1,179 @@
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable, Dict, List, Union
+import asyncio
+import time
+import uuid
+from models.dto.batch_query_result import BatchQueryResult
+from models.dto.job_status import JobStatus
+from models.dto.query_result import QueryResult
+from models.server import DatabaseServer
+from services.logger_service import logger
+
+
+class Job:
+    def __init__(self, status: JobStatus):
+        self.status = status
+        self.task: Union[asyncio.Task, None] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+        self.status.status = "running"
+        self.status.started_at = time.time()
+
+    def report(
+        self, rows_loaded: Union[int, None] = None, progress: Union[float, None] = None
+    ) -> None:
+        if rows_loaded is not None:
+            self.status.rows_loaded = rows_loaded
+        if progress is not None:
+            self.status.progress = round(min(max(progress, 0.0), 1.0), 4)
+
+        elapsed = time.monotonic() - self._started
+        if elapsed > 0:
+            self.status.rows_per_sec = round(self.status.rows_loaded / elapsed, 1)
+
+        fraction = self.status.progress
+        if fraction:
+            self.status.eta_sec = round(elapsed * (1 - fraction) / fraction, 1)
+
+
+class JobService:
+    def __init__(self, max_per_server: int = 2, retention_sec: int = 3600):
+        self.max_per_server = max_per_server
+        self.retention_sec = retention_sec
+        self._jobs: Dict[str, Job] = {}
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    def submit(
+        self,
+        kind: str,
+        server: DatabaseServer,
+        runner: Callable[[Job], Awaitable[QueryResult]],
+        cleanup: Union[Callable[[], None], None] = None,
+    ) -> JobStatus:
+        return self.submit_many(kind, [server], runner, cleanup)
+
+    def submit_many(
+        self,
+        kind: str,
+        servers: List[DatabaseServer],
+        runner: Callable[[Job], Awaitable[Union[QueryResult, BatchQueryResult]]],
+        cleanup: Union[Callable[[], None], None] = None,
+    ) -> JobStatus:
+        self._purge()
+
+        names = ", ".join(server.name for server in servers)
+        job = Job(
+            JobStatus(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                server=names,
+                created_at=time.time(),
+            )
+        )
+        self._jobs[job.status.id] = job
+        job.task = asyncio.create_task(self._run(job, servers, runner))
+        # Колбэк срабатывает при любом завершении задачи, в том числе при отмене
+        # в очереди или до первого шага, когда runner так и не запустился
+        job.task.add_done_callback(lambda task: self._finish(job, cleanup))
+        logger.info(f"Задача {kind} {job.status.id} поставлена в очередь на '{names}'")
+        return job.status
+
+    def get(self, job_id: str) -> Union[JobStatus, None]:
+        job = self._jobs.get(job_id)
+        return job.status if job else None
+
+    def list_jobs(self) -> List[JobStatus]:
+        return [job.status for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> Union[JobStatus, None]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+        return job.status
+
+    async def close(self) -> None:
+        tasks = [
+            job.task for job in self._jobs.values() if job.task and not job.task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(
+        self,
+        job: Job,
+        servers: List[DatabaseServer],
+        runner: Callable[[Job], Awaitable[Union[QueryResult, BatchQueryResult]]],
+    ) -> None:
+        status = job.status
+        try:
+            async with AsyncExitStack() as stack:
+                # Слоты берём в порядке id: задачи на пересекающиеся наборы серверов
+                # не заблокируют друг друга
+                for server in sorted(servers, key=lambda s: s.id):
+                    await stack.enter_async_context(self._semaphore(server))
+                job.start()
+                result = await runner(job)
+
+            status.result = result
+            if isinstance(result, BatchQueryResult):
+                status.status = "success" if result.failed == 0 else "error"
+                status.message = (
+                    f"Успешно: {result.succeeded}, с ошибкой: {result.failed}"
+                )
+                rows = max((r.rows or 0 for r in result.results), default=0)
+            else:
+                status.status = "success" if result.status == "success" else "error"
+                status.message = result.message
+                rows = result.rows
+            if rows is not None:
+                status.rows_loaded = rows
+            if status.status == "success":
+                status.progress = 1.0
+                status.eta_sec = 0.0
+
+        except asyncio.CancelledError:
+            status.status = "cancelled"
+            status.message = "Задача отменена"
+            logger.warning(f"Задача {status.id} отменена")
+
+        except Exception as e:
+            status.status = "error"
+            status.message = str(e)
+            logger.error(f"Задача {status.id} завершилась ошибкой: {e}")
+
+        finally:
+            status.finished_at = time.time()
+
+    def _finish(self, job: Job, cleanup: Union[Callable[[], None], None]) -> None:
+        status = job.status
+        if status.finished_at is None:
+            # Задачу отменили до первого шага, _run статус не записал
+            status.status = "cancelled"
+            status.message = "Задача отменена"
+            status.finished_at = time.time()
+        if cleanup is None:
+            return
+        try:
+            cleanup()
+        except Exception as e:
+            logger.warning(f"Не удалось освободить ресурсы задачи {status.id}: {e}")
+
+    def _semaphore(self, server: DatabaseServer) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(server.id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_server)
+            self._semaphores[server.id] = semaphore
+        return semaphore
+
+    def _purge(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            finished_at = job.status.finished_at
+            if finished_at is not None and now - finished_at > self.retention_sec:
+                del self._jobs[job_id]
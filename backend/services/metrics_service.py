@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple, Union
+import threading
+import time
+from models.server import DatabaseServer
+
+# Границы корзин в секундах: от миллисекунд на connect до минут на загрузку файла
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...],
+        buckets: Tuple[float, ...],
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # Для каждого набора меток: счётчики по корзинам (+Inf последней), сумма
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, label_values: Tuple[str, ...]) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = ([0] * (len(self.buckets) + 1), [0.0])
+            self._series[label_values] = series
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            labels = ",".join(
+                f'{key}="{_escape(value)}"'
+                for key, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total[0]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class MetricsService:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self._histograms = {
+            "query": Histogram(
+                "db_worker_query_stage_seconds",
+                "Время этапов запроса: connect, execute, fetch, serialize",
+                ("stage", "server", "dialect"),
+                buckets,
+            ),
+            "import": Histogram(
+                "db_worker_import_stage_seconds",
+                "Время этапов импорта: parse, infer, ddl, load",
+                ("stage", "server", "dialect"),
+                buckets,
+            ),
+            "export": Histogram(
+                "db_worker_export_stage_seconds",
+                "Время кодирования экспорта",
+                ("stage", "format", "server", "dialect"),
+                buckets,
+            ),
+        }
+
+    def observe(
+        self,
+        kind: str,
+        stage: str,
+        seconds: float,
+        server: Union[DatabaseServer, None] = None,
+        fmt: Union[str, None] = None,
+    ) -> None:
+        histogram = self._histograms[kind]
+        values = {
+            "stage": stage,
+            "format": fmt or "",
+            "server": server.name if server else "",
+            "dialect": server.type if server else "",
+        }
+        label_values = tuple(values[key] for key in histogram.labels)
+        # Наблюдения приходят и из пула потоков
+        with self._lock:
+            histogram.observe(seconds, label_values)
+
+    @contextmanager
+    def span(
+        self,
+        kind: str,
+        stage: str,
+        server: Union[DatabaseServer, None] = None,
+        fmt: Union[str, None] = None,
+    ) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(kind, stage, time.perf_counter() - started, server, fmt)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for histogram in self._histograms.values():
+                lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
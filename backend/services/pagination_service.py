@@ -0,0 +1,172 @@
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Literal, Tuple
+import re
+import uuid
+from models.dto.page_query_dto import FilterDTO, PageQueryDTO
+
+_OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "lt": "<",
+    "lte": "<=",
+    "gt": ">",
+    "gte": ">=",
+}
+_ORDER_BY = re.compile(r"\border\s+by\b", re.IGNORECASE)
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ("true", "t", "1", "yes", "y"):
+        return True
+    elif lowered in ("false", "f", "0", "no", "n"):
+        return False
+    raise ValueError(value)
+
+
+# asyncpg строго проверяет типы параметров: строку из JSON в дату или число
+# не превратит, поэтому разбираем её сами по типу параметра запроса
+_PG_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "int2": int,
+    "int4": int,
+    "int8": int,
+    "float4": float,
+    "float8": float,
+    "numeric": Decimal,
+    "bool": _parse_bool,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+    "timestamp": datetime.fromisoformat,
+    "timestamptz": datetime.fromisoformat,
+    "uuid": uuid.UUID,
+}
+_PG_TEXT_TYPES = {"text", "varchar", "bpchar", "name"}
+
+
+class PaginationService:
+    def build_page_sql(
+        self,
+        dto: PageQueryDTO,
+        dialect: Literal["mysql", "postgresql", "oracle"],
+    ) -> Tuple[str, List[Any]]:
+        params: List[Any] = []
+        sql = self._base_sql(dto, dialect, "*", params)
+
+        if dto.sort_by:
+            direction = "DESC" if dto.sort_dir == "desc" else "ASC"
+            # Первая колонка разводит равные значения, иначе строки с одинаковым
+            # ключом могут переезжать между страницами
+            sql += f" ORDER BY {self._quote(dto.sort_by, dialect)} {direction}, 1"
+        elif not _ORDER_BY.search(dto.query):
+            # Без ORDER BY СУБД отдаёт строки в любом порядке, и LIMIT/OFFSET
+            # могут показать одну строку на двух страницах
+            sql += " ORDER BY 1"
+
+        offset = (dto.page - 1) * dto.limit
+        # Берём на одну строку больше, чтобы понять, есть ли следующая страница
+        fetch = dto.limit + 1
+        if dialect == "oracle":
+            sql += (
+                f" OFFSET {self._placeholder(dialect, params, offset)} ROWS"
+                f" FETCH NEXT {self._placeholder(dialect, params, fetch)} ROWS ONLY"
+            )
+        else:
+            sql += (
+                f" LIMIT {self._placeholder(dialect, params, fetch)}"
+                f" OFFSET {self._placeholder(dialect, params, offset)}"
+            )
+        return sql, params
+
+    def build_count_sql(
+        self,
+        dto: PageQueryDTO,
+        dialect: Literal["mysql", "postgresql", "oracle"],
+    ) -> Tuple[str, List[Any]]:
+        params: List[Any] = []
+        sql = self._base_sql(dto, dialect, "COUNT(*) AS total", params)
+        return sql, params
+
+    def coerce_pg_params(self, params: List[Any], types: List[str]) -> List[Any]:
+        return [self._coerce_pg(value, kind) for value, kind in zip(params, types)]
+
+    def _coerce_pg(self, value: Any, kind: str) -> Any:
+        if value is None:
+            return value
+        if kind in _PG_TEXT_TYPES:
+            return value if isinstance(value, str) else str(value)
+        if isinstance(value, bool):
+            return value
+        if kind == "numeric" and isinstance(value, (int, float)):
+            return Decimal(str(value))
+        if kind in ("float4", "float8") and isinstance(value, int):
+            return float(value)
+        parser = _PG_PARSERS.get(kind)
+        if parser is None or not isinstance(value, str):
+            return value
+        try:
+            return parser(value)
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"Значение фильтра '{value}' не подходит под тип {kind}")
+
+    def _base_sql(
+        self,
+        dto: PageQueryDTO,
+        dialect: str,
+        select: str,
+        params: List[Any],
+    ) -> str:
+        query = dto.query.strip().rstrip(";").strip()
+        if dialect == "mysql":
+            # pymysql подставляет параметры через %, поэтому экранируем % в самом запросе
+            query = query.replace("%", "%%")
+
+        # Oracle не понимает AS для алиаса подзапроса
+        alias = "page_src" if dialect == "oracle" else "AS page_src"
+        sql = f"SELECT {select} FROM ({query}) {alias}"
+
+        conditions = [self._condition(f, dialect, params) for f in dto.filters]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql
+
+    def _condition(self, item: FilterDTO, dialect: str, params: List[Any]) -> str:
+        column = self._quote(item.column, dialect)
+
+        if item.op == "is_null":
+            return f"{column} IS NULL"
+        elif item.op == "not_null":
+            return f"{column} IS NOT NULL"
+        elif item.op == "like":
+            if dialect == "postgresql":
+                column = f"CAST({column} AS TEXT)"
+            return (
+                f"{column} LIKE {self._placeholder(dialect, params, str(item.value))}"
+            )
+        elif item.op == "in":
+            values = item.value if isinstance(item.value, list) else [item.value]
+            if not values:
+                return "1 = 0"
+            placeholders = ", ".join(
+                self._placeholder(dialect, params, v) for v in values
+            )
+            return f"{column} IN ({placeholders})"
+        else:
+            operator = _OPERATORS[item.op]
+            return (
+                f"{column} {operator} {self._placeholder(dialect, params, item.value)}"
+            )
+
+    def _placeholder(self, dialect: str, params: List[Any], value: Any) -> str:
+        params.append(value)
+        if dialect == "postgresql":
+            return f"${len(params)}"
+        elif dialect == "oracle":
+            return f":{len(params)}"
+        else:
+            return "%s"
+
+    def _quote(self, column: str, dialect: str) -> str:
+        if dialect == "mysql":
+            return "`" + column.replace("`", "``") + "`"
+        return '"' + column.replace('"', '""') + '"'
@@ -0,0 +1,338 @@
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Union
+import asyncio
+import time
+import aiomysql
+import asyncpg
+import oracledb
+from models.dto.pool_stats import PoolStats
+from models.pool_config import PoolConfig
+from models.server import DatabaseServer
+from services.logger_service import logger
+
+# В pymysql нет константы для этой команды протокола
+MYSQL_COM_RESET_CONNECTION = 0x1F
+# Состояние пакетов и текущая схема возвращаются к тем, что были при входе
+ORACLE_RESET_SESSION = """
+BEGIN
+    DBMS_SESSION.RESET_PACKAGE;
+    EXECUTE IMMEDIATE 'ALTER SESSION SET CURRENT_SCHEMA = '
+        || SYS_CONTEXT('USERENV', 'SESSION_USER');
+END;"""
+ORACLE_DRAIN_POLL_SEC = 0.1
+
+
+class _PoolEntry:
+    def __init__(self, server: DatabaseServer, pool: Any):
+        self.server = server
+        self.pool = pool
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired_total = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.healthy = True
+        self.last_health_check: Union[float, None] = None
+
+
+class PoolService:
+    def __init__(self, config: Union[PoolConfig, None] = None):
+        self.config = config or PoolConfig()
+        self._pools: Dict[int, _PoolEntry] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Соединения, обещанные долгим параллельным загрузкам, по id сервера
+        self._reserved: Dict[int, int] = {}
+        self._maintenance_task: Union[asyncio.Task, None] = None
+
+    async def start(self) -> None:
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+
+    async def close(self) -> None:
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self._maintenance_task = None
+
+        for server_id in list(self._pools):
+            await self._close_entry(server_id)
+
+    @asynccontextmanager
+    async def acquire(self, server: DatabaseServer) -> AsyncIterator[Any]:
+        entry = await self._get_entry(server)
+
+        # Между _get_entry и этой строкой задача не переключается, так что
+        # выселение под замком уже увидит waiting и пул не закроет
+        entry.waiting += 1
+        start_time = time.perf_counter()
+        try:
+            conn = await asyncio.wait_for(
+                self._acquire_conn(entry), timeout=self.config.acquire_timeout_sec
+            )
+        finally:
+            entry.waiting -= 1
+
+        wait_time = time.perf_counter() - start_time
+        entry.acquired_total += 1
+        entry.wait_total += wait_time
+        entry.wait_max = max(entry.wait_max, wait_time)
+        entry.in_use += 1
+        try:
+            yield conn
+        except BaseException:
+            # Соединение могло остаться с недочитанным результатом, в пул его не возвращаем
+            if server.type == "mysql":
+                conn.close()
+            raise
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            await self._release_conn(entry, conn)
+
+    @contextmanager
+    def reserve(self, server: DatabaseServer, count: int) -> Iterator[int]:
+        # Параллельная загрузка держит соединения до своей очереди коммита.
+        # Делим пул между загрузками так, чтобы одно соединение всегда оставалось
+        # остальным запросам, и отдаём столько, сколько свободно, но не меньше одного
+        reserved = self._reserved.get(server.id, 0)
+        granted = max(min(count, self.config.max_size - 1 - reserved), 1)
+        self._reserved[server.id] = reserved + granted
+        try:
+            yield granted
+        finally:
+            left = self._reserved[server.id] - granted
+            if left:
+                self._reserved[server.id] = left
+            else:
+                del self._reserved[server.id]
+
+    def stats(self) -> List[PoolStats]:
+        now = time.monotonic()
+        result = []
+        for entry in self._pools.values():
+            size, idle = self._pool_size(entry)
+            acquired = entry.acquired_total
+            result.append(
+                PoolStats(
+                    server_id=entry.server.id,
+                    server=entry.server.name,
+                    type=entry.server.type,
+                    size=size,
+                    idle=idle,
+                    in_use=entry.in_use,
+                    waiting=entry.waiting,
+                    reserved=self._reserved.get(entry.server.id, 0),
+                    min_size=self.config.min_size,
+                    max_size=self.config.max_size,
+                    acquired_total=acquired,
+                    avg_wait_ms=(
+                        round(entry.wait_total / acquired * 1000, 3)
+                        if acquired
+                        else 0.0
+                    ),
+                    max_wait_ms=round(entry.wait_max * 1000, 3),
+                    healthy=entry.healthy,
+                    idle_for_sec=(
+                        round(now - entry.last_used, 3) if entry.in_use == 0 else 0.0
+                    ),
+                    last_health_check=entry.last_health_check,
+                )
+            )
+        return result
+
+    async def discard(self, server_id: int) -> None:
+        lock = self._locks.setdefault(server_id, asyncio.Lock())
+        async with lock:
+            await self._close_entry(server_id)
+
+    async def _get_entry(self, server: DatabaseServer) -> _PoolEntry:
+        entry = self._pools.get(server.id)
+        if entry is not None and entry.server == server:
+            return entry
+
+        lock = self._locks.setdefault(server.id, asyncio.Lock())
+        async with lock:
+            entry = self._pools.get(server.id)
+            if entry is not None and entry.server == server:
+                return entry
+
+            # Конфиг сервера поменялся - старый пул больше не нужен
+            if entry is not None:
+                await self._close_entry(server.id)
+
+            logger.info(f"Создаём пул соединений для '{server.name}'")
+            pool = await self._create_pool(server)
+            entry = _PoolEntry(server, pool)
+            self._pools[server.id] = entry
+            return entry
+
+    async def _create_pool(self, server: DatabaseServer) -> Any:
+        config = self.config
+        if server.type == "mysql":
+            return await aiomysql.create_pool(
+                host=server.host,
+                port=server.port,
+                user=server.username,
+                password=server.password,
+                db=server.database,
+                autocommit=True,
+                minsize=config.min_size,
+                maxsize=config.max_size,
+                pool_recycle=config.recycle_sec,
+            )
+        elif server.type == "postgresql":
+            conn_str = f"postgresql://{server.username}:{server.password}@{server.host}:{server.port}/{server.database}"
+            return await asyncpg.create_pool(
+                conn_str,
+                min_size=config.min_size,
+                max_size=config.max_size,
+                max_inactive_connection_lifetime=config.idle_timeout_sec,
+            )
+        elif server.type == "oracle":
+            dsn = f"{server.host}:{server.port}/{server.database}"
+            return oracledb.create_pool_async(
+                user=server.username,
+                password=server.password,
+                dsn=dsn,
+                min=config.min_size,
+                max=config.max_size,
+                increment=1,
+                timeout=config.idle_timeout_sec,
+                max_lifetime_session=config.recycle_sec,
+                ping_interval=config.health_check_interval_sec,
+            )
+        else:
+            raise ValueError(f"Неподдерживаемая СУБД: {server.type}")
+
+    async def _acquire_conn(self, entry: _PoolEntry) -> Any:
+        return await entry.pool.acquire()
+
+    async def _release_conn(self, entry: _PoolEntry, conn: Any) -> None:
+        try:
+            if entry.server.type == "mysql":
+                if not conn.closed and not await self._reset_conn(entry, conn):
+                    conn.close()
+                entry.pool.release(conn)
+            elif entry.server.type == "oracle":
+                if await self._reset_conn(entry, conn):
+                    await entry.pool.release(conn)
+                else:
+                    await entry.pool.drop(conn)
+            else:
+                # asyncpg сам сбрасывает сессию при возврате (RESET ALL, UNLISTEN и т.д.)
+                await entry.pool.release(conn)
+        except Exception as e:
+            logger.warning(
+                f"Не удалось вернуть соединение в пул '{entry.server.name}': {e}"
+            )
+
+    async def _reset_conn(self, entry: _PoolEntry, conn: Any) -> bool:
+        # Запрос пользователя мог сменить базу или настройки сессии (USE, SET,
+        # ALTER SESSION), следующий запрос на этом соединении их видеть не должен
+        server = entry.server
+        try:
+            if server.type == "mysql":
+                # COM_RESET_CONNECTION: сессионные переменные, временные таблицы,
+                # блокировки. Кодировку и базу после него выставляем заново
+                await conn._execute_command(MYSQL_COM_RESET_CONNECTION, "")
+                await conn._read_ok_packet()
+                await conn.set_charset(conn.charset)
+                await conn.autocommit(True)
+                await conn.select_db(server.database)
+            else:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(ORACLE_RESET_SESSION)
+            return True
+        except Exception as e:
+            logger.warning(
+                f"Не удалось сбросить сессию соединения '{server.name}', закрываем его: {e}"
+            )
+            return False
+
+    def _pool_size(self, entry: _PoolEntry) -> tuple:
+        pool = entry.pool
+        if entry.server.type == "mysql":
+            return pool.size, pool.freesize
+        elif entry.server.type == "postgresql":
+            return pool.get_size(), pool.get_idle_size()
+        else:
+            return pool.opened, pool.opened - pool.busy
+
+    async def _close_entry(self, server_id: int) -> None:
+        entry = self._pools.pop(server_id, None)
+        if entry is None:
+            return
+
+        logger.info(f"Закрываем пул соединений для '{entry.server.name}'")
+        pool = entry.pool
+        try:
+            if entry.server.type == "mysql":
+                pool.close()
+                await pool.wait_closed()
+            elif entry.server.type == "postgresql":
+                await asyncio.wait_for(
+                    pool.close(), timeout=self.config.acquire_timeout_sec
+                )
+            else:
+                # oracledb без force не ждёт занятые соединения, а падает.
+                # Ждём их сами, как и asyncpg, и только потом закрываем
+                deadline = time.monotonic() + self.config.acquire_timeout_sec
+                while pool.busy and time.monotonic() < deadline:
+                    await asyncio.sleep(ORACLE_DRAIN_POLL_SEC)
+                await pool.close(force=True)
+        except asyncio.TimeoutError:
+            pool.terminate()
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии пула '{entry.server.name}': {e}")
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.health_check_interval_sec)
+            for server_id, entry in list(self._pools.items()):
+                if entry.in_use or entry.waiting:
+                    continue
+
+                if time.monotonic() - entry.last_used > self.config.idle_timeout_sec:
+                    await self._evict(entry)
+                    continue
+
+                await self._health_check(entry)
+
+    async def _health_check(self, entry: _PoolEntry) -> None:
+        query = "SELECT 1 FROM dual" if entry.server.type == "oracle" else "SELECT 1"
+        try:
+            conn = await asyncio.wait_for(
+                self._acquire_conn(entry), timeout=self.config.acquire_timeout_sec
+            )
+            try:
+                if entry.server.type == "postgresql":
+                    await conn.fetchval(query)
+                else:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(query)
+                        await cursor.fetchall()
+            finally:
+                await self._release_conn(entry, conn)
+            entry.healthy = True
+        except Exception as e:
+            entry.healthy = False
+            logger.error(f"Пул '{entry.server.name}' не прошёл проверку: {e}")
+            # Пересоздадим пул при следующем запросе
+            await self._evict(entry)
+        finally:
+            entry.last_health_check = time.time()
+
+    async def _evict(self, entry: _PoolEntry) -> None:
+        # Проверяем и закрываем под тем же замком, что и создание пула, иначе
+        # параллельный acquire может взять пул, который мы как раз закрываем
+        lock = self._locks.setdefault(entry.server.id, asyncio.Lock())
+        async with lock:
+            if self._pools.get(entry.server.id) is not entry:
+                return
+            if entry.in_use or entry.waiting:
+                return
+            await self._close_entry(entry.server.id)
@@ -1,59 +1,312 @@
-from typing import List
+from contextlib import aclosing, asynccontextmanager
+from datetime import date, datetime, time as dt_time
+from typing import Any, AsyncIterator, Dict, List, Union
 import asyncio
+import json
 import aiomysql
-import asyncpg
-import oracledb
 import time
+from pymysql.constants import FIELD_TYPE
+from models.dto.batch_query_dto import BatchQueryDTO
+from models.dto.batch_query_result import BatchQueryResult
+from models.dto.page_query_dto import PageQueryDTO
+from models.dto.page_query_result import PageQueryResult
 from models.dto.send_query_dto import SendQueryDTO
+from models.dto.stream_query_dto import StreamQueryDTO
+from models.dto.column_info import ColumnInfo
+from models.dto.fetch_result import FetchResult
 from models.dto.query_result import QueryResult
 from models.server import DatabaseServer
 from services.logger_service import logger
+from services.admission_service import (
+    AdmissionService,
+    QueueFullError,
+    QueueTimeoutError,
+)
+from services.cache_service import QueryCacheService
+from services.metrics_service import MetricsService
+from services.pagination_service import PaginationService
+from services.pool_service import PoolService
+from services.server_registry import ServerRegistry
+
+
+# У некоторых кодов есть алиасы (CHAR = TINY), оставляем основное имя
+MYSQL_TYPE_NAMES = {
+    code: name
+    for name, code in reversed(list(vars(FIELD_TYPE).items()))
+    if name.isupper()
+}
 
 
 class QueryService:
     def __init__(
         self,
-        db_servers: List[DatabaseServer],
-        max_concurrent: int = 10,
+        server_registry: ServerRegistry,
+        pool_service: PoolService,
+        admission_service: AdmissionService,
+        cache_service: QueryCacheService,
+        pagination_service: PaginationService,
+        metrics_service: MetricsService,
         timeout_sec: int = 30,
+        stream_max_rows: int = 1_000_000,
     ):
-        self.db_servers = db_servers
-        self.max_concurrent = max_concurrent
+        self.server_registry = server_registry
+        self.pool_service = pool_service
+        self.admission_service = admission_service
+        self.cache_service = cache_service
+        self.pagination_service = pagination_service
+        self.metrics_service = metrics_service
         self.timeout_sec = timeout_sec
+        self.stream_max_rows = stream_max_rows
 
     # Необходимо использовать оракл клиент для поддержки асинхронных вызовов (Нереальная параша)
     # oracledb.init_oracle_client()
 
     async def run_query(self, dto: SendQueryDTO) -> QueryResult:
-        if dto.selected_server.id not in [server.id for server in self.db_servers]:
+        server = self.server_registry.get(dto.selected_server.id)
+        if server is None:
             return self._failed(
                 dto.selected_server.name,
                 "Сервер не найден в конфиге",
             )
 
-        sem = asyncio.Semaphore(self.max_concurrent)
-
-        result = await self._run_one_with_guard(sem, dto.selected_server, dto.query)
+        result = await self._run_one_with_guard(
+            server,
+            dto.query,
+            dto.result_format,
+            cache_bypass=dto.cache_bypass,
+            cache_invalidate=dto.cache_invalidate,
+        )
         return result
 
+    async def run_page(self, dto: PageQueryDTO) -> PageQueryResult:
+        server = self.server_registry.get(dto.selected_server.id)
+        if server is None:
+            failed = self._failed(
+                dto.selected_server.name, "Сервер не найден в конфиге"
+            )
+            return PageQueryResult(
+                **failed.model_dump(), page=dto.page, limit=dto.limit
+            )
+
+        page_sql, page_params = self.pagination_service.build_page_sql(dto, server.type)
+        page_call = self._run_one_with_guard(
+            server,
+            page_sql,
+            dto.result_format,
+            cache_bypass=dto.cache_bypass,
+            cache_invalidate=dto.cache_invalidate,
+            params=page_params,
+        )
+
+        if dto.with_total:
+            count_sql, count_params = self.pagination_service.build_count_sql(
+                dto, server.type
+            )
+            count_call = self._run_one_with_guard(
+                server,
+                count_sql,
+                "compact",
+                cache_bypass=dto.cache_bypass,
+                cache_invalidate=dto.cache_invalidate,
+                params=count_params,
+            )
+            result, count_result = await asyncio.gather(page_call, count_call)
+        else:
+            result, count_result = await page_call, None
+
+        page = PageQueryResult(**result.model_dump(), page=dto.page, limit=dto.limit)
+        if result.status != "success":
+            return page
+
+        if dto.result_format == "columnar":
+            rows_count = len(page.data[0]) if page.data else 0
+        else:
+            rows_count = len(page.data)
+
+        if rows_count > dto.limit:
+            page.has_more = True
+            if dto.result_format == "columnar":
+                page.data = [column[: dto.limit] for column in page.data]
+            else:
+                page.data = page.data[: dto.limit]
+
+        if count_result is not None and count_result.status == "success":
+            page.total = int(count_result.data[0][0])
+        elif count_result is not None:
+            page.message = (
+                f"Не удалось посчитать количество строк: {count_result.message}"
+            )
+        return page
+
+    async def stream_query(self, dto: StreamQueryDTO) -> AsyncIterator[str]:
+        server = self.server_registry.get(dto.selected_server.id)
+        if server is None:
+            raise LookupError("Сервер не найден в конфиге")
+
+        max_rows = self.stream_max_rows
+        if dto.max_rows is not None:
+            max_rows = min(dto.max_rows, max_rows)
+
+        lines = self._stream_lines(server, dto.query, max_rows, dto.chunk_size)
+        # Слот берёт сам генератор. Доводим его до получения слота ещё до ответа,
+        # чтобы успеть вернуть 429/503; дальше генератор закрывает ответ
+        await anext(lines)
+        return lines
+
+    async def open_row_stream(
+        self,
+        server_id: int,
+        query: str,
+        chunk_size: int,
+        max_rows: Union[int, None] = None,
+    ) -> AsyncIterator[List[dict]]:
+        server = self.server_registry.get(server_id)
+        if server is None:
+            raise LookupError("Сервер не найден в конфиге")
+
+        # Слот генератор возьмёт при первом чтении, незапущенный генератор
+        # ничего не держит
+        return self._stream_rows(server, query, chunk_size, max_rows)
+
+    async def run_batch(self, dto: BatchQueryDTO) -> BatchQueryResult:
+        start_time = time.perf_counter()
+        results: List[QueryResult] = []
+
+        if dto.servers == "all":
+            servers = list(self.server_registry.servers)
+        else:
+            servers = []
+            for server_id in dto.servers:
+                server = self.server_registry.get(server_id)
+                if server is None:
+                    results.append(
+                        self._failed(f"id={server_id}", "Сервер не найден в конфиге")
+                    )
+                else:
+                    servers.append(server)
+
+        if dto.server_type is not None:
+            servers = [s for s in servers if s.type == dto.server_type]
+
+        tasks: Dict[asyncio.Task, DatabaseServer] = {
+            asyncio.create_task(
+                self._run_one_in_batch(server, dto.query, dto.result_format)
+            ): server
+            for server in servers
+        }
+        finished: Dict[asyncio.Task, QueryResult] = {}
+        pending = set(tasks)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + dto.deadline_sec if dto.deadline_sec else None
+        succeeded = 0
+
+        while pending:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                finished[task] = task.result()
+                if finished[task].status == "success":
+                    succeeded += 1
+
+            if not done:
+                logger.warning(f"Дедлайн {dto.deadline_sec}s пакетного запроса истёк")
+                break
+            if dto.first_n is not None and succeeded >= dto.first_n:
+                break
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for task, server in tasks.items():
+            if task in finished:
+                results.append(finished[task])
+            else:
+                results.append(
+                    QueryResult(
+                        server=server.name,
+                        status="cancelled",
+                        message="Запрос отменён: результат больше не нужен",
+                    )
+                )
+
+        load_time = time.perf_counter() - start_time
+        return BatchQueryResult(
+            results=results,
+            succeeded=succeeded,
+            failed=sum(1 for r in results if r.status == "error"),
+            cancelled=sum(1 for r in results if r.status == "cancelled"),
+            time=f"{round(load_time, 3)}",
+        )
+
+    async def _run_one_in_batch(
+        self, server: DatabaseServer, query: str, result_format: str = "rows"
+    ) -> QueryResult:
+        try:
+            return await self._run_one_with_guard(server, query, result_format)
+        except (QueueFullError, QueueTimeoutError) as e:
+            return self._failed(server.name, str(e))
+
     async def _run_one_with_guard(
-        self, sem: asyncio.Semaphore, server: DatabaseServer, query: str
+        self,
+        server: DatabaseServer,
+        query: str,
+        result_format: str = "rows",
+        cache_bypass: bool = False,
+        cache_invalidate: bool = False,
+        params: Union[List[Any], None] = None,
     ) -> QueryResult:
-        async with sem:
+        start_time = time.perf_counter()
+        normalized = self.cache_service.normalize(query)
+        cacheable = not cache_bypass and self.cache_service.is_cacheable(normalized)
+        cache_key = normalized if not params else f"{normalized}\x00{params!r}"
+
+        if cacheable and cache_invalidate:
+            self.cache_service.invalidate(server.id, cache_key)
+        elif cacheable:
+            cached = self.cache_service.get(server.id, cache_key)
+            if cached is not None:
+                fetched, age = cached
+                data = self._serialize(server, fetched, result_format)
+                load_time = time.perf_counter() - start_time
+                return QueryResult(
+                    server=server.name,
+                    status="success",
+                    message="Результат взят из кэша",
+                    data=data,
+                    time=f"{round(load_time, 3)}",
+                    columns=fetched.columns,
+                    format=result_format,
+                    cache="hit",
+                    cache_age=round(age, 3),
+                )
+
+        async with self.admission_service.slot(server):
             try:
-                start_time = time.time()
+                start_time = time.perf_counter()
 
-                data = await asyncio.wait_for(
-                    self._execute(server, query), timeout=self.timeout_sec
+                fetched = await asyncio.wait_for(
+                    self._execute(server, query, params), timeout=self.timeout_sec
                 )
 
-                load_time = time.time() - start_time
+                if cacheable:
+                    self.cache_service.put(server.id, cache_key, fetched)
+
+                data = self._serialize(server, fetched, result_format)
+                load_time = time.perf_counter() - start_time
                 return QueryResult(
                     server=server.name,
                     status="success",
                     message="Запрос успешно выполнен",
                     data=data,
                     time=f"{round(load_time, 3)}",
+                    columns=fetched.columns,
+                    format=result_format,
+                    cache="miss" if cacheable else "bypass",
                 )
 
             except asyncio.TimeoutError:
@@ -63,63 +316,304 @@ class QueryService:
             except Exception as e:
                 return self._failed(server.name, str(e))
 
+    def _serialize(
+        self, server: DatabaseServer, fetched: FetchResult, result_format: str
+    ) -> list:
+        with self.metrics_service.span("query", "serialize", server):
+            return self._format_rows(fetched, result_format)
+
+    def _format_rows(self, fetched: FetchResult, result_format: str) -> list:
+        if result_format == "compact":
+            return [list(row) for row in fetched.rows]
+        elif result_format == "columnar":
+            if not fetched.rows:
+                return [[] for _ in fetched.columns]
+            return [list(column) for column in zip(*fetched.rows)]
+        else:
+            names = [column.name for column in fetched.columns]
+            return [dict(zip(names, row)) for row in fetched.rows]
+
     def _failed(self, server_name: str, message: str) -> QueryResult:
         logger.error(f"Сервер '{server_name}' вернул ошибку: {message}")
         return QueryResult(server=server_name, status="error", message=message)
 
-    async def _execute(self, server: DatabaseServer, query: str) -> list[dict]:
+    async def _execute(
+        self,
+        server: DatabaseServer,
+        query: str,
+        params: Union[List[Any], None] = None,
+    ) -> FetchResult:
         if server.type == "mysql":
-            return await self._mysql_exec(server, query)
+            return await self._mysql_exec(server, query, params)
         elif server.type == "postgresql":
-            return await self._pg_exec(server, query)
+            return await self._pg_exec(server, query, params)
         elif server.type == "oracle":
-            return await self._oracle_exec(server, query)
+            return await self._oracle_exec(server, query, params)
         else:
             raise ValueError(f"Неподдерживаемая СУБД: {server.type}")
 
-    async def _mysql_exec(self, server: DatabaseServer, query: str) -> list[dict]:
+    async def _stream_lines(
+        self,
+        server: DatabaseServer,
+        query: str,
+        max_rows: int,
+        chunk_size: int,
+    ) -> AsyncIterator[str]:
+        async with self.admission_service.slot(server):
+            # Пустая строка - знак, что слот получен, её забирает stream_query
+            yield ""
+            start_time = time.perf_counter()
+            sent = 0
+            truncated = False
+            try:
+                async with aclosing(self._stream(server, query, chunk_size)) as batches:
+                    async for rows in batches:
+                        if sent + len(rows) > max_rows:
+                            rows = rows[: max_rows - sent]
+                            truncated = True
+                        sent += len(rows)
+                        if rows:
+                            with self.metrics_service.span(
+                                "query", "serialize", server
+                            ):
+                                line = self._ndjson_line({"type": "rows", "data": rows})
+                            yield line
+                        if truncated:
+                            break
+
+                load_time = time.perf_counter() - start_time
+                message = (
+                    f"Результат обрезан до {max_rows} строк"
+                    if truncated
+                    else "Запрос успешно выполнен"
+                )
+                yield self._ndjson_line(
+                    {
+                        "type": "end",
+                        "server": server.name,
+                        "status": "success",
+                        "message": message,
+                        "rows": sent,
+                        "truncated": truncated,
+                        "time": f"{round(load_time, 3)}",
+                    }
+                )
+
+            except asyncio.TimeoutError:
+                msg = f"Таймаут {self.timeout_sec}s"
+                self._failed(server.name, msg)
+                yield self._ndjson_line(
+                    {
+                        "type": "error",
+                        "server": server.name,
+                        "status": "error",
+                        "message": msg,
+                        "rows": sent,
+                    }
+                )
+
+            except Exception as e:
+                self._failed(server.name, str(e))
+                yield self._ndjson_line(
+                    {
+                        "type": "error",
+                        "server": server.name,
+                        "status": "error",
+                        "message": str(e),
+                        "rows": sent,
+                    }
+                )
+
+    async def _stream_rows(
+        self,
+        server: DatabaseServer,
+        query: str,
+        chunk_size: int,
+        max_rows: Union[int, None],
+    ) -> AsyncIterator[List[dict]]:
+        async with self.admission_service.slot(server):
+            start_time = time.perf_counter()
+            sent = 0
+            async with aclosing(self._stream(server, query, chunk_size)) as batches:
+                async for rows in batches:
+                    if max_rows is not None and sent + len(rows) > max_rows:
+                        rows = rows[: max_rows - sent]
+                    sent += len(rows)
+                    if rows:
+                        yield rows
+                    if max_rows is not None and sent >= max_rows:
+                        break
+            logger.info(
+                f"С '{server.name}' прочитано {sent} строк за {round(time.perf_counter() - start_time, 3)} с"
+            )
+
+    @asynccontextmanager
+    async def _acquire(self, server: DatabaseServer):
+        started = time.perf_counter()
+        async with self.pool_service.acquire(server) as conn:
+            self.metrics_service.observe(
+                "query", "connect", time.perf_counter() - started, server
+            )
+            yield conn
+
+    def _ndjson_line(self, payload: dict) -> str:
+        return json.dumps(payload, ensure_ascii=False, default=json_default) + "\n"
+
+    def _stream(
+        self, server: DatabaseServer, query: str, chunk_size: int
+    ) -> AsyncIterator[List[dict]]:
+        if server.type == "mysql":
+            return self._mysql_stream(server, query, chunk_size)
+        elif server.type == "postgresql":
+            return self._pg_stream(server, query, chunk_size)
+        elif server.type == "oracle":
+            return self._oracle_stream(server, query, chunk_size)
+        else:
+            raise ValueError(f"Неподдерживаемая СУБД: {server.type}")
+
+    async def _mysql_stream(
+        self, server: DatabaseServer, query: str, chunk_size: int
+    ) -> AsyncIterator[List[dict]]:
+        logger.info(f"Отправили на '{server.name}' потоковый mysql запрос")
+        async with self._acquire(server) as conn:
+            cursor = await conn.cursor(aiomysql.SSDictCursor)
+            finished = False
+            try:
+                with self.metrics_service.span("query", "execute", server):
+                    await asyncio.wait_for(
+                        cursor.execute(query), timeout=self.timeout_sec
+                    )
+                while True:
+                    with self.metrics_service.span("query", "fetch", server):
+                        rows = await asyncio.wait_for(
+                            cursor.fetchmany(chunk_size), timeout=self.timeout_sec
+                        )
+                    if not rows:
+                        break
+                    yield rows
+                finished = True
+            finally:
+                if finished:
+                    await cursor.close()
+                else:
+                    # Дочитывать небуферизованный результат дороже, чем переоткрыть соединение
+                    conn.close()
+
+    async def _pg_stream(
+        self, server: DatabaseServer, query: str, chunk_size: int
+    ) -> AsyncIterator[List[dict]]:
+        logger.info(f"Отправили на '{server.name}' потоковый postgre запрос")
+        async with self._acquire(server) as conn:
+            # Серверный курсор в asyncpg живёт только внутри транзакции
+            async with conn.transaction():
+                with self.metrics_service.span("query", "execute", server):
+                    cursor = await asyncio.wait_for(
+                        conn.cursor(query), timeout=self.timeout_sec
+                    )
+                while True:
+                    with self.metrics_service.span("query", "fetch", server):
+                        rows = await asyncio.wait_for(
+                            cursor.fetch(chunk_size), timeout=self.timeout_sec
+                        )
+                    if not rows:
+                        break
+                    yield [dict(r) for r in rows]
+
+    async def _oracle_stream(
+        self, server: DatabaseServer, query: str, chunk_size: int
+    ) -> AsyncIterator[List[dict]]:
+        logger.info(f"Отправили на '{server.name}' потоковый oracle запрос")
+        async with self._acquire(server) as connection:
+            async with connection.cursor() as cursor:
+                cursor.arraysize = chunk_size
+                with self.metrics_service.span("query", "execute", server):
+                    await asyncio.wait_for(
+                        cursor.execute(query), timeout=self.timeout_sec
+                    )
+                if cursor.description is None:
+                    return
+
+                columns = [col[0] for col in cursor.description]
+                while True:
+                    with self.metrics_service.span("query", "fetch", server):
+                        rows = await asyncio.wait_for(
+                            cursor.fetchmany(chunk_size), timeout=self.timeout_sec
+                        )
+                    if not rows:
+                        break
+                    yield [dict(zip(columns, row)) for row in rows]
+
+    async def _mysql_exec(
+        self,
+        server: DatabaseServer,
+        query: str,
+        params: Union[List[Any], None] = None,
+    ) -> FetchResult:
         logger.info(f"Отправили на '{server.name}' mysql запрос")
-        conn = await aiomysql.connect(
-            host=server.host,
-            port=server.port,
-            user=server.username,
-            password=server.password,
-            db=server.database,
-            autocommit=True,
-        )
-        try:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                await cursor.execute(query)
-                rows = await cursor.fetchall()
-                return rows or []
-        finally:
-            conn.close()
-
-    async def _pg_exec(self, server: DatabaseServer, query: str) -> list[dict]:
+        async with self._acquire(server) as conn:
+            async with conn.cursor() as cursor:
+                with self.metrics_service.span("query", "execute", server):
+                    await cursor.execute(query, params)
+                if cursor.description is None:
+                    return FetchResult(columns=[], rows=[])
+
+                columns = [
+                    ColumnInfo(name=col[0], type=MYSQL_TYPE_NAMES.get(col[1]))
+                    for col in cursor.description
+                ]
+                with self.metrics_service.span("query", "fetch", server):
+                    rows = await cursor.fetchall()
+                return FetchResult(columns=columns, rows=list(rows or []))
+
+    async def _pg_exec(
+        self,
+        server: DatabaseServer,
+        query: str,
+        params: Union[List[Any], None] = None,
+    ) -> FetchResult:
         logger.info(f"Отправили на '{server.name}' postgre запрос")
-        conn_str = f"postgresql://{server.username}:{server.password}@{server.host}:{server.port}/{server.database}"
-        conn = await asyncpg.connect(conn_str)
-        try:
-            rows = await conn.fetch(query)
-            return [dict(r) for r in rows] if rows else []
-        finally:
-            await conn.close()
+        async with self._acquire(server) as conn:
+            with self.metrics_service.span("query", "execute", server):
+                stmt = await conn.prepare(query)
+            columns = [
+                ColumnInfo(name=attr.name, type=attr.type.name)
+                for attr in stmt.get_attributes()
+            ]
+            if params:
+                params = self.pagination_service.coerce_pg_params(
+                    params, [param.name for param in stmt.get_parameters()]
+                )
+            # asyncpg выполняет подготовленный запрос и читает строки одним вызовом
+            with self.metrics_service.span("query", "fetch", server):
+                rows = await stmt.fetch(*(params or []))
+            return FetchResult(columns=columns, rows=[tuple(r) for r in rows])
 
-    async def _oracle_exec(self, server: DatabaseServer, query: str) -> list[dict]:
+    async def _oracle_exec(
+        self,
+        server: DatabaseServer,
+        query: str,
+        params: Union[List[Any], None] = None,
+    ) -> FetchResult:
         logger.info(f"Отправили на '{server.name}' oracle запрос")
-        dsn = f"{server.host}:{server.port}/{server.database}"
+        async with self._acquire(server) as connection:
+            async with connection.cursor() as cursor:
+                with self.metrics_service.span("query", "execute", server):
+                    await cursor.execute(query, params)
+                if cursor.description is None:
+                    return FetchResult(columns=[], rows=[])
 
-        async with oracledb.connect_async(
-            user=server.username, password=server.password, dsn=dsn
-        ) as connection:
-            try:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(query)
+                columns = [
+                    ColumnInfo(name=col[0], type=col[1].name.removeprefix("DB_TYPE_"))
+                    for col in cursor.description
+                ]
+                with self.metrics_service.span("query", "fetch", server):
                     rows = await cursor.fetchall()
+                return FetchResult(columns=columns, rows=rows)
 
-                    if rows:
-                        columns = [col[0] for col in cursor.description]
-                        return [dict(zip(columns, row)) for row in rows]
-                    return []
-            finally:
-                await connection.close()
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    return str(value)
@@ -0,0 +1,666 @@
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+import asyncio
+import io
+import os
+import posixpath
+import random
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ElementTree
+import ijson
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import UploadFile
+from models.dto.file_sample import FileSample
+from models.dto.spooled_file import SpooledFile
+from services.logger_service import logger
+
+try:
+    from python_calamine import CalamineWorkbook, SheetTypeEnum
+except ImportError:
+    # Движок необязательный, без него xlsx читает openpyxl
+    CalamineWorkbook = None
+    SheetTypeEnum = None
+
+EXCEL_ENGINES = ("auto", "calamine", "openpyxl")
+# Сколько байт начала файла читаем, чтобы оценить число строк
+ESTIMATE_PROBE_BYTES = 64 * 1024
+# Размер листа, который Excel пишет в начало xml листа
+_EXCEL_DIMENSION = re.compile(rb'<dimension ref="[A-Z]+\d+(?::[A-Z]+(\d+))?"')
+
+T = TypeVar("T")
+
+
+class ReaderService:
+    def __init__(
+        self,
+        chunk_size: int = 50000,
+        spool_block_bytes: int = 1024 * 1024,
+        excel_engine: str = "auto",
+        sample_probes: int = 32,
+    ):
+        if excel_engine not in EXCEL_ENGINES:
+            raise ValueError(f"Неизвестный движок Excel: {excel_engine}")
+        self.chunk_size = chunk_size
+        self.spool_block_bytes = spool_block_bytes
+        self.excel_engine = excel_engine
+        self.sample_probes = sample_probes
+
+    def detect_file_type(self, filename: str) -> str:
+        _, ext = os.path.splitext(filename.lower())
+        if ext in [".xlsx", ".xls"]:
+            return "excel"
+        elif ext == ".csv":
+            return "csv"
+        elif ext == ".json":
+            return "json"
+        elif ext == ".parquet":
+            return "parquet"
+        elif ext in [".arrow", ".feather", ".ipc"]:
+            return "feather"
+        else:
+            raise ValueError(f"Неподдерживаемое расширение файла: {ext}")
+
+    async def spool(self, upload_file: UploadFile) -> SpooledFile:
+        filename = upload_file.filename
+        if filename is None:
+            raise ValueError("Неподдерживаемое имя файла")
+
+        _, ext = os.path.splitext(filename.lower())
+        fd, path = tempfile.mkstemp(prefix="import_", suffix=ext)
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as file:
+                while True:
+                    block = await upload_file.read(self.spool_block_bytes)
+                    if not block:
+                        break
+                    size += len(block)
+                    await asyncio.to_thread(file.write, block)
+        except BaseException:
+            self.cleanup(path)
+            raise
+        return SpooledFile(path=path, size=size)
+
+    def cleanup(self, path: Union[str, None]) -> None:
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Не удалось удалить временный файл {path}: {e}")
+
+    def iter_chunks(
+        self,
+        path: str,
+        file_type: str,
+        chunk_size: Union[int, None] = None,
+        on_progress: Union[Callable[[float], None], None] = None,
+        nrows: Union[int, None] = None,
+        dtype: Union[Dict[str, type], None] = None,
+    ) -> Iterator[pd.DataFrame]:
+        chunk_size = chunk_size or self.chunk_size
+        on_progress = on_progress or (lambda fraction: None)
+        if nrows is not None:
+            # Все парсеры потоковые: прочитав nrows строк, дальше файл не разбираем
+            chunk_size = min(chunk_size, max(nrows, 1))
+
+        if file_type == "csv":
+            chunks = self._csv_chunks(path, chunk_size, on_progress, dtype)
+        elif file_type == "excel":
+            chunks = self._excel_chunks(
+                path, chunk_size, on_progress, nrows is not None
+            )
+        elif file_type == "json":
+            chunks = self._json_chunks(path, chunk_size, on_progress)
+        elif file_type == "parquet":
+            chunks = self._parquet_chunks(path, chunk_size, on_progress)
+        elif file_type == "feather":
+            chunks = self._feather_chunks(path, chunk_size, on_progress)
+        else:
+            raise ValueError(f"Неподдерживаемый тип файла: {file_type}")
+        return chunks if nrows is None else self._head(chunks, nrows)
+
+    def sample(
+        self,
+        path: str,
+        file_type: str,
+        head_rows: int,
+        sample_rows: int = 0,
+        seed: Union[int, None] = None,
+    ) -> FileSample:
+        # Время не зависит от размера файла: читаем первые head_rows строк,
+        # а выборку набираем из sample_probes случайных мест файла
+        chunks = self.iter_chunks(path, file_type, nrows=head_rows)
+        try:
+            head = next(chunks, None)
+        finally:
+            chunks.close()
+        if head is None:
+            head = pd.DataFrame()
+
+        rng = random.Random(seed)
+        size = os.path.getsize(path)
+        empty = head.iloc[:0]
+        if file_type == "csv":
+            estimated_rows, exact = self._csv_estimate(path, size, len(head))
+            sample = empty
+            if sample_rows and not exact:
+                sample, density = self._csv_sample(path, size, sample_rows, rng, head)
+                if density:
+                    # Строки из разных мест файла точнее первых строк
+                    estimated_rows = round(size * density)
+        elif file_type == "parquet":
+            estimated_rows, exact, sample = self._parquet_sample(path, sample_rows, rng)
+        elif file_type == "feather":
+            estimated_rows, exact, sample = self._feather_sample(path, sample_rows, rng)
+        elif file_type == "excel":
+            estimated_rows, exact = self._excel_estimate(path)
+            # Сжатый xml не прочитать с середины, типы определяем по первым строкам
+            sample = empty
+        else:
+            estimated_rows, exact = self._json_estimate(path, size)
+            sample = empty
+        if len(head) < head_rows:
+            # Файл уместился целиком
+            estimated_rows, exact = len(head), True
+        return FileSample(head, sample, estimated_rows, exact)
+
+    def arrow_schema(self, path: str, file_type: str) -> Union[pa.Schema, None]:
+        # Типы колонок parquet/feather хранятся в самом файле
+        if file_type == "parquet":
+            return pq.read_schema(path)
+        elif file_type == "feather":
+            with pa.memory_map(path) as source:
+                return pa.ipc.open_file(source).schema
+        return None
+
+    def conform(
+        self, chunk: pd.DataFrame, sample: pd.DataFrame, kinds: List[str]
+    ) -> pd.DataFrame:
+        # Каждый чанк pandas типизирует заново, приводим его к типам колонок
+        # таблицы. Тип берём не из dtype выборки: пустая в выборке колонка
+        # читается как float, а в таблице она строковая
+        chunk.columns = sample.columns
+        for i, kind in enumerate(kinds):
+            column = chunk.iloc[:, i]
+            try:
+                if kind in ("string", "empty"):
+                    # В строковую колонку драйверу нужно отдавать строки
+                    if pd.api.types.infer_dtype(column, skipna=True) not in (
+                        "string",
+                        "empty",
+                    ):
+                        chunk.isetitem(
+                            i, column.where(column.isna(), column.astype(str))
+                        )
+                elif kind == "integer":
+                    if not pd.api.types.is_integer_dtype(column.dtype):
+                        chunk.isetitem(i, pd.to_numeric(column).astype("Int64"))
+                elif kind == "float":
+                    if not pd.api.types.is_float_dtype(column.dtype):
+                        chunk.isetitem(i, pd.to_numeric(column).astype("float64"))
+                elif kind == "datetime":
+                    if not pd.api.types.is_datetime64_any_dtype(column.dtype):
+                        chunk.isetitem(i, pd.to_datetime(column))
+            except (ValueError, TypeError) as e:
+                raise ValueError(
+                    f"Значения колонки '{sample.columns[i]}' не подходят под тип "
+                    f"{kind}, определённый по началу файла: {e}"
+                )
+        return chunk
+
+    def _csv_chunks(
+        self,
+        path: str,
+        chunk_size: int,
+        on_progress: Callable[[float], None],
+        dtype: Union[Dict[str, type], None] = None,
+    ) -> Iterator[pd.DataFrame]:
+        size = os.path.getsize(path) or 1
+        with open(path, "rb") as file:
+            with pd.read_csv(
+                file, encoding="utf-8", chunksize=chunk_size, dtype=dtype
+            ) as reader:
+                for chunk in reader:
+                    # pandas читает файл блоками, позиция в файле - оценка прогресса
+                    on_progress(file.tell() / size)
+                    yield chunk
+
+    def _excel_chunks(
+        self,
+        path: str,
+        chunk_size: int,
+        on_progress: Callable[[float], None],
+        limited: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        if self._excel_engine(path, limited) == "calamine":
+            try:
+                workbook = CalamineWorkbook.from_path(path)
+            except Exception as e:
+                logger.warning(f"calamine не открыл файл, читаем через openpyxl: {e}")
+            else:
+                yield from self._calamine_chunks(workbook, chunk_size, on_progress)
+                return
+
+        if path.endswith(".xls"):
+            # Старый формат openpyxl не читает, парсим целиком
+            df = pd.read_excel(path)
+            for start in range(0, max(len(df), 1), chunk_size):
+                on_progress(min(start + chunk_size, len(df)) / max(len(df), 1))
+                yield df.iloc[start : start + chunk_size]
+            return
+
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            # Как pd.read_excel - первый рабочий лист, а не активный
+            sheet = workbook.worksheets[0]
+            # Размер листа берётся из метаданных и может отсутствовать
+            yield from self._sheet_chunks(
+                sheet.iter_rows(values_only=True),
+                sheet.max_row or 0,
+                chunk_size,
+                on_progress,
+                lambda records, columns: pd.DataFrame.from_records(
+                    records, columns=columns
+                ),
+            )
+        finally:
+            workbook.close()
+
+    def _calamine_chunks(
+        self, workbook, chunk_size: int, on_progress: Callable[[float], None]
+    ) -> Iterator[pd.DataFrame]:
+        try:
+            # Первый рабочий лист, как worksheets[0] у openpyxl: листы
+            # диаграмм openpyxl в worksheets не включает
+            name = next(
+                (
+                    meta.name
+                    for meta in workbook.sheets_metadata
+                    if meta.typ == SheetTypeEnum.WorkSheet
+                ),
+                None,
+            )
+            if name is None:
+                raise ValueError("В книге нет рабочих листов")
+            sheet = workbook.get_sheet_by_name(name)
+            rows = (
+                [None if value == "" else value for value in row] if i == 0 else row
+                for i, row in enumerate(sheet.iter_rows())
+            )
+            yield from self._sheet_chunks(
+                rows, sheet.height, chunk_size, on_progress, self._calamine_frame
+            )
+        finally:
+            workbook.close()
+
+    def _sheet_chunks(
+        self,
+        rows: Iterator[Sequence],
+        total_rows: int,
+        chunk_size: int,
+        on_progress: Callable[[float], None],
+        to_frame: Callable[[List[Sequence], List[str]], pd.DataFrame],
+    ) -> Iterator[pd.DataFrame]:
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = self._header(tuple(header))
+
+        chunk: List[Sequence] = []
+        yielded = False
+        read_rows = 1
+        for row in rows:
+            chunk.append(row[: len(columns)])
+            read_rows += 1
+            if len(chunk) >= chunk_size:
+                if total_rows:
+                    on_progress(read_rows / total_rows)
+                yield to_frame(chunk, columns)
+                yielded = True
+                chunk = []
+        if chunk or not yielded:
+            yield to_frame(chunk, columns)
+
+    def _calamine_frame(
+        self, records: List[Sequence], columns: List[str]
+    ) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(records, columns=columns)
+        # calamine отдаёт пустые ячейки как "", целые числа как float, а даты без
+        # времени как date. Приводим к тому, что возвращает openpyxl
+        for i, dtype in enumerate(df.dtypes):
+            column = df.iloc[:, i]
+            if pd.api.types.is_object_dtype(dtype):
+                column = column.where(column != "", None)
+                if pd.api.types.infer_dtype(column, skipna=True) in (
+                    "date",
+                    "datetime",
+                ):
+                    column = pd.to_datetime(column)
+                df.isetitem(i, column)
+        df = df.infer_objects()
+        for i, dtype in enumerate(df.dtypes):
+            column = df.iloc[:, i]
+            if (
+                pd.api.types.is_float_dtype(dtype)
+                and column.notna().all()
+                and (column % 1 == 0).all()
+            ):
+                df.isetitem(i, column.astype("int64"))
+        return df
+
+    def _excel_engine(self, path: str, limited: bool) -> str:
+        if CalamineWorkbook is None or self.excel_engine == "openpyxl":
+            return "openpyxl"
+        if self.excel_engine == "calamine" or path.endswith(".xls"):
+            return "calamine"
+        # calamine разбирает лист целиком, а openpyxl в read_only читает построчно,
+        # поэтому первые строки для предпросмотра быстрее отдаёт openpyxl
+        return "openpyxl" if limited else "calamine"
+
+    def _head(
+        self, chunks: Iterator[pd.DataFrame], nrows: int
+    ) -> Iterator[pd.DataFrame]:
+        try:
+            read_rows = 0
+            for chunk in chunks:
+                yield chunk.iloc[: nrows - read_rows]
+                read_rows += len(chunk)
+                if read_rows >= nrows:
+                    return
+        finally:
+            chunks.close()
+
+    def _json_chunks(
+        self, path: str, chunk_size: int, on_progress: Callable[[float], None]
+    ) -> Iterator[pd.DataFrame]:
+        size = os.path.getsize(path) or 1
+        with open(path, "rb") as file:
+            head = file.read(1024).lstrip(b"\xef\xbb\xbf \t\r\n")
+            file.seek(0)
+
+            if not head.startswith(b"["):
+                # Не массив записей - такой JSON потоково не разобрать
+                yield pd.read_json(file, encoding="utf-8")
+                return
+
+            chunk: List[dict] = []
+            # Набор колонок фиксируем по первому чанку, у записей он может отличаться
+            columns = None
+            for item in ijson.items(file, "item", use_float=True):
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    on_progress(file.tell() / size)
+                    df = pd.DataFrame.from_records(chunk, columns=columns)
+                    columns = list(df.columns)
+                    yield df
+                    chunk = []
+            if chunk or columns is None:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+
+    def _parquet_chunks(
+        self, path: str, chunk_size: int, on_progress: Callable[[float], None]
+    ) -> Iterator[pd.DataFrame]:
+        parquet_file = pq.ParquetFile(path)
+        try:
+            total_rows = parquet_file.metadata.num_rows or 1
+            read_rows = 0
+            yielded = False
+            for batch in parquet_file.iter_batches(batch_size=chunk_size):
+                read_rows += batch.num_rows
+                on_progress(read_rows / total_rows)
+                yield self._to_pandas(batch)
+                yielded = True
+            if not yielded:
+                yield self._to_pandas(parquet_file.schema_arrow.empty_table())
+        finally:
+            parquet_file.close()
+
+    def _feather_chunks(
+        self, path: str, chunk_size: int, on_progress: Callable[[float], None]
+    ) -> Iterator[pd.DataFrame]:
+        # memory_map: батчи читаются с диска по мере обхода, файл целиком в память не грузится
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            total_rows = reader.count_rows() or 1
+
+            pending: List[pa.RecordBatch] = []
+            pending_rows = 0
+            read_rows = 0
+            yielded = False
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                # Батчи файла могут быть любого размера, пересобираем их по chunk_size
+                offset = 0
+                while offset < batch.num_rows:
+                    part = batch.slice(offset, chunk_size - pending_rows)
+                    offset += part.num_rows
+                    pending.append(part)
+                    pending_rows += part.num_rows
+                    read_rows += part.num_rows
+                    if pending_rows >= chunk_size:
+                        on_progress(read_rows / total_rows)
+                        yield self._to_pandas(
+                            pa.Table.from_batches(pending, reader.schema)
+                        )
+                        yielded = True
+                        pending, pending_rows = [], 0
+            if pending or not yielded:
+                on_progress(1.0)
+                yield self._to_pandas(pa.Table.from_batches(pending, reader.schema))
+
+    def _csv_estimate(
+        self, path: str, size: int, head_rows: int
+    ) -> Tuple[Union[int, None], bool]:
+        with open(path, "rb") as file:
+            header = len(file.readline())
+            head_bytes = sum(len(file.readline()) for _ in range(head_rows))
+            if file.tell() >= size:
+                return head_rows, True
+        if not head_bytes:
+            return None, False
+        return round((size - header) * head_rows / head_bytes), False
+
+    def _csv_sample(
+        self,
+        path: str,
+        size: int,
+        sample_rows: int,
+        rng: random.Random,
+        head: pd.DataFrame,
+    ) -> Tuple[pd.DataFrame, Union[float, None]]:
+        # Вместе с выборкой возвращает оценку числа строк на байт файла
+        per_probe = max(1, 2 * sample_rows // self.sample_probes)
+        # Строк на байт в каждой пробе. Пробы равномерны по байтам, поэтому
+        # среднее по ним не смещено в сторону участков с длинными строками
+        densities: List[float] = []
+        with open(path, "rb") as file:
+            header = file.readline()
+            start = file.tell()
+
+            def probe_lines() -> Iterator[bytes]:
+                for _ in range(self.sample_probes):
+                    file.seek(rng.randrange(start, size))
+                    # Попали в середину строки, её пропускаем
+                    file.readline()
+                    probe_start = file.tell()
+                    count = 0
+                    for _ in range(per_probe):
+                        line = file.readline()
+                        if not line:
+                            break
+                        count += 1
+                        yield line if line.endswith(b"\n") else line + b"\n"
+                    if count:
+                        densities.append(count / (file.tell() - probe_start))
+
+            lines = self._reservoir(probe_lines(), sample_rows, rng)
+        if not lines:
+            return head.iloc[:0], None
+        density = sum(densities) / len(densities)
+        try:
+            # Строка с переводом строки внутри кавычек может разорваться,
+            # такие обрывки отбрасываем
+            sample = pd.read_csv(
+                io.BytesIO(header + b"".join(lines)),
+                encoding="utf-8",
+                names=head.columns,
+                header=0,
+                on_bad_lines="skip",
+            )
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            logger.warning(f"Не удалось разобрать выборку из CSV: {e}")
+            sample = head.iloc[:0]
+        return sample, density
+
+    def _parquet_sample(
+        self, path: str, sample_rows: int, rng: random.Random
+    ) -> Tuple[int, bool, pd.DataFrame]:
+        parquet_file = pq.ParquetFile(path)
+        try:
+            metadata = parquet_file.metadata
+            batches = []
+            if sample_rows:
+                # Читаем начало нескольких случайных row group, а не файл целиком
+                per_probe = max(1, 2 * sample_rows // self.sample_probes)
+                groups = rng.sample(
+                    range(metadata.num_row_groups),
+                    min(self.sample_probes, metadata.num_row_groups),
+                )
+                for group in groups:
+                    batch = next(
+                        parquet_file.iter_batches(
+                            batch_size=per_probe, row_groups=[group]
+                        ),
+                        None,
+                    )
+                    if batch is not None:
+                        batches.append(batch)
+            table = pa.Table.from_batches(batches, parquet_file.schema_arrow)
+            return metadata.num_rows, True, self._take_sample(table, sample_rows, rng)
+        finally:
+            parquet_file.close()
+
+    def _feather_sample(
+        self, path: str, sample_rows: int, rng: random.Random
+    ) -> Tuple[int, bool, pd.DataFrame]:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            batches = []
+            if sample_rows:
+                # Батчи отображены в память, срез из середины файла ничего не копирует
+                per_probe = max(1, 2 * sample_rows // self.sample_probes)
+                for _ in range(min(self.sample_probes, reader.num_record_batches)):
+                    batch = reader.get_batch(rng.randrange(reader.num_record_batches))
+                    offset = rng.randrange(max(batch.num_rows - per_probe, 0) + 1)
+                    batches.append(batch.slice(offset, per_probe))
+            table = pa.Table.from_batches(batches, reader.schema)
+            return reader.count_rows(), True, self._take_sample(table, sample_rows, rng)
+
+    def _take_sample(
+        self, table: pa.Table, sample_rows: int, rng: random.Random
+    ) -> pd.DataFrame:
+        indices = sorted(self._reservoir(range(table.num_rows), sample_rows, rng))
+        return self._to_pandas(table.take(pa.array(indices, type=pa.int64())))
+
+    def _excel_estimate(self, path: str) -> Tuple[Union[int, None], bool]:
+        if path.endswith(".xls"):
+            return None, False
+        try:
+            with zipfile.ZipFile(path) as archive:
+                info = archive.getinfo(self._first_sheet_part(archive))
+                with archive.open(info) as sheet:
+                    block = sheet.read(ESTIMATE_PROBE_BYTES)
+        except (KeyError, StopIteration, ElementTree.ParseError, zipfile.BadZipFile):
+            return None, False
+
+        match = _EXCEL_DIMENSION.search(block)
+        if match and match.group(1):
+            return max(int(match.group(1)) - 1, 0), True
+        # Размера в файле нет: считаем строки в начале листа и масштабируем
+        # на полный размер распакованного xml
+        rows = block.count(b"</row>")
+        if len(block) >= info.file_size:
+            return max(rows - 1, 0), True
+        if not rows:
+            return None, False
+        return round(info.file_size * rows / len(block)) - 1, False
+
+    def _first_sheet_part(self, archive: zipfile.ZipFile) -> str:
+        # Имя части первого рабочего листа: порядок листов задаёт workbook.xml,
+        # путь к xml листа - связи книги. sheet1.xml не обязательно первый лист
+        rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+        worksheets = {
+            rel.get("Id"): rel.get("Target")
+            for rel in rels
+            if rel.get("Type", "").endswith("/worksheet")
+        }
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        target = next(
+            worksheets[rel_id]
+            for sheet in workbook.iter()
+            if sheet.tag.rsplit("}", 1)[-1] == "sheet"
+            for key, rel_id in sheet.attrib.items()
+            if key.rsplit("}", 1)[-1] == "id" and rel_id in worksheets
+        )
+        if target.startswith("/"):
+            return target[1:]
+        return posixpath.normpath(posixpath.join("xl", target))
+
+    def _json_estimate(self, path: str, size: int) -> Tuple[Union[int, None], bool]:
+        with open(path, "rb") as file:
+            block = file.read(ESTIMATE_PROBE_BYTES)
+        records = 0
+        try:
+            for _ in ijson.items(io.BytesIO(block), "item"):
+                records += 1
+        except ijson.JSONError:
+            # Блок обрывается посреди записи
+            pass
+        if len(block) >= size:
+            return records, True
+        if not records:
+            return None, False
+        return round(size * records / len(block)), False
+
+    def _reservoir(self, items: Iterable[T], k: int, rng: random.Random) -> List[T]:
+        # Равномерная выборка k элементов за один проход (алгоритм R)
+        reservoir: List[T] = []
+        for seen, item in enumerate(items):
+            if seen < k:
+                reservoir.append(item)
+            else:
+                j = rng.randrange(seen + 1)
+                if j < k:
+                    reservoir[j] = item
+        return reservoir
+
+    def _to_pandas(self, data: Union[pa.Table, pa.RecordBatch]) -> pd.DataFrame:
+        # date32 переводим в datetime64, драйверам нужны datetime, а не date
+        return data.to_pandas(date_as_object=False)
+
+    def _header(self, header: tuple) -> List[str]:
+        columns = list(header)
+        # Отрезаем пустые колонки справа, как это делает pandas
+        while columns and columns[-1] is None:
+            columns.pop()
+        return [
+            f"Unnamed: {i}" if col is None else str(col)
+            for i, col in enumerate(columns)
+        ]
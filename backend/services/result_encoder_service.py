@@ -0,0 +1,72 @@
+from typing import Union
+import msgpack
+import pyarrow as pa
+from models.dto.query_result import QueryResult
+from services.query_service import json_default
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+MSGPACK_MIME = "application/msgpack"
+
+
+class ResultEncoderService:
+    def negotiate(self, accept: Union[str, None]) -> Union[str, None]:
+        if not accept:
+            return None
+        accept = accept.lower()
+        if ARROW_MIME in accept:
+            return ARROW_MIME
+        if MSGPACK_MIME in accept or "application/x-msgpack" in accept:
+            return MSGPACK_MIME
+        return None
+
+    def encode(self, result: QueryResult, mime: str) -> bytes:
+        if mime == ARROW_MIME:
+            return self.to_arrow(result)
+        elif mime == MSGPACK_MIME:
+            return self.to_msgpack(result)
+        else:
+            raise ValueError(f"Неподдерживаемый формат ответа: {mime}")
+
+    def to_msgpack(self, result: QueryResult) -> bytes:
+        return msgpack.packb(
+            result.model_dump(), default=json_default, use_bin_type=True
+        )
+
+    def to_arrow(self, result: QueryResult) -> bytes:
+        if result.format != "columnar":
+            raise ValueError("Для Arrow нужен результат в формате columnar")
+
+        columns = result.columns or []
+        fields = []
+        arrays = []
+        for column, vector in zip(columns, result.data):
+            array = self._to_arrow_array(vector)
+            metadata = {"db_type": column.type} if column.type else None
+            fields.append(pa.field(column.name, array.type, metadata=metadata))
+            arrays.append(array)
+
+        schema = pa.schema(
+            fields,
+            metadata={
+                "server": result.server,
+                "status": result.status,
+                "message": result.message or "",
+                "time": result.time or "",
+            },
+        )
+        batch = pa.record_batch(arrays, schema=schema)
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    def _to_arrow_array(self, vector: list) -> pa.Array:
+        try:
+            return pa.array(vector)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Смешанные типы в колонке - отдаём строками
+            return pa.array(
+                [None if v is None else json_default(v) for v in vector],
+                type=pa.string(),
+            )
@@ -0,0 +1,116 @@
+from typing import List, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from models.dto.column_stats import ColumnStats
+
+
+class SchemaService:
+    def infer(self, df: pd.DataFrame) -> List[ColumnStats]:
+        # Все колонки за один проход: счётчики пустых и min/max считаются
+        # сразу по блоку колонок, а не по одной
+        rows = len(df)
+        null_counts = df.isna().sum().to_numpy()
+        kinds = [
+            "empty" if null_counts[i] == rows else self._kind(dtype)
+            for i, dtype in enumerate(df.dtypes)
+        ]
+
+        mins: dict = {}
+        maxs: dict = {}
+        numeric = [i for i, kind in enumerate(kinds) if kind in ("integer", "float")]
+        if numeric:
+            block = df.iloc[:, numeric]
+            mins = dict(zip(numeric, block.min().tolist()))
+            maxs = dict(zip(numeric, block.max().tolist()))
+
+        stats = []
+        for i, kind in enumerate(kinds):
+            stats.append(
+                ColumnStats(
+                    name=str(df.columns[i]),
+                    kind=kind,
+                    count=rows,
+                    null_count=int(null_counts[i]),
+                    min=self._number(mins.get(i), kind),
+                    max=self._number(maxs.get(i), kind),
+                    max_len=self._max_len(df.iloc[:, i]) if kind == "string" else None,
+                )
+            )
+        return stats
+
+    def merge(
+        self, left: List[ColumnStats], right: List[ColumnStats]
+    ) -> List[ColumnStats]:
+        # Статистика двух выборок складывается в более широкую схему
+        return [self._merge_column(a, b) for a, b in zip(left, right)]
+
+    def _kind(self, dtype) -> str:
+        if pd.api.types.is_bool_dtype(dtype):
+            return "bool"
+        elif pd.api.types.is_integer_dtype(dtype):
+            return "integer"
+        elif pd.api.types.is_float_dtype(dtype):
+            return "float"
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            return "datetime"
+        else:
+            return "string"
+
+    def _number(self, value, kind: str) -> Union[int, float, None]:
+        if value is None or pd.isna(value):
+            return None
+        return int(value) if kind == "integer" else float(value)
+
+    def _max_len(self, series: pd.Series) -> int:
+        # Длины строк считает pyarrow, без Python-цикла по значениям
+        try:
+            array = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = None
+        if array is not None and (
+            pa.types.is_string(array.type) or pa.types.is_large_string(array.type)
+        ):
+            value = pc.max(pc.utf8_length(array)).as_py()
+            return int(value or 0)
+
+        # Смешанные типы в колонке меряем по строковому представлению
+        lengths = series.dropna().astype(str).str.len()
+        return int(lengths.max()) if not lengths.empty else 0
+
+    def _merge_column(self, a: ColumnStats, b: ColumnStats) -> ColumnStats:
+        if a.kind == "empty":
+            kind = b.kind
+        elif b.kind == "empty" or a.kind == b.kind:
+            kind = a.kind
+        elif {a.kind, b.kind} == {"integer", "float"}:
+            kind = "float"
+        else:
+            kind = "string"
+
+        merged = ColumnStats(
+            name=a.name,
+            kind=kind,
+            count=a.count + b.count,
+            null_count=a.null_count + b.null_count,
+        )
+        if kind in ("integer", "float"):
+            merged.min = self._pick(min, a.min, b.min)
+            merged.max = self._pick(max, a.max, b.max)
+        elif kind == "string":
+            merged.max_len = max(self._text_len(a), self._text_len(b))
+        return merged
+
+    def _pick(self, fn, a, b):
+        values = [v for v in (a, b) if v is not None]
+        return fn(values) if values else None
+
+    def _text_len(self, stats: ColumnStats) -> int:
+        # Колонка стала строковой после слияния: длину числа берём по min/max
+        if stats.max_len is not None:
+            return stats.max_len
+        return (
+            max(len(str(stats.min)), len(str(stats.max)))
+            if stats.min is not None
+            else 0
+        )
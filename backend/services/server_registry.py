@@ -0,0 +1,126 @@
+from typing import Awaitable, Callable, Dict, List, Union
+import asyncio
+import json
+import os
+from models.server import DatabaseServer
+from services.logger_service import logger
+
+
+class ServerRegistry:
+    def __init__(self, json_path: str, reload_interval_sec: int = 5):
+        self.json_path = json_path
+        self.reload_interval_sec = reload_interval_sec
+        self._servers: List[DatabaseServer] = []
+        self._servers_by_id: Dict[int, DatabaseServer] = {}
+        self._mtime: Union[float, None] = None
+        self._watch_task: Union[asyncio.Task, None] = None
+        self._listeners: List[
+            Callable[[List[DatabaseServer], List[DatabaseServer]], Awaitable[None]]
+        ] = []
+
+    @property
+    def servers(self) -> List[DatabaseServer]:
+        return self._servers
+
+    def get(self, server_id: int) -> Union[DatabaseServer, None]:
+        return self._servers_by_id.get(server_id)
+
+    def on_reload(
+        self,
+        listener: Callable[
+            [List[DatabaseServer], List[DatabaseServer]], Awaitable[None]
+        ],
+    ) -> None:
+        self._listeners.append(listener)
+
+    def load(self) -> None:
+        mtime = os.path.getmtime(self.json_path)
+        servers = self._parse()
+        self._servers = servers
+        self._servers_by_id = {s.id: s for s in servers}
+        self._mtime = mtime
+
+    async def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.json_path)
+        except OSError as e:
+            logger.error(
+                f"Не удалось проверить файл конфигурации {self.json_path}: {e}"
+            )
+            return False
+
+        if mtime == self._mtime:
+            return False
+
+        old_servers = self._servers
+        try:
+            self.load()
+        except Exception as e:
+            # Оставляем последний рабочий конфиг
+            logger.error(f"Не удалось перечитать конфиг серверов: {e}")
+            self._mtime = mtime
+            return False
+
+        logger.info(f"Конфиг серверов перечитан: {len(self._servers)} серверов")
+        for listener in self._listeners:
+            await listener(old_servers, self._servers)
+        return True
+
+    async def start(self) -> None:
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch_loop())
+
+    async def close(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval_sec)
+            try:
+                await self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Ошибка при перечитывании конфига серверов: {e}")
+
+    def _parse(self) -> List[DatabaseServer]:
+        json_path = self.json_path
+        try:
+            with open(json_path, "r") as file:
+                servers_data = json.load(file)
+
+            db_servers = []
+            for server in servers_data:
+                db_servers.append(
+                    DatabaseServer(
+                        id=server["id"],
+                        name=server["name"],
+                        host=server["host"],
+                        port=server["port"],
+                        username=server["username"],
+                        password=server["password"],
+                        database=server["database"],
+                        type=server["type"],
+                    )
+                )
+
+            return db_servers
+
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Файл конфигурации не найден: {json_path}")
+
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Ошибка формата JSON в файле {json_path}: {e}")
+
+        except KeyError as e:
+            raise ValueError(f"Отсутствует обязательное поле в конфигурации: {e}")
+
+        except PermissionError:
+            raise PermissionError(f"Нет прав на чтение файла: {json_path}")
+
+        except Exception as e:
+            raise RuntimeError(f"Неперехваченная ошибка: {e}")
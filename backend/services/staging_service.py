@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import Union
+import asyncio
+import secrets
+import time
+from models.dto.file_schema import FileSchema
+from models.dto.spooled_file import SpooledFile
+from models.dto.staging_stats import StagingStats
+from models.staging_config import StagingConfig
+from services.logger_service import logger
+from services.reader_service import ReaderService
+
+
+class StagedUpload:
+    def __init__(
+        self,
+        token: str,
+        spooled: SpooledFile,
+        filename: str,
+        file_type: str,
+        schema: Union[FileSchema, None],
+    ):
+        self.token = token
+        self.spooled = spooled
+        self.filename = filename
+        self.file_type = file_type
+        self.schema = schema
+        self.users = 0
+        self.last_used = time.monotonic()
+
+
+class StagingService:
+    def __init__(
+        self, reader_service: ReaderService, config: Union[StagingConfig, None] = None
+    ):
+        self.reader_service = reader_service
+        self.config = config or StagingConfig()
+        self._uploads: "OrderedDict[str, StagedUpload]" = OrderedDict()
+        self._bytes = 0
+        self._staged = 0
+        self._evicted = 0
+        self._rejected = 0
+        self._task: Union[asyncio.Task, None] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for token in list(self._uploads):
+            self._remove(token)
+
+    def stage(
+        self,
+        spooled: SpooledFile,
+        filename: str,
+        file_type: str,
+        schema: Union[FileSchema, None] = None,
+    ) -> Union[str, None]:
+        self.sweep()
+        if not self._make_room(spooled.size):
+            self._rejected += 1
+            logger.warning(
+                f"Нет места в staging для файла {filename} ({spooled.size} байт)"
+            )
+            return None
+
+        token = secrets.token_urlsafe(16)
+        self._uploads[token] = StagedUpload(token, spooled, filename, file_type, schema)
+        self._bytes += spooled.size
+        self._staged += 1
+        return token
+
+    def checkout(self, token: str) -> StagedUpload:
+        self.sweep()
+        upload = self._uploads.get(token)
+        if upload is None:
+            raise LookupError(
+                "Загруженный файл не найден или устарел, загрузите его заново"
+            )
+        # Пока файл импортируется, его не выселяют
+        upload.users += 1
+        upload.last_used = time.monotonic()
+        self._uploads.move_to_end(token)
+        return upload
+
+    def release(self, token: str) -> None:
+        upload = self._uploads.get(token)
+        if upload is not None:
+            upload.users = max(upload.users - 1, 0)
+            upload.last_used = time.monotonic()
+
+    def sweep(self) -> None:
+        now = time.monotonic()
+        for token, upload in list(self._uploads.items()):
+            if upload.users == 0 and now - upload.last_used > self.config.ttl_sec:
+                self._remove(token)
+                self._evicted += 1
+
+    def stats(self) -> StagingStats:
+        return StagingStats(
+            uploads=len(self._uploads),
+            bytes=self._bytes,
+            max_bytes=self.config.max_bytes,
+            in_use=sum(1 for u in self._uploads.values() if u.users),
+            staged_total=self._staged,
+            evicted_total=self._evicted,
+            rejected_total=self._rejected,
+        )
+
+    def _make_room(self, size: int) -> bool:
+        if size > self.config.max_bytes:
+            return False
+        # Выселяем самые давно использованные файлы, которые сейчас не импортируются
+        for token, upload in list(self._uploads.items()):
+            if self._bytes + size <= self.config.max_bytes:
+                break
+            if upload.users == 0:
+                self._remove(token)
+                self._evicted += 1
+        return self._bytes + size <= self.config.max_bytes
+
+    def _remove(self, token: str) -> None:
+        upload = self._uploads.pop(token, None)
+        if upload is not None:
+            self._bytes -= upload.spooled.size
+            self.reader_service.cleanup(upload.spooled.path)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.sweep_interval_sec)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Не удалось очистить staging: {e}")
@@ -1,20 +1,63 @@
 import re
-from typing import Union
+from functools import lru_cache
+from typing import Dict, Iterable, List, Union
 from transliterate import translit
 from services.logger_service import logger
 
+# Всё, что не может быть в имени колонки без кавычек
+_INVALID_CHARS = re.compile("[^a-zA-Z0-9_]")
+# Диапазоны кириллицы, которые покрывает языковой пакет ru
+_CYRILLIC_RANGES = ((0x0400, 0x04FF), (0x0500, 0x052F))
+
+
+def build_translation_table() -> Dict[int, str]:
+    # Правила пакета ru посимвольные, поэтому транслит каждой буквы по отдельности
+    # складывается в одну таблицу для str.translate с тем же результатом
+    table = {}
+    for start, end in _CYRILLIC_RANGES:
+        for code in range(start, end + 1):
+            char = chr(code)
+            latin = translit(char, language_code="ru", reversed=True)
+            if latin != char:
+                table[code] = latin
+    table[ord(" ")] = "_"
+    return table
+
 
 class TransliteService:
-    @staticmethod
-    def translite(text: Union[str, None]) -> str:
+    def __init__(self, cache_size: int = 4096):
+        self._table = build_translation_table()
+        self._cached = lru_cache(maxsize=cache_size)(self._translite)
+
+    def translite(self, text: Union[str, None]) -> str:
         if text is None:
             return ""
-        try:
-            text = translit(
-                text.strip().replace(" ", "_"), language_code="ru", reversed=True
-            )
-            clean_text = re.sub("[^a-zA-Z0-9_]", "", f"{text}")
-            return clean_text
-        except Exception as e:
-            logger.error(f"Не удалось выполнить транслит: {e}")
-            raise ValueError(f"Не удалось выполнить транслит: {e}")
+        return self._cached(text)
+
+    def translite_columns(self, columns: Iterable[object]) -> List[str]:
+        # Разные колонки могут дать одно имя ("Имя" и "имя!"), а СУБД сравнивают
+        # имена без учёта регистра. Первая колонка сохраняет имя, остальные
+        # получают суффикс _2, _3... в порядке следования
+        names = [self.translite(str(col)) for col in columns]
+        names = [name or f"column_{i + 1}" for i, name in enumerate(names)]
+        taken = {name.lower() for name in names}
+        seen = set()
+        result = []
+        for name in names:
+            key = name.lower()
+            if key in seen:
+                suffix = 2
+                while f"{key}_{suffix}" in taken:
+                    suffix += 1
+                logger.warning(
+                    f"Колонка '{name}' повторяется, переименована в '{name}_{suffix}'"
+                )
+                name = f"{name}_{suffix}"
+                key = name.lower()
+                taken.add(key)
+            seen.add(key)
+            result.append(name)
+        return result
+
+    def _translite(self, text: str) -> str:
+        return _INVALID_CHARS.sub("", text.strip().translate(self._table))
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+import pytest
+
+# Тесты запускаются из backend, как и само приложение
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.server import DatabaseServer
+from services.server_registry import ServerRegistry
+
+
+@pytest.fixture
+def pg_server() -> DatabaseServer:
+    return DatabaseServer(
+        id=4,
+        name="pg",
+        host="localhost",
+        port=5432,
+        username="user",
+        password="password",
+        database="db",
+        type="postgresql",
+    )
+
+
+@pytest.fixture
+def mysql_server() -> DatabaseServer:
+    return DatabaseServer(
+        id=3,
+        name="mysql",
+        host="localhost",
+        port=3306,
+        username="user",
+        password="password",
+        database="db",
+        type="mysql",
+    )
+
+
+@pytest.fixture
+def server_registry(tmp_path, pg_server, mysql_server) -> ServerRegistry:
+    path = tmp_path / "servers.json"
+    path.write_text(
+        json.dumps([pg_server.model_dump(), mysql_server.model_dump()]),
+        encoding="utf-8",
+    )
+    registry = ServerRegistry(str(path))
+    registry.load()
+    return registry
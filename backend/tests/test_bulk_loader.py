@@ -0,0 +1,124 @@
+import asyncio
+import contextlib
+import pandas as pd
+import pytest
+from models.pool_config import PoolConfig
+from services.bulk_loader_service import BulkLoaderService
+from services.executor_service import ExecutorService
+from services.metrics_service import MetricsService
+from services.pool_service import PoolService
+
+
+class FakePgConn:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def transaction(self):
+        @contextlib.asynccontextmanager
+        async def transaction():
+            yield
+            self.pool.committed.extend(self.pending)
+
+        return transaction()
+
+    async def copy_records_to_table(self, table, records, columns, schema_name):
+        self.pending = list(records)
+        if records[0][0] in self.pool.stuck:
+            await asyncio.Event().wait()
+        await asyncio.sleep(0.01)
+
+
+class FakePool:
+    # Как настоящий пул: не больше size соединений, лишние ждут освобождения
+    def __init__(self, size: int):
+        self.free = asyncio.Semaphore(size)
+        self.active = 0
+        self.peak = 0
+        self.committed = []
+        self.stuck = set()
+
+    async def acquire(self):
+        await self.free.acquire()
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        return FakePgConn(self)
+
+    async def release(self, conn):
+        self.active -= 1
+        self.free.release()
+
+    async def close(self):
+        pass
+
+    def get_size(self):
+        return self.peak
+
+    def get_idle_size(self):
+        return self.peak - self.active
+
+
+def make_loader(max_size: int, **kwargs) -> BulkLoaderService:
+    pool_service = PoolService(PoolConfig(max_size=max_size, acquire_timeout_sec=1))
+    pool = FakePool(max_size)
+
+    async def create_pool(server):
+        return pool
+
+    pool_service._create_pool = create_pool
+    loader = BulkLoaderService(
+        pool_service, MetricsService(), ExecutorService(), batch_size=1, **kwargs
+    )
+    loader.pool = pool
+    return loader
+
+
+def frames(start: int, rows: int):
+    return [pd.DataFrame({"id": range(start, start + rows)})]
+
+
+def test_ordered_load_fits_workers_into_pool(pg_server):
+    async def scenario():
+        loader = make_loader(max_size=3)
+        results = await loader.load_parallel(
+            pg_server, frames(0, 30), "t", "s", workers=16, ordered=True
+        )
+        return loader, results
+
+    loader, results = asyncio.run(scenario())
+    assert [r.index for r in results] == list(range(30))
+    assert loader.pool.committed == [(i,) for i in range(30)]
+    # Одно соединение осталось свободным для остальных запросов
+    assert loader.pool.peak == 2
+    assert loader.pool_service.stats()[0].reserved == 0
+
+
+def test_concurrent_ordered_loads_share_pool(pg_server):
+    async def scenario():
+        loader = make_loader(max_size=4)
+        return loader, await asyncio.wait_for(
+            asyncio.gather(
+                loader.load_parallel(
+                    pg_server, frames(0, 20), "a", "s", workers=8, ordered=True
+                ),
+                loader.load_parallel(
+                    pg_server, frames(100, 20), "b", "s", workers=8, ordered=True
+                ),
+            ),
+            timeout=5,
+        )
+
+    loader, (first, second) = asyncio.run(scenario())
+    assert sum(r.rows for r in first) == sum(r.rows for r in second) == 20
+    assert loader.pool.peak <= 4
+
+
+def test_partition_does_not_wait_for_its_turn_forever(pg_server):
+    async def scenario():
+        loader = make_loader(max_size=4, max_retries=0, turn_timeout_sec=0.05)
+        loader.pool.stuck.add(0)
+        await loader.load_parallel(
+            pg_server, frames(0, 5), "t", "s", workers=3, ordered=True
+        )
+
+    with pytest.raises(RuntimeError, match="очереди коммита"):
+        asyncio.run(asyncio.wait_for(scenario(), timeout=5))
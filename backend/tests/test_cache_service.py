@@ -0,0 +1,76 @@
+import time
+import pytest
+from models.cache_config import CacheConfig
+from models.dto.fetch_result import FetchResult
+from services.cache_service import QueryCacheService
+
+
+def result(rows: int) -> FetchResult:
+    return FetchResult(columns=[], rows=[(i, f"name{i}") for i in range(rows)])
+
+
+@pytest.mark.parametrize(
+    "query, cacheable",
+    [
+        ("select * from t", True),
+        ("  WITH x AS (select 1) select * from x", True),
+        ("select * from t where note = 'delete me'", True),
+        ("delete from t", False),
+        ("select * from t; drop table t", False),
+        ("select nextval('seq')", False),
+        ("select * into t2 from t", False),
+    ],
+)
+def test_only_read_only_queries_are_cacheable(query, cacheable):
+    cache = QueryCacheService()
+    assert cache.is_cacheable(cache.normalize(query)) is cacheable
+
+
+def test_normalize_keeps_literals():
+    cache = QueryCacheService()
+    assert (
+        cache.normalize("select  *\n from t where a = 'x  y' ;")
+        == "select * from t where a = 'x  y'"
+    )
+
+
+def test_hit_miss_and_ttl():
+    cache = QueryCacheService(CacheConfig(ttl_sec=0.05))
+    assert cache.get(1, "select 1") is None
+    cache.put(1, "select 1", result(3))
+    cached, age = cache.get(1, "select 1")
+    assert cached.rows == result(3).rows
+    assert cache.get(2, "select 1") is None
+
+    time.sleep(0.06)
+    assert cache.get(1, "select 1") is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries, stats.bytes) == (1, 3, 0, 0)
+
+
+def test_evicts_least_recently_used_over_budget():
+    entry_size = QueryCacheService()._estimate_size(result(100))
+    cache = QueryCacheService(
+        CacheConfig(max_bytes=entry_size * 2, max_entry_bytes=entry_size)
+    )
+    cache.put(1, "a", result(100))
+    cache.put(1, "b", result(100))
+    cache.get(1, "a")
+    cache.put(1, "c", result(100))
+
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "a") is not None
+    assert cache.get(1, "c") is not None
+    assert cache.stats().evictions == 1
+
+
+def test_skips_oversized_results_and_invalidates_by_server():
+    cache = QueryCacheService(CacheConfig(max_entry_bytes=1000))
+    cache.put(1, "big", result(1000))
+    assert cache.get(1, "big") is None
+
+    cache.put(1, "a", result(1))
+    cache.put(2, "a", result(1))
+    cache.invalidate_server(1)
+    assert cache.get(1, "a") is None
+    assert cache.get(2, "a") is not None
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import openpyxl
+import pandas as pd
+from models.executor_config import ExecutorConfig
+from services.executor_service import ExecutorService
+from services.export_service import ExportService
+from services.metrics_service import MetricsService
+
+
+def test_running_counts_only_started_tasks():
+    async def scenario():
+        service = ExecutorService(ExecutorConfig(io_workers=1))
+        gate = threading.Event()
+        tasks = [asyncio.create_task(service.run_io(gate.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        busy = service.stats()[0]
+        gate.set()
+        await asyncio.gather(*tasks)
+        idle = service.stats()[0]
+        await service.close()
+        return busy, idle
+
+    busy, idle = asyncio.run(scenario())
+    assert (busy.running, busy.queued) == (1, 2)
+    assert (idle.running, idle.queued) == (0, 0)
+    assert idle.completed_total == 3
+
+
+def test_excel_export_sends_only_paths_to_process_pool():
+    async def scenario():
+        executor = ExecutorService()
+        service = ExportService(executor, MetricsService(), chunk_rows=2)
+        sent = []
+        run_cpu = executor.run_cpu
+
+        async def spy(fn, *args, **kwargs):
+            sent.extend(args)
+            return await run_cpu(fn, *args, **kwargs)
+
+        executor.run_cpu = spy
+        frames = [pd.DataFrame([[1, "a"], [2, None]]), pd.DataFrame([[3, "c"]])]
+        path = await service.spool_file(frames, "excel", [0, 1])
+        try:
+            sheet = openpyxl.load_workbook(path).active
+            rows = [[cell.value for cell in row] for row in sheet.iter_rows()]
+        finally:
+            service.cleanup(path)
+            await executor.close()
+        return sent, rows
+
+    sent, rows = asyncio.run(scenario())
+    # Воркер получает путь к промежуточному Arrow IPC, а не сами фреймы
+    assert isinstance(sent[0], str) and sent[0].endswith(".arrow")
+    assert rows == [[0, 1], [1, "a"], [2, None], [3, "c"]]
@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+import os
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from dependencies.app_container import AppContainer
+from models.dto.column_stats import ColumnStats
+from models.dto.file_schema import FileSchema
+from models.dto.import_dto import ImportDTO
+from models.dto.spooled_file import SpooledFile
+from services.reader_service import ReaderService
+
+
+class FakePgConn:
+    def __init__(self):
+        self.ddl = []
+        self.records = []
+
+    def transaction(self):
+        @contextlib.asynccontextmanager
+        async def transaction():
+            yield
+
+        return transaction()
+
+    async def execute(self, query):
+        self.ddl.append(query)
+
+    async def copy_records_to_table(self, table, records, columns, schema_name):
+        self.records.extend(records)
+
+
+def write_csv(path, rows: int) -> SpooledFile:
+    # В первых 50 строках note и late пустые, дальше в note текст, в late числа
+    lines = ["id,note,late,amount"]
+    for i in range(1, rows + 1):
+        note = "" if i <= 50 else "hello"
+        late = "" if i <= 50 else str(i)
+        lines.append(f"{i},{note},{late},{i / 2}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return SpooledFile(path=str(path), size=os.path.getsize(path))
+
+
+@pytest.fixture
+def container(server_registry):
+    container = AppContainer(server_registry.json_path)
+    container.server_registry.load()
+    container.reader_service.chunk_size = 50
+    conn = FakePgConn()
+
+    @contextlib.asynccontextmanager
+    async def acquire(server):
+        yield conn
+
+    container.pool_service.acquire = acquire
+    container.conn = conn
+    return container
+
+
+def test_import_keeps_going_when_later_chunks_fill_empty_columns(
+    container, tmp_path, pg_server
+):
+    spooled = write_csv(tmp_path / "data.csv", 120)
+    dto = ImportDTO(table_name="t", schema_name="s", server_id=pg_server.id)
+
+    result = asyncio.run(
+        container.import_service._import_file(dto, pg_server, "csv", spooled)
+    )
+
+    assert result.status == "success", result.message
+    assert result.rows == 120
+    create = container.conn.ddl[-1]
+    # Целые по выборке расширены до bigint, пустые в выборке колонки строковые
+    assert "id bigint" in create
+    assert "note VARCHAR" in create
+    assert "late VARCHAR" in create
+    records = container.conn.records
+    assert records[0] == (1, None, None, 0.5)
+    assert records[-1] == (120, "hello", "120", 60.0)
+
+
+def test_whole_file_in_sample_keeps_narrow_integers(container, tmp_path, pg_server):
+    spooled = write_csv(tmp_path / "data.csv", 40)
+    dto = ImportDTO(table_name="t", schema_name="s", server_id=pg_server.id)
+
+    result = asyncio.run(
+        container.import_service._import_file(dto, pg_server, "csv", spooled)
+    )
+
+    assert result.status == "success", result.message
+    assert "id smallint" in container.conn.ddl[-1]
+
+
+def test_conform_reports_column_that_does_not_fit_sampled_type():
+    reader = ReaderService()
+    sample = pd.DataFrame({"amount": [1.5, 2.5]})
+    chunk = pd.DataFrame({"amount": ["3.5", "oops"]})
+
+    with pytest.raises(ValueError, match="amount"):
+        reader.conform(chunk, sample, ["float"])
+
+
+def test_conform_keeps_integers_with_gaps():
+    reader = ReaderService()
+    sample = pd.DataFrame({"id": [1, 2]})
+    chunk = pd.DataFrame({"id": [3.0, None]})
+
+    conformed = reader.conform(chunk, sample, ["integer"])
+
+    assert conformed["id"].dtype == "Int64"
+    assert conformed["id"].tolist()[0] == 3
+
+
+@pytest.mark.parametrize("batch_size", [0, -1])
+def test_batch_size_must_be_positive(batch_size):
+    with pytest.raises(ValidationError):
+        ImportDTO(table_name="t", schema_name="s", server_id=4, batch_size=batch_size)
+
+
+def test_leading_zeros_survive_chunk_boundary(container, tmp_path, pg_server):
+    # code строковый по первому чанку, extra в нём пуст; дальше оба похожи на числа
+    path = tmp_path / "codes.csv"
+    lines = ["id,code,extra", "1,A1,", "2,0007,", "3,B2,"]
+    lines += [f"{i},{i:04d},{i:05d}" for i in range(4, 10)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    spooled = SpooledFile(str(path), os.path.getsize(path))
+    container.reader_service.chunk_size = 3
+    dto = ImportDTO(table_name="t", schema_name="s", server_id=pg_server.id)
+
+    result = asyncio.run(
+        container.import_service._import_file(dto, pg_server, "csv", spooled)
+    )
+
+    assert result.status == "success", result.message
+    records = container.conn.records
+    assert records[1] == (2, "0007", None)
+    assert records[3:] == [(i, f"{i:04d}", f"{i:05d}") for i in range(4, 10)]
+
+
+def test_token_import_creates_preview_types(container, tmp_path, pg_server):
+    # Предпросмотр нашёл текст в code дальше первого чанка импорта
+    path = tmp_path / "codes.csv"
+    lines = ["id,code"] + [f"{i},{'X1' if i == 100 else i}" for i in range(1, 121)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    spooled = SpooledFile(str(path), os.path.getsize(path))
+    schema = FileSchema(
+        [
+            ColumnStats(
+                name="id", kind="integer", count=10, null_count=0, min=1, max=9
+            ),
+            ColumnStats(name="code", kind="string", count=10, null_count=0, max_len=3),
+        ],
+        128,
+    )
+    service = container.import_service
+    token = container.staging_service.stage(spooled, "codes.csv", "csv", schema)
+    dto = ImportDTO(
+        table_name="t", schema_name="s", server_id=pg_server.id, upload_token=token
+    )
+
+    async def run():
+        file_type, staged, staged_schema, release = await service._open_upload(dto)
+        try:
+            return await service._import_file(
+                dto, pg_server, file_type, staged, None, staged_schema
+            )
+        finally:
+            release()
+
+    result = asyncio.run(run())
+
+    assert result.status == "success", result.message
+    create = container.conn.ddl[-1]
+    assert "code VARCHAR(256)" in create
+    assert container.conn.records[99] == (100, "X1")
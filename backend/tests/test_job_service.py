@@ -0,0 +1,66 @@
+import asyncio
+from models.dto.query_result import QueryResult
+from services.job_service import JobService
+
+
+def loaded(server_name: str) -> QueryResult:
+    return QueryResult(server=server_name, status="success", message="ok", rows=1)
+
+
+def test_cleanup_runs_when_job_is_cancelled_in_queue(pg_server):
+    async def scenario():
+        service = JobService(max_per_server=1)
+        release = asyncio.Event()
+        cleaned = []
+
+        async def slow(job):
+            await release.wait()
+            return loaded(pg_server.name)
+
+        async def never(job):
+            raise AssertionError("runner не должен запускаться")
+
+        first = service.submit_many(
+            "import", [pg_server], slow, lambda: cleaned.append(1)
+        )
+        second = service.submit_many(
+            "import", [pg_server], never, lambda: cleaned.append(2)
+        )
+        await asyncio.sleep(0.01)
+        # Вторая задача ждёт семафор сервера, отменяем её в очереди
+        service.cancel(second.id)
+        await asyncio.sleep(0.01)
+        queued_cleanup = list(cleaned)
+
+        release.set()
+        await service._jobs[first.id].task
+        await asyncio.sleep(0)
+        return queued_cleanup, cleaned, service.get(first.id), service.get(second.id)
+
+    queued_cleanup, cleaned, first, second = asyncio.run(scenario())
+    assert queued_cleanup == [2]
+    assert sorted(cleaned) == [1, 2]
+    assert first.status == "success"
+    assert second.status == "cancelled"
+
+
+def test_cleanup_runs_when_job_is_cancelled_before_first_step(pg_server):
+    async def scenario():
+        service = JobService()
+        cleaned = []
+
+        async def runner(job):
+            return loaded(pg_server.name)
+
+        status = service.submit_many(
+            "import", [pg_server], runner, lambda: cleaned.append(1)
+        )
+        service.cancel(status.id)
+        await asyncio.gather(service._jobs[status.id].task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return cleaned, service.get(status.id)
+
+    cleaned, status = asyncio.run(scenario())
+    assert cleaned == [1]
+    assert status.status == "cancelled"
+    assert status.finished_at is not None
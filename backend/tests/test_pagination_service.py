@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from models.dto.page_query_dto import FilterDTO, PageQueryDTO
+from services.pagination_service import PaginationService
+
+
+def page(pg_server, query: str = "select * from t", **kwargs) -> PageQueryDTO:
+    return PageQueryDTO(query=query, selected_server=pg_server, **kwargs)
+
+
+def test_page_without_sort_is_ordered_by_first_column(pg_server):
+    sql, params = PaginationService().build_page_sql(page(pg_server), "postgresql")
+
+    assert sql.endswith("ORDER BY 1 LIMIT $1 OFFSET $2")
+    assert params == [101, 0]
+
+
+def test_query_own_order_is_kept(pg_server):
+    dto = page(pg_server, "select * from t order by created desc")
+
+    sql, _ = PaginationService().build_page_sql(dto, "mysql")
+
+    assert "ORDER BY 1" not in sql
+
+
+def test_sort_by_breaks_ties_by_first_column(pg_server):
+    dto = page(pg_server, sort_by="city", sort_dir="desc")
+
+    sql, _ = PaginationService().build_page_sql(dto, "oracle")
+
+    assert 'ORDER BY "city" DESC, 1 OFFSET :1 ROWS' in sql
+
+
+def test_json_filter_values_are_parsed_by_pg_parameter_types(pg_server):
+    dto = page(
+        pg_server,
+        filters=[
+            FilterDTO(column="day", op="gte", value="2024-01-31"),
+            FilterDTO(column="at", op="lt", value="2024-01-31T10:00:00+03:00"),
+            FilterDTO(column="amount", op="in", value=["1.50", 2]),
+            FilterDTO(column="code", op="eq", value=42),
+        ],
+    )
+    service = PaginationService()
+    _, params = service.build_page_sql(dto, "postgresql")
+    types = ["date", "timestamptz", "numeric", "numeric", "text", "int8", "int8"]
+
+    coerced = service.coerce_pg_params(params, types)
+
+    assert coerced[0] == date(2024, 1, 31)
+    assert coerced[1] == datetime.fromisoformat("2024-01-31T10:00:00+03:00")
+    assert coerced[2:4] == [Decimal("1.50"), Decimal("2")]
+    assert coerced[4] == "42"
+    assert coerced[5:] == [101, 0]
+
+
+def test_unparsable_filter_value_is_reported(pg_server):
+    with pytest.raises(ValueError, match="int4"):
+        PaginationService().coerce_pg_params(["abc"], ["int4"])
@@ -0,0 +1,189 @@
+import asyncio
+from models.pool_config import PoolConfig
+from services.pool_service import MYSQL_COM_RESET_CONNECTION, PoolService, _PoolEntry
+
+
+class FakePool:
+    def __init__(self):
+        self.closed = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def acquire(self):
+        await self.gate.wait()
+        return object()
+
+    async def release(self, conn):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    def get_size(self):
+        return 1
+
+    def get_idle_size(self):
+        return 1
+
+
+def make_service() -> PoolService:
+    service = PoolService(PoolConfig(idle_timeout_sec=0))
+
+    async def create_pool(server):
+        return FakePool()
+
+    service._create_pool = create_pool
+    return service
+
+
+def test_evict_skips_pool_taken_while_waiting_for_lock(pg_server):
+    async def scenario():
+        service = make_service()
+        async with service.acquire(pg_server):
+            pass
+        entry = service._pools[pg_server.id]
+        entry.pool.gate.clear()
+
+        # Замок занят, выселение ждёт его, а acquire в это время берёт пул
+        lock = service._locks[pg_server.id]
+        await lock.acquire()
+        evict = asyncio.create_task(service._evict(entry))
+        await asyncio.sleep(0)
+
+        async def use():
+            async with service.acquire(pg_server):
+                return entry.pool.closed
+
+        user = asyncio.create_task(use())
+        await asyncio.sleep(0)
+        lock.release()
+        await evict
+        entry.pool.gate.set()
+        return await user, service._pools.get(pg_server.id) is entry
+
+    closed_while_used, kept = asyncio.run(scenario())
+    assert not closed_while_used
+    assert kept
+
+
+def test_evict_closes_idle_pool(pg_server):
+    async def scenario():
+        service = make_service()
+        async with service.acquire(pg_server):
+            pass
+        entry = service._pools[pg_server.id]
+        await service._evict(entry)
+        return entry.pool.closed, pg_server.id in service._pools
+
+    closed, kept = asyncio.run(scenario())
+    assert closed
+    assert not kept
+
+
+def test_reserve_leaves_connection_for_other_requests(pg_server):
+    service = PoolService(PoolConfig(max_size=4))
+
+    with service.reserve(pg_server, 8) as first:
+        # Вторая загрузка получает остаток, но хотя бы одно соединение
+        with service.reserve(pg_server, 8) as second:
+            assert (first, second) == (3, 1)
+        with service.reserve(pg_server, 2) as third:
+            assert third == 1
+    assert service._reserved == {}
+
+
+class FakeMysqlConn:
+    def __init__(self, fail: bool = False):
+        self.closed = False
+        self.charset = "utf8mb4"
+        self.fail = fail
+        self.calls = []
+
+    async def _execute_command(self, command, sql):
+        if self.fail:
+            raise ConnectionError("reset не поддерживается")
+        self.calls.append(("command", command))
+
+    async def _read_ok_packet(self):
+        pass
+
+    async def set_charset(self, charset):
+        self.calls.append(("charset", charset))
+
+    async def autocommit(self, value):
+        self.calls.append(("autocommit", value))
+
+    async def select_db(self, db):
+        self.calls.append(("db", db))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMysqlPool:
+    def __init__(self):
+        self.released = []
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+def test_mysql_session_is_reset_before_reuse(mysql_server):
+    async def scenario():
+        service = PoolService()
+        entry = _PoolEntry(mysql_server, FakeMysqlPool())
+        conn = FakeMysqlConn()
+        await service._release_conn(entry, conn)
+        return entry.pool, conn
+
+    pool, conn = asyncio.run(scenario())
+    assert pool.released == [conn]
+    assert not conn.closed
+    assert conn.calls == [
+        ("command", MYSQL_COM_RESET_CONNECTION),
+        ("charset", "utf8mb4"),
+        ("autocommit", True),
+        ("db", mysql_server.database),
+    ]
+
+
+def test_mysql_connection_is_closed_when_reset_fails(mysql_server):
+    async def scenario():
+        service = PoolService()
+        entry = _PoolEntry(mysql_server, FakeMysqlPool())
+        conn = FakeMysqlConn(fail=True)
+        await service._release_conn(entry, conn)
+        return entry.pool, conn
+
+    pool, conn = asyncio.run(scenario())
+    # Закрытое соединение пул выбросит, а не отдаст следующему запросу
+    assert pool.released == [conn]
+    assert conn.closed
+
+
+class FakeOraclePool:
+    def __init__(self):
+        self.busy = 1
+        self.closed_busy = None
+
+    async def close(self, force=False):
+        self.closed_busy = self.busy
+
+
+def test_oracle_pool_waits_for_running_queries_before_close(pg_server):
+    async def scenario():
+        service = PoolService()
+        oracle = pg_server.model_copy(update={"type": "oracle"})
+        pool = FakeOraclePool()
+        service._pools[oracle.id] = _PoolEntry(oracle, pool)
+
+        async def finish_query():
+            await asyncio.sleep(0.15)
+            pool.busy = 0
+
+        query = asyncio.create_task(finish_query())
+        await service._close_entry(oracle.id)
+        await query
+        return pool.closed_busy
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from pydantic import ValidationError
+from models.admission_config import AdmissionConfig
+from models.dto.stream_query_dto import StreamQueryDTO
+from services.admission_service import AdmissionService
+from services.cache_service import QueryCacheService
+from services.metrics_service import MetricsService
+from services.pagination_service import PaginationService
+from services.pool_service import PoolService
+from services.query_service import QueryService
+from controllers.queryСontroller import ClosingStreamingResponse
+
+
+def make_service(server_registry) -> QueryService:
+    service = QueryService(
+        server_registry,
+        PoolService(),
+        AdmissionService(AdmissionConfig(per_server_limit=1, queue_timeout_sec=0.1)),
+        QueryCacheService(),
+        PaginationService(),
+        MetricsService(),
+    )
+
+    async def stream(server, query, chunk_size):
+        yield [{"id": 1}]
+
+    service._stream = stream
+    return service
+
+
+def active(service: QueryService) -> int:
+    return service.admission_service.stats().active
+
+
+def test_stream_query_holds_slot_until_closed(server_registry, pg_server):
+    async def scenario():
+        service = make_service(server_registry)
+        dto = StreamQueryDTO(query="select 1", selected_server=pg_server)
+        lines = await service.stream_query(dto)
+        held = active(service)
+        await lines.aclose()
+        return held, active(service)
+
+    assert asyncio.run(scenario()) == (1, 0)
+
+
+def test_row_stream_takes_no_slot_before_first_read(server_registry, pg_server):
+    async def scenario():
+        service = make_service(server_registry)
+        batches = await service.open_row_stream(pg_server.id, "select 1", 100)
+        before = active(service)
+        rows = [row async for batch in batches for row in batch]
+        return before, rows, active(service)
+
+    assert asyncio.run(scenario()) == (0, [{"id": 1}], 0)
+
+
+def test_response_releases_slot_when_client_leaves_before_body(
+    server_registry, pg_server
+):
+    async def scenario():
+        service = make_service(server_registry)
+        dto = StreamQueryDTO(query="select 1", selected_server=pg_server)
+        lines = await service.stream_query(dto)
+        response = ClosingStreamingResponse(lines)
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            # Клиент отключился, отправка зависает до отмены
+            await asyncio.Event().wait()
+
+        await response({"type": "http"}, receive, send)
+        return active(service)
+
+    assert asyncio.run(scenario()) == 0
+
+
+@pytest.mark.parametrize("field", [{"max_rows": -1}, {"chunk_size": 0}])
+def test_stream_limits_must_be_positive(pg_server, field):
+    with pytest.raises(ValidationError):
+        StreamQueryDTO(query="select 1", selected_server=pg_server, **field)
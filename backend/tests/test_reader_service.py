@@ -0,0 +1,50 @@
+import zipfile
+import openpyxl
+import pytest
+from services.reader_service import CalamineWorkbook, ReaderService
+
+
+def write_workbook(path):
+    # Первый лист лежит в sheet2.xml, активный - второй лист
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.append(["id", "name"])
+    for i in range(1, 4):
+        first.append([i, f"row {i}"])
+    second = workbook.create_sheet("other")
+    second.append(["other"])
+    for i in range(10):
+        second.append([i])
+    workbook.active = 1
+    workbook.save(path)
+
+    with zipfile.ZipFile(path) as archive:
+        parts = {name: archive.read(name) for name in archive.namelist()}
+    parts["xl/worksheets/sheet1.xml"], parts["xl/worksheets/sheet2.xml"] = (
+        parts["xl/worksheets/sheet2.xml"],
+        parts["xl/worksheets/sheet1.xml"],
+    )
+    rels = parts["xl/_rels/workbook.xml.rels"].decode()
+    rels = rels.replace("sheet1.xml", "tmp.xml").replace("sheet2.xml", "sheet1.xml")
+    parts["xl/_rels/workbook.xml.rels"] = rels.replace("tmp.xml", "sheet2.xml").encode()
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in parts.items():
+            archive.writestr(name, data)
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "calamine"])
+def test_excel_reads_first_sheet_not_active(tmp_path, engine):
+    if engine == "calamine" and CalamineWorkbook is None:
+        pytest.skip("python-calamine не установлен")
+    path = str(tmp_path / "book.xlsx")
+    write_workbook(path)
+    reader = ReaderService(excel_engine=engine)
+
+    # Лист короче head_rows прочитан целиком, оценку по xml проверяем на части
+    sample = reader.sample(path, "excel", head_rows=2)
+    chunks = list(reader.iter_chunks(path, "excel"))
+
+    assert list(sample.head.columns) == ["id", "name"]
+    assert (sample.estimated_rows, sample.exact) == (3, True)
+    assert list(chunks[0].columns) == ["id", "name"]
+    assert chunks[0]["id"].tolist() == [1, 2, 3]
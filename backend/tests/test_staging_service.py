@@ -0,0 +1,84 @@
+import os
+import pytest
+from models.dto.spooled_file import SpooledFile
+from models.staging_config import StagingConfig
+from services.reader_service import ReaderService
+from services.staging_service import StagingService
+
+
+def spool(tmp_path, name: str, size: int) -> SpooledFile:
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return SpooledFile(path=str(path), size=size)
+
+
+def make_service(**config) -> StagingService:
+    return StagingService(ReaderService(), StagingConfig(**config))
+
+
+def test_evicts_least_recently_used_idle_upload(tmp_path):
+    service = make_service(max_bytes=100)
+    a = spool(tmp_path, "a.csv", 40)
+    b = spool(tmp_path, "b.csv", 40)
+    token_a = service.stage(a, "a.csv", "csv")
+    token_b = service.stage(b, "b.csv", "csv")
+    # Обращение к a делает b самым давно использованным
+    service.checkout(token_a)
+    service.release(token_a)
+
+    token_c = service.stage(spool(tmp_path, "c.csv", 40), "c.csv", "csv")
+
+    assert token_c is not None
+    assert service.checkout(token_a).spooled == a
+    with pytest.raises(LookupError):
+        service.checkout(token_b)
+    assert not os.path.exists(b.path)
+    stats = service.stats()
+    assert (stats.uploads, stats.bytes, stats.evicted_total) == (2, 80, 1)
+
+
+def test_upload_in_use_is_not_evicted(tmp_path):
+    service = make_service(max_bytes=100)
+    a = spool(tmp_path, "a.csv", 60)
+    token_a = service.stage(a, "a.csv", "csv")
+    service.checkout(token_a)
+
+    rejected = service.stage(spool(tmp_path, "b.csv", 60), "b.csv", "csv")
+
+    assert rejected is None
+    assert os.path.exists(a.path)
+    stats = service.stats()
+    assert (stats.in_use, stats.rejected_total, stats.evicted_total) == (1, 1, 0)
+
+    # После release файл снова можно выселить
+    service.release(token_a)
+    assert service.stage(spool(tmp_path, "c.csv", 60), "c.csv", "csv") is not None
+    assert not os.path.exists(a.path)
+
+
+def test_rejects_file_larger_than_quota(tmp_path):
+    service = make_service(max_bytes=100)
+    token_a = service.stage(spool(tmp_path, "a.csv", 40), "a.csv", "csv")
+
+    assert service.stage(spool(tmp_path, "big.csv", 101), "big.csv", "csv") is None
+    assert service.checkout(token_a) is not None
+    assert service.stats().rejected_total == 1
+
+
+def test_sweep_removes_only_expired_idle_uploads(tmp_path):
+    service = make_service(ttl_sec=0)
+    idle = spool(tmp_path, "idle.csv", 10)
+    busy = spool(tmp_path, "busy.csv", 10)
+    token_idle = service.stage(idle, "idle.csv", "csv")
+    token_busy = service.stage(busy, "busy.csv", "csv")
+    service._uploads[token_busy].users = 1
+    for upload in service._uploads.values():
+        upload.last_used -= 1
+
+    service.sweep()
+
+    assert token_idle not in service._uploads
+    assert not os.path.exists(idle.path)
+    assert token_busy in service._uploads
+    assert os.path.exists(busy.path)
+    assert service.stats().bytes == 10
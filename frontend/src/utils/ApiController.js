@@ -23,19 +23,91 @@ export default class ApiController {
         }
     }
 
-    async import(file, tableName, schemaName, serverId) {
+    async queryPage(query, selected_server, { page = 1, limit = 100, sortBy = null, sortDir = 'asc', filters = [], withTotal = false } = {}) {
         try {
+            const res = await axios.post(`${config.FULL_HOST}/execute/page`, {
+                query,
+                selected_server,
+                page,
+                limit,
+                sort_by: sortBy,
+                sort_dir: sortDir,
+                filters,
+                with_total: withTotal
+            });
+            return res.data
+        } catch (e) {
+            console.error(e)
+        }
+    }
+
+    async import(file, tableName, schemaName, serverId, onProgress, uploadToken) {
+        try {
+            const job = await this.runImport(file, tableName, schemaName, { server_id: serverId }, onProgress, uploadToken);
+            return job.result ?? { server: job.server, status: job.status, message: job.message };
+        } catch (e) {
+            console.error(e);
+            throw e;
+        }
+    }
+
+    // Файл разбирается один раз и грузится на все серверы одновременно
+    async importMany(file, tableName, schemaName, serverIds, onProgress, uploadToken) {
+        try {
+            const job = await this.runImport(file, tableName, schemaName, { server_ids: serverIds }, onProgress, uploadToken);
+            // На один сервер задача возвращает обычный QueryResult
+            if (job.result?.results) return job.result.results;
+            if (job.result) return [job.result];
+            return serverIds.map(() => ({ status: 'error', message: job.message }));
+        } catch (e) {
+            console.error(e);
+            throw e;
+        }
+    }
+
+    async runImport(file, tableName, schemaName, targets, onProgress, uploadToken) {
+        const send = async (token) => {
             const formData = new FormData()
-            formData.append('upload_file', file)
+            // Файл из предпросмотра уже на сервере, передаём только его токен
+            if (token) formData.append('upload_token', token)
+            else formData.append('upload_file', file)
             formData.append('table_name', tableName)
             formData.append('schema_name', schemaName)
-            formData.append('server_id', serverId)
+            for (const [key, value] of Object.entries(targets)) {
+                for (const item of [].concat(value)) formData.append(key, item)
+            }
 
-            const res = await axios.post(`${config.FULL_HOST}/import`, formData, {
+            return axios.post(`${config.FULL_HOST}/import`, formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data'
                 }
             });
+        }
+
+        let res;
+        try {
+            res = await send(uploadToken);
+        } catch (e) {
+            // Токен устарел - загружаем файл заново
+            if (!uploadToken || e.response?.status !== 404) throw e;
+            res = await send(null);
+        }
+        return this.waitJob(res.data.id, onProgress);
+    }
+
+    async waitJob(jobId, onProgress, intervalMs = 1000) {
+        while (true) {
+            const res = await axios.get(`${config.FULL_HOST}/jobs/${jobId}`);
+            const job = res.data;
+            if (onProgress) onProgress(job);
+            if (!['queued', 'running'].includes(job.status)) return job;
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
+    async cancelJob(jobId) {
+        try {
+            const res = await axios.post(`${config.FULL_HOST}/jobs/${jobId}/cancel`);
             return res.data;
         } catch (e) {
             console.error(e);
@@ -57,6 +129,20 @@ export default class ApiController {
         }
     }
 
+    async exportQuery(query, serverId, format, maxRows = null) {
+        try {
+            const res = await axios.post(`${config.FULL_HOST}/export/query`, {
+                server_id: serverId, query, format, max_rows: maxRows
+            }, {
+                responseType: 'blob'
+            });
+
+            return res;
+        } catch (e) {
+            console.error(e);
+        }
+    }
+
     async previewImportFile(file) {
         try {
             const formData = new FormData();